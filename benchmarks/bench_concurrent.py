@@ -0,0 +1,85 @@
+"""
+Пропускная способность ConcurrentMovieCollection: чтения в секунду у нескольких
+потоков-читателей без писателя и с писателем, который публикует пакеты изменений.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_concurrent --size 100000 --readers 4 --seconds 3
+"""
+import argparse
+import threading
+import time
+from typing import List
+
+from movie_management.concurrent import ConcurrentMovieCollection
+from movie_management.movie import Movie
+
+from .synthetic import synthetic_movies
+
+
+def measure(collection: ConcurrentMovieCollection,
+            titles: List[str],
+            readers: int,
+            seconds: float,
+            batch_size: int,
+            with_writer: bool) -> None:
+    stop = threading.Event()
+    reads = [0] * readers
+    published = [0]
+
+    def reader(slot: int) -> None:
+        position = slot
+        while not stop.is_set():
+            collection.get_movie(titles[position % len(titles)])
+            collection.search_movies(year=2000 + position % 20, genre="драма", limit=20)
+            reads[slot] += 2
+            position += readers
+
+    def writer() -> None:
+        number = 0
+        while not stop.is_set():
+            with collection.batch() as draft:
+                for _ in range(batch_size):
+                    draft.add_movie(Movie(f"Новый фильм {number}", "Режиссер", 2001, "Драма", 7.5))
+                    number += 1
+            published[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(readers)]
+    if with_writer:
+        threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    label = "с писателем" if with_writer else "без писателя"
+    line = f"{readers} читателей {label}: {sum(reads) / seconds:,.0f} чтений/с"
+    if with_writer:
+        line += f", опубликовано версий: {published[0] / seconds:.1f}/с по {batch_size} изменений"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    movies = synthetic_movies(args.size)
+    collection = ConcurrentMovieCollection()
+    collection.add_movies(movies)
+    titles = [movie.title for movie in movies]
+
+    started = time.perf_counter()
+    collection.version().copy()
+    print(f"Копирование версии из {args.size} фильмов: {(time.perf_counter() - started) * 1000:.1f} мс")
+
+    measure(collection, titles, args.readers, args.seconds, args.batch_size, with_writer=False)
+    measure(collection, titles, args.readers, args.seconds, args.batch_size, with_writer=True)
+
+
+if __name__ == "__main__":
+    main()
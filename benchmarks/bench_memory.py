@@ -0,0 +1,88 @@
+"""
+Сравнение расхода памяти на фильм: прежний Movie с __dict__ и собственными
+копиями строк против Movie со __slots__ и общими строками режиссера и жанра.
+В обоих случаях фильмы лежат в словаре по нормализованному названию, как в
+MovieCollection._movies: новый Movie отдает туда свой готовый ключ.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_memory --size 1000000
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from movie_management.movie import Movie
+
+from .synthetic import DIRECTORS, GENRES, WORDS
+
+Row = Tuple[str, str, int, str, Optional[float]]
+
+
+class LegacyMovie:
+    """Прежнее представление фильма: атрибуты в __dict__, хеш считается при каждом вызове."""
+    def __init__(self, title: str, director: str, year: int, genre: str, rating: Optional[float] = None):
+        if not title:
+            raise ValueError("Название фильма не может быть пустым.")
+        self.title = title
+        self.director = director
+        self.year = year
+        self.genre = genre
+        self.rating = rating
+
+
+def rows(size: int, seed: int = 42) -> Iterator[Row]:
+    """Строки каталога с собственными копиями строк, как после разбора файла."""
+    rng = random.Random(seed)
+    for number in range(size):
+        title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {number}"
+        director = "".join(list(rng.choice(DIRECTORS)))
+        genre = "".join(list(rng.choice(GENRES)))
+        rating = round(rng.uniform(1.0, 10.0), 1) if rng.random() > 0.1 else None
+        yield title, director, rng.randint(1920, 2024), genre, rating
+
+
+def build_legacy(size: int) -> Dict[str, object]:
+    movies: Dict[str, object] = {}
+    for row in rows(size):
+        movies[row[0].strip().lower()] = LegacyMovie(*row)
+    return movies
+
+
+def build_compact(size: int) -> Dict[str, object]:
+    # Та же таблица строк, что ведет MovieCollection в add_movie
+    strings: Dict[str, str] = {}
+    movies: Dict[str, object] = {}
+    for title, director, year, genre, rating in rows(size):
+        movie = Movie(title, strings.setdefault(director, director), year,
+                      strings.setdefault(genre, genre), rating)
+        movies[movie.key] = movie
+    return movies
+
+
+def measure(build: Callable[[int], Dict[str, object]], size: int) -> float:
+    """Возвращает число байт на фильм, занятых построенным словарем."""
+    gc.collect()
+    tracemalloc.start()
+    movies = build(size)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del movies
+    return used / size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    before = measure(build_legacy, args.size)
+    after = measure(build_compact, args.size)
+    print(f"До (__dict__, копии строк): {before:.1f} байт на фильм")
+    print(f"После (__slots__, общие строки): {after:.1f} байт на фильм")
+    print(f"Экономия: {(1 - after / before) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Сравнение поиска по подстроке с индексом n-грамм и без него.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_ngram --size 1000000
+"""
+import argparse
+import time
+from typing import Dict, List, Optional
+
+from movie_management.collection import MovieCollection
+from movie_management.movie import Movie
+
+from .synthetic import synthetic_movies
+
+QUERIES: List[Dict[str, str]] = [
+    {"title": "рыцарь 12"},
+    {"title": "golden riv"},
+    {"title": "ор"},  # Короче n-граммы - работает запасной путь с перебором
+    {"director": "нолан"},
+    {"genre": "фантаст", "title": "ночь"},
+]
+
+
+def build(movies: List[Movie], ngram_size: Optional[int]) -> MovieCollection:
+    collection = MovieCollection(ngram_size=ngram_size)
+    collection.add_movies(movies)
+    return collection
+
+
+def time_query(collection: MovieCollection, query: Dict[str, str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        collection.search_movies(**query)  # type: ignore[arg-type]
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ngram", type=int, default=3)
+    args = parser.parse_args()
+
+    movies = synthetic_movies(args.size)
+    for label, ngram_size in (("перебор", None), (f"{args.ngram}-граммы", args.ngram)):
+        started = time.perf_counter()
+        collection = build(movies, ngram_size)
+        print(f"[{label}] построение {args.size} фильмов: {time.perf_counter() - started:.2f} с")
+        for query in QUERIES:
+            elapsed = time_query(collection, query, args.repeat)
+            found = len(collection.search_movies(**query))  # type: ignore[arg-type]
+            print(f"[{label}] {query}: {elapsed * 1000:.2f} мс, найдено {found}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Нагрузочный тест HTTP-сервера из main.py на localhost.
+
+Несколько клиентов держат постоянные соединения и шлют запросы один за другим;
+затем те же запросы отправляются пакетами через /batch. По умолчанию сервер
+с синтетическим каталогом поднимается в этом же процессе (в отдельном потоке);
+--port направляет нагрузку на уже запущенный сервер.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_server --size 100000 --clients 16 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+from main import MovieServer, MovieService
+from movie_management.concurrent import ConcurrentMovieCollection
+
+from .synthetic import GENRES, synthetic_movies
+
+
+def start_server(size: int) -> Tuple[int, List[str]]:
+    """Поднимает сервер с синтетическим каталогом в фоновом потоке и возвращает его порт."""
+    movies = synthetic_movies(size)
+    collection = ConcurrentMovieCollection()
+    collection.add_movies(movies)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(MovieServer(MovieService(collection)).start("127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1], [movie.title for movie in movies]
+
+
+def make_paths(titles: List[str], count: int, seed: int = 7) -> List[str]:
+    """Смесь запросов: три четверти - фильм по названию, остальное - поиск страницами по 20."""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        if rng.random() < 0.75:
+            paths.append(f"/movies/{quote(rng.choice(titles))}")
+        else:
+            paths.append(f"/search?genre={quote(rng.choice(GENRES))}&year={rng.randint(1920, 2024)}&limit=20")
+    return paths
+
+
+async def exchange(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                   method: str, path: str, body: Optional[bytes] = None) -> int:
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body or b'')}\r\n\r\n"
+    writer.write(head.encode("latin-1") + (body or b""))
+    status_line = await reader.readuntil(b"\r\n")
+    headers = await reader.readuntil(b"\r\n\r\n")
+    length = next(int(line.split(b":")[1]) for line in headers.split(b"\r\n")
+                  if line.lower().startswith(b"content-length"))
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def client(port: int, paths: List[str], batch_size: int, latencies: List[float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    if batch_size <= 1:
+        for path in paths:
+            started = time.perf_counter()
+            await exchange(reader, writer, "GET", path)
+            latencies.append(time.perf_counter() - started)
+    else:
+        for start in range(0, len(paths), batch_size):
+            chunk = paths[start:start + batch_size]
+            body = json.dumps({"requests": [{"path": path} for path in chunk]}).encode("utf-8")
+            started = time.perf_counter()
+            await exchange(reader, writer, "POST", "/batch", body)
+            latencies.append(time.perf_counter() - started)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(port: int, paths: List[str], clients: int, batch_size: int) -> None:
+    latencies: List[float] = []
+    share = len(paths) // clients
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, paths[number * share:(number + 1) * share], batch_size, latencies)
+                           for number in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    label = "по одному" if batch_size <= 1 else f"пакетами по {batch_size}"
+    print(f"{label}: {share * clients / elapsed:,.0f} запросов/с, "
+          f"задержка обмена p50 {statistics.median(latencies) * 1000:.2f} мс, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} мс")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--port", type=int, help="порт уже запущенного сервера")
+    args = parser.parse_args()
+
+    if args.port is None:
+        port, titles = start_server(args.size)
+    else:
+        port, titles = args.port, [movie.title for movie in synthetic_movies(args.size)]
+    paths = make_paths(titles, args.requests)
+    asyncio.run(run(port, paths, args.clients, 1))
+    asyncio.run(run(port, paths, args.clients, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Поиск с полным перебором: одна MovieCollection против ShardedMovieCollection
+с сегментами в отдельных процессах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_sharded --size 1000000 --shards 4
+"""
+import argparse
+import time
+
+from movie_management.collection import MovieCollection
+from movie_management.sharded import ShardedMovieCollection
+
+from .synthetic import synthetic_movies
+
+QUERIES = [
+    {"title": "на", "limit": 20},
+    {"title": "ро", "order_by": "-rating", "limit": 20},
+    {"title": "ть", "min_rating": 5.0},
+]
+
+
+def timed(collection, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            collection.search_movies(**query)
+    return (time.perf_counter() - started) / (repeat * len(QUERIES)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    movies = synthetic_movies(args.size)
+    single = MovieCollection()
+    single.add_movies(movies)
+    print(f"Одна коллекция: {timed(single, args.repeat):.1f} мс на запрос")
+
+    with ShardedMovieCollection(shards=args.shards) as sharded:
+        sharded.add_movies(synthetic_movies(args.size))
+        started = time.perf_counter()
+        sharded.search_movies(year=2000)
+        print(f"Сохранение сегментов и загрузка в процессах: {time.perf_counter() - started:.2f} с")
+        print(f"{args.shards} сегментов: {timed(sharded, args.repeat):.1f} мс на запрос")
+        sharded.remove_movie(movies[0].title)
+        started = time.perf_counter()
+        sharded.search_movies(year=2000)
+        print(f"Первый поиск после изменения: {(time.perf_counter() - started) * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
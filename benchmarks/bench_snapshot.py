@@ -0,0 +1,46 @@
+"""
+Время запуска коллекции: повторное добавление всех фильмов против открытия снимка.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_snapshot --size 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from movie_management.collection import MovieCollection
+
+from .synthetic import synthetic_movies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    movies = synthetic_movies(args.size)
+    started = time.perf_counter()
+    collection = MovieCollection()
+    collection.add_movies(movies)
+    print(f"Добавление {args.size} фильмов: {time.perf_counter() - started:.2f} с")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.snap")
+        started = time.perf_counter()
+        collection.save_snapshot(path)
+        print(f"Сохранение снимка: {time.perf_counter() - started:.2f} с, "
+              f"{os.path.getsize(path) / args.size:.1f} байт на фильм")
+
+        started = time.perf_counter()
+        restored = MovieCollection.open_snapshot(path)
+        restored.get_movie(movies[len(movies) // 2].title)
+        print(f"Открытие снимка и первый get_movie: {(time.perf_counter() - started) * 1000:.2f} мс")
+
+        started = time.perf_counter()
+        restored.search_movies(year=2000)
+        print(f"Полная загрузка при первом поиске: {time.perf_counter() - started:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
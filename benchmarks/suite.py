@@ -0,0 +1,264 @@
+"""
+Набор бенчмарков публичных операций MovieCollection с сохранением результатов в JSON.
+
+Каталоги строит детерминированный генератор zipf_movies, поэтому при одинаковых
+размере и seed замеры разных версий кода сравнимы. Для каждой операции
+сохраняется лучшее из --repeat повторений время одного вызова в микросекундах,
+а также расход памяти на фильм в байтах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite run --sizes 10000 100000 --output current.json
+    python -m benchmarks.suite compare baseline.json current.json --threshold 0.25
+
+compare печатает изменения и завершается с кодом 1, если хотя бы одна метрика
+стала хуже базовой больше чем на threshold (0.25 - на 25%).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+from movie_management.collection import MovieCollection
+from movie_management.exceptions import MovieNotFoundError
+
+from .synthetic import SIZES, zipf_movies
+
+Results = Dict[str, float]
+
+# Размер выборки для точечных операций (get_movie, remove_movie и т. п.).
+SAMPLE = 1000
+
+
+def best_time(action: Callable[[], object], calls: int, repeat: int,
+              setup: Optional[Callable[[], object]] = None) -> float:
+    """
+    Лучшее из repeat повторений время одного вызова в микросекундах.
+    action выполняет calls вызовов операции; setup готовит состояние перед каждым повторением.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    return best / calls * 1_000_000
+
+
+def memory_per_movie(size: int, seed: int) -> float:
+    """Байт на фильм: сами фильмы плюс все структуры коллекции."""
+    gc.collect()
+    tracemalloc.start()
+    collection = MovieCollection()
+    collection.add_movies(zipf_movies(size, seed))
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del collection
+    return allocated / size
+
+
+def bench_size(size: int, seed: int, repeat: int) -> Results:
+    """Замеряет все операции на каталоге заданного размера."""
+    movies = zipf_movies(size, seed)
+    rng = random.Random(seed)
+    sample = rng.sample(movies, min(SAMPLE, size))
+    titles = [movie.title for movie in sample]
+    busiest_director = movies[0].director.split()[-1].lower()
+    results: Results = {}
+
+    def build() -> MovieCollection:
+        built = MovieCollection()
+        built.add_movies(movies)
+        return built
+
+    results["add_movies"] = best_time(build, size, min(repeat, 3))
+    collection = build()
+
+    results["get_movie"] = best_time(lambda: [collection.get_movie(title) for title in titles], len(titles), repeat)
+
+    def remove_sample() -> None:
+        for title in titles:
+            collection.remove_movie(title)
+
+    def add_sample() -> None:
+        for movie in sample:
+            collection.add_movie(movie)
+
+    def drop_sample() -> None:
+        for title in titles:
+            try:
+                collection.remove_movie(title)
+            except MovieNotFoundError:
+                pass
+
+    # Подготовка каждого повторения возвращает коллекцию в нужное состояние
+    # и допускает, что она уже в нем (add_movies пропускает имеющиеся фильмы).
+    results["remove_movie"] = best_time(remove_sample, len(titles), repeat, setup=lambda: collection.add_movies(sample))
+    results["add_movie"] = best_time(add_sample, len(titles), repeat, setup=drop_sample)
+
+    searches = {
+        "search_movies.director": {"director": busiest_director},
+        "search_movies.genre": {"genre": "комед"},
+        "search_movies.year": {"year": 2000},
+        "search_movies.min_rating": {"min_rating": 9.0},
+        "search_movies.title": {"title": "солнце"},
+        "search_movies.combined": {"genre": "драма", "year": 2010, "min_rating": 7.0},
+        "search_movies.top20_by_rating": {"genre": "драма", "order_by": "-rating", "limit": 20},
+        "search_movies.page_by_title": {"offset": size // 2, "limit": 20},
+    }
+    calls = max(1, 1_000_000 // size)
+    for name, query in searches.items():
+        results[name] = best_time(lambda: [collection.search_movies(**query) for _ in range(calls)], calls, repeat)
+
+    def first_page() -> None:
+        results_iter = collection.iter_search_movies(genre="драма")
+        for _ in range(20):
+            next(results_iter, None)
+
+    results["iter_search_movies.first20"] = best_time(lambda: [first_page() for _ in range(calls)], calls, repeat)
+    prefixes = [title[:3] for title in titles]
+    results["autocomplete"] = best_time(
+        lambda: [collection.autocomplete(prefix) for prefix in prefixes], len(prefixes), repeat)
+    results["autocomplete.by_rating"] = best_time(
+        lambda: [collection.autocomplete(prefix, order_by="-rating") for prefix in prefixes], len(prefixes), repeat)
+    results["list_all_movies"] = best_time(collection.list_all_movies, 1, repeat)
+    results["list_all_movies.top20_by_year"] = best_time(
+        lambda: collection.list_all_movies(order_by="-year", limit=20), 1, repeat)
+    results["iterate"] = best_time(lambda: sum(1 for _ in collection), 1, repeat)
+    results["len"] = best_time(lambda: [len(collection) for _ in range(SAMPLE)], SAMPLE, repeat)
+    results["copy"] = best_time(collection.copy, 1, min(repeat, 3))
+
+    # Индекс fuzzy_search строится при первом вызове, поэтому замеряется после copy.
+    typos = [title[:-1] + "ы" for title in titles[:100]]
+    collection.fuzzy_search(typos[0])
+    results["fuzzy_search"] = best_time(lambda: [collection.fuzzy_search(typo, 1) for typo in typos], len(typos), repeat)
+    results["fuzzy_search.k2"] = best_time(lambda: [collection.fuzzy_search(typo, 2) for typo in typos], len(typos), repeat)
+
+    names = [f"Подборка {number}" for number in range(100)]
+
+    def create_collections() -> None:
+        for name in names:
+            collection.create_named_collection(name)
+
+    def remove_collections() -> None:
+        for name in names:
+            collection.remove_named_collection(name)
+
+    def reset_collections(present: bool) -> None:
+        existing = set(collection.list_named_collections())
+        for name in names:
+            if present and name not in existing:
+                collection.create_named_collection(name)
+            elif not present and name in existing:
+                collection.remove_named_collection(name)
+
+    results["create_named_collection"] = best_time(create_collections, len(names), repeat,
+                                                   setup=lambda: reset_collections(False))
+    results["list_named_collections"] = best_time(
+        lambda: [collection.list_named_collections() for _ in range(SAMPLE)], SAMPLE, repeat)
+    results["add_movie_to_named_collection"] = best_time(
+        lambda: [collection.add_movie_to_named_collection(title, names[0]) for title in titles], len(titles), repeat)
+    results["add_movies_to_named_collection"] = best_time(
+        lambda: collection.add_movies_to_named_collection(titles, names[1]), len(titles), repeat)
+    results["get_movies_in_named_collection"] = best_time(
+        lambda: collection.get_movies_in_named_collection(names[0]), 1, repeat)
+    results["collections_containing"] = best_time(
+        lambda: [collection.collections_containing(title) for title in titles], len(titles), repeat)
+
+    def refill() -> None:
+        collection.add_movies_to_named_collection(titles, names[0])
+
+    results["remove_movie_from_named_collection"] = best_time(
+        lambda: [collection.remove_movie_from_named_collection(title, names[0]) for title in titles],
+        len(titles), repeat, setup=refill)
+    results["remove_named_collection"] = best_time(remove_collections, len(names), repeat,
+                                                   setup=lambda: reset_collections(True))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.snap")
+        results["save_snapshot"] = best_time(lambda: collection.save_snapshot(path), 1, min(repeat, 3))
+        results["open_snapshot"] = best_time(
+            lambda: MovieCollection.open_snapshot(path).get_movie(titles[0]), 1, repeat)
+
+    results["memory.bytes_per_movie"] = memory_per_movie(size, seed)
+    return results
+
+
+def run(sizes: Sequence[int], seed: int, repeat: int, output: str) -> None:
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "sizes": {},
+    }
+    for size in sizes:
+        started = time.perf_counter()
+        report["sizes"][str(size)] = bench_size(size, seed, repeat)
+        print(f"Каталог {size}: {time.perf_counter() - started:.1f} с")
+    with open(output, "w", encoding="utf-8") as target:
+        json.dump(report, target, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены в '{output}'.")
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> List[str]:
+    """Печатает изменения метрик и возвращает список регрессий вида 'размер/метрика'."""
+    with open(baseline_path, encoding="utf-8") as source:
+        baseline = json.load(source)["sizes"]
+    with open(current_path, encoding="utf-8") as source:
+        current = json.load(source)["sizes"]
+
+    regressions = []
+    for size in sorted(set(baseline) & set(current), key=int):
+        print(f"Каталог {size}:")
+        for metric in sorted(set(baseline[size]) & set(current[size])):
+            before, after = baseline[size][metric], current[size][metric]
+            change = after / before - 1 if before else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  РЕГРЕССИЯ"
+                regressions.append(f"{size}/{metric}")
+            print(f"  {metric:<40} {before:>14.2f} {after:>14.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="выполнить замеры и сохранить их в JSON")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES[:2]),
+                            help=f"размеры каталогов (стандартные: {', '.join(map(str, SIZES))})")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", default="benchmark-results.json")
+
+    compare_parser = commands.add_parser("compare", help="сравнить результаты с базовыми")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.25)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args.sizes, args.seed, args.repeat, args.output)
+    else:
+        regressions = compare(args.baseline, args.current, args.threshold)
+        if regressions:
+            print(f"Регрессий: {len(regressions)}")
+            sys.exit(1)
+        print("Регрессий нет.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Детерминированный генератор синтетических каталогов фильмов для бенчмарков."""
+import itertools
+import random
+from typing import List, Optional, Sequence
+
+from movie_management.movie import Movie
+
+WORDS = [
+    "темный", "рыцарь", "начало", "матрица", "звезда", "война", "город", "ночь",
+    "последний", "король", "море", "тайна", "дорога", "лето", "зима", "остров",
+    "shadow", "river", "empire", "night", "golden", "silent", "lost", "return",
+]
+DIRECTORS = [
+    "Кристофер Нолан", "Квентин Тарантино", "Дени Вильнёв", "Вачовски",
+    "Пон Джун-хо", "Андрей Тарковский", "Stanley Kubrick", "Ridley Scott",
+]
+GENRES = ["Научная фантастика", "Боевик", "Криминал", "Драма", "Комедия", "Триллер"]
+
+
+def synthetic_movies(size: int, seed: int = 42, fresh_strings: bool = False) -> List[Movie]:
+    """
+    Строит детерминированный набор фильмов с уникальными названиями.
+    fresh_strings=True дает каждому фильму собственные копии строк режиссера
+    и жанра - как при чтении каталога из файла.
+    """
+    rng = random.Random(seed)
+    movies = []
+    for number in range(size):
+        title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {number}"
+        director = rng.choice(DIRECTORS)
+        genre = rng.choice(GENRES)
+        if fresh_strings:
+            director = "".join(list(director))
+            genre = "".join(list(genre))
+        rating: Optional[float] = round(rng.uniform(1.0, 10.0), 1) if rng.random() > 0.1 else None
+        movies.append(Movie(title, director, rng.randint(1920, 2024), genre, rating))
+    return movies
+
+
+# Словари для реалистичного каталога: названия из русских и английских слов,
+# режиссеры - сочетания имен и фамилий.
+TITLE_WORDS_RU = [
+    "темный", "рыцарь", "начало", "матрица", "звезда", "война", "город", "ночь", "последний",
+    "король", "море", "тайна", "дорога", "лето", "зима", "остров", "сталкер", "солярис",
+    "брат", "сибирский", "цирюльник", "утомленные", "солнцем", "ирония", "судьбы", "москва",
+    "слезам", "не", "верит", "белое", "солнце", "пустыни", "иван", "васильевич", "меняет",
+    "профессию", "левиафан", "возвращение", "дом", "легенда", "движение", "вверх", "экипаж",
+]
+TITLE_WORDS_EN = [
+    "the", "dark", "knight", "shadow", "river", "empire", "night", "golden", "silent", "lost",
+    "return", "star", "wars", "blade", "runner", "alien", "heat", "fargo", "memento", "gravity",
+]
+FIRST_NAMES = [
+    "Андрей", "Никита", "Алексей", "Сергей", "Федор", "Георгий", "Эльдар", "Леонид", "Лариса",
+    "Кира", "Christopher", "Quentin", "Denis", "Stanley", "Ridley", "Sofia", "Greta", "Bong",
+]
+LAST_NAMES = [
+    "Тарковский", "Михалков", "Балабанов", "Бондарчук", "Звягинцев", "Данелия", "Рязанов",
+    "Гайдай", "Шепитько", "Муратова", "Nolan", "Tarantino", "Villeneuve", "Kubrick", "Scott",
+    "Coppola", "Gerwig", "Joon-ho", "Герман", "Кончаловский", "Сокуров", "Хуциев",
+]
+ZIPF_GENRES = [
+    "Драма", "Комедия", "Боевик", "Триллер", "Научная фантастика", "Криминал", "Мелодрама",
+    "Ужасы", "Приключения", "Мультфильм", "Документальный", "Военный", "Вестерн", "Мюзикл",
+]
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """Веса рангов 1..count по закону Ципфа: вес ранга r пропорционален 1 / r ** exponent."""
+    return [1.0 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def _zipf_choices(rng: random.Random, population: Sequence[str], size: int, exponent: float) -> List[str]:
+    cumulative = list(itertools.accumulate(zipf_weights(len(population), exponent)))
+    return rng.choices(population, cum_weights=cumulative, k=size)
+
+
+def zipf_movies(size: int, seed: int = 42, exponent: float = 1.1) -> List[Movie]:
+    """
+    Строит детерминированный каталог с распределением Ципфа для режиссеров и жанров:
+    несколько режиссеров и жанров встречаются очень часто, длинный хвост - редко.
+    Названия из одного-четырех русских или английских слов; при совпадении
+    к названию добавляется номер в скобках, так что все названия уникальны.
+    """
+    rng = random.Random(seed)
+    directors = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    rng.shuffle(directors)
+    director_column = _zipf_choices(rng, directors, size, exponent)
+    genre_column = _zipf_choices(rng, ZIPF_GENRES, size, exponent)
+
+    seen = set()
+    movies = []
+    for number in range(size):
+        words = TITLE_WORDS_RU if rng.random() < 0.7 else TITLE_WORDS_EN
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4))).capitalize()
+        if title.lower() in seen:
+            title = f"{title} ({number})"
+        seen.add(title.lower())
+        rating: Optional[float] = round(min(max(rng.gauss(6.5, 1.3), 1.0), 10.0), 1) if rng.random() > 0.1 else None
+        year = min(1920 + int(rng.betavariate(4, 1.5) * 105), 2024)
+        movies.append(Movie(title, director_column[number], year, genre_column[number], rating))
+    return movies
@@ -0,0 +1,293 @@
+"""
+Локальный HTTP/JSON-сервер над коллекцией фильмов (только стандартная библиотека).
+
+Запуск:
+    python main.py --port 8080 --load catalog.csv
+
+Маршруты (ответы - JSON):
+    GET    /movies?order_by=&offset=&limit=        список фильмов
+    POST   /movies                                 добавить фильм (тело - поля фильма)
+    GET    /movies/<название>                      фильм по названию
+    DELETE /movies/<название>                      удалить фильм
+    GET    /search?title=&director=&year=&genre=&min_rating=&in_collection=&order_by=&offset=&limit=
+    GET    /collections                            имена подборок
+    POST   /collections                            создать подборку ({"name": ...})
+    GET    /collections/<имя>?order_by=&offset=&limit=
+    DELETE /collections/<имя>                      удалить подборку
+    POST   /collections/<имя>/movies               добавить фильм ({"title": ...})
+    DELETE /collections/<имя>/movies/<название>    убрать фильм из подборки
+    POST   /batch                                  несколько запросов за один обмен
+
+Тело /batch: {"requests": [{"method": "GET", "path": "/search?genre=драма"}, ...]};
+ответ: {"responses": [{"status": 200, "body": ...}, ...]} в том же порядке.
+
+Соединения HTTP/1.1 по умолчанию остаются открытыми (keep-alive).
+Поиск, списки, пакеты и все изменения выполняются в пуле потоков, чтобы цикл
+событий продолжал обслуживать остальные соединения: изменение копирует версию
+ConcurrentMovieCollection целиком и безопасно для одновременных чтений.
+"""
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from movie_management.concurrent import ConcurrentMovieCollection
+from movie_management.exceptions import (
+    MovieNotFoundError,
+    MovieAlreadyExistsError,
+    CollectionNotFoundError,
+    CollectionAlreadyExistsError
+)
+from movie_management.transfer import FORMATS, import_movies, movie_to_row, row_to_movie
+
+MAX_BODY_SIZE = 1024 * 1024
+MAX_BATCH_SIZE = 1000
+
+# Исключения коллекции и соответствующие им коды ответа.
+ERROR_STATUSES = (
+    (MovieNotFoundError, HTTPStatus.NOT_FOUND),
+    (CollectionNotFoundError, HTTPStatus.NOT_FOUND),
+    (MovieAlreadyExistsError, HTTPStatus.CONFLICT),
+    (CollectionAlreadyExistsError, HTTPStatus.CONFLICT),
+    (ValueError, HTTPStatus.BAD_REQUEST),
+    (TypeError, HTTPStatus.BAD_REQUEST),
+    (KeyError, HTTPStatus.BAD_REQUEST),
+)
+
+Response = Tuple[int, Any]
+
+
+class MovieService:
+    """
+    Обработчик запросов к коллекции, не зависящий от транспорта:
+    принимает метод, путь с параметрами и тело, возвращает код ответа и данные.
+    """
+    def __init__(self, collection: ConcurrentMovieCollection) -> None:
+        self.collection = collection
+
+    def is_heavy(self, method: str, path: str) -> bool:
+        """Определяет запросы, которые стоит выполнять вне цикла событий."""
+        if method != "GET":
+            # Любое изменение копирует версию коллекции - это время, пропорциональное ее размеру.
+            return True
+        parts = _split_path(path)
+        return parts in (["search"], ["movies"]) or (len(parts) == 2 and parts[0] == "collections")
+
+    def dispatch(self, method: str, target: str, body: Any = None) -> Response:
+        """Выполняет запрос и переводит исключения в коды ответа."""
+        try:
+            return self._route(method, target, body)
+        except Exception as error:
+            for error_type, status in ERROR_STATUSES:
+                if isinstance(error, error_type):
+                    return status, {"error": str(error)}
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Внутренняя ошибка: {error}"}
+
+    def _route(self, method: str, target: str, body: Any) -> Response:
+        url = urlsplit(target)
+        parts = _split_path(url.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        collection = self.collection
+
+        if parts == ["batch"] and method == "POST":
+            return HTTPStatus.OK, {"responses": self._batch(body)}
+        if parts == ["search"] and method == "GET":
+            movies = collection.search_movies(
+                title=query.get("title"),
+                director=query.get("director"),
+                year=_optional(query, "year", int),
+                genre=query.get("genre"),
+                min_rating=_optional(query, "min_rating", float),
+                in_collection=query.get("in_collection"),
+                **_page(query),
+            )
+            return HTTPStatus.OK, [movie_to_row(movie) for movie in movies]
+        if parts == ["movies"]:
+            if method == "GET":
+                return HTTPStatus.OK, [movie_to_row(movie) for movie in collection.list_all_movies(**_page(query))]
+            if method == "POST":
+                movie = row_to_movie(_object(body))
+                collection.add_movie(movie)
+                return HTTPStatus.CREATED, movie_to_row(movie)
+        if len(parts) == 2 and parts[0] == "movies":
+            if method == "GET":
+                return HTTPStatus.OK, movie_to_row(collection.get_movie(parts[1]))
+            if method == "DELETE":
+                collection.remove_movie(parts[1])
+                return HTTPStatus.OK, {"removed": parts[1]}
+        if parts == ["collections"]:
+            if method == "GET":
+                return HTTPStatus.OK, collection.list_named_collections()
+            if method == "POST":
+                name = _string(body, "name")
+                collection.create_named_collection(name)
+                return HTTPStatus.CREATED, {"created": name}
+        if len(parts) == 2 and parts[0] == "collections":
+            if method == "GET":
+                movies = collection.get_movies_in_named_collection(parts[1], **_page(query))
+                return HTTPStatus.OK, [movie_to_row(movie) for movie in movies]
+            if method == "DELETE":
+                collection.remove_named_collection(parts[1])
+                return HTTPStatus.OK, {"removed": parts[1]}
+        if len(parts) == 3 and parts[0] == "collections" and parts[2] == "movies" and method == "POST":
+            title = _string(body, "title")
+            collection.add_movie_to_named_collection(title, parts[1])
+            return HTTPStatus.CREATED, {"added": title}
+        if len(parts) == 4 and parts[0] == "collections" and parts[2] == "movies" and method == "DELETE":
+            collection.remove_movie_from_named_collection(parts[3], parts[1])
+            return HTTPStatus.OK, {"removed": parts[3]}
+        return HTTPStatus.NOT_FOUND, {"error": f"Маршрут {method} {url.path} не найден."}
+
+    def _batch(self, body: Any) -> List[Dict[str, Any]]:
+        requests = _object(body).get("requests")
+        if not isinstance(requests, list):
+            raise ValueError("Ожидается список запросов в поле 'requests'.")
+        if len(requests) > MAX_BATCH_SIZE:
+            raise ValueError(f"В пакете не может быть больше {MAX_BATCH_SIZE} запросов.")
+        responses = []
+        for request in requests:
+            request = _object(request)
+            method = str(request.get("method", "GET")).upper()
+            path = request.get("path")
+            if not isinstance(path, str) or _split_path(urlsplit(path).path) == ["batch"]:
+                status, payload = HTTPStatus.BAD_REQUEST, {"error": "Некорректный путь запроса в пакете."}
+            else:
+                status, payload = self.dispatch(method, path, request.get("body"))
+            responses.append({"status": int(status), "body": payload})
+        return responses
+
+
+def _split_path(path: str) -> List[str]:
+    return [unquote(part) for part in path.split("/") if part]
+
+
+def _object(body: Any) -> Dict[str, Any]:
+    if not isinstance(body, dict):
+        raise ValueError("Ожидается JSON-объект.")
+    return body
+
+
+def _string(body: Any, name: str) -> str:
+    value = _object(body).get(name)
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"Поле '{name}' должно быть непустой строкой.")
+    return value
+
+
+def _optional(query: Dict[str, str], name: str, convert: type) -> Optional[Any]:
+    value = query.get(name)
+    return None if value in (None, "") else convert(value)
+
+
+def _page(query: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "order_by": query.get("order_by", "title"),
+        "offset": _optional(query, "offset", int) or 0,
+        "limit": _optional(query, "limit", int),
+    }
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+    """Читает один HTTP-запрос; None - клиент закрыл соединение."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_SIZE:
+        raise ValueError("Слишком большое тело запроса.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, version, headers, body
+
+
+def _encode_response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class MovieServer:
+    """HTTP-сервер на asyncio поверх MovieService."""
+    def __init__(self, service: MovieService) -> None:
+        self.service = service
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except (ValueError, asyncio.LimitOverrunError):
+                    writer.write(_encode_response(HTTPStatus.BAD_REQUEST, {"error": "Некорректный HTTP-запрос."}, False))
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, raw_body = request
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                try:
+                    body = json.loads(raw_body) if raw_body else None
+                except ValueError:
+                    status, payload = HTTPStatus.BAD_REQUEST, {"error": "Тело запроса не является JSON."}
+                else:
+                    if self.service.is_heavy(method, urlsplit(target).path):
+                        status, payload = await loop.run_in_executor(None, self.service.dispatch, method, target, body)
+                    else:
+                        status, payload = self.service.dispatch(method, target, body)
+                writer.write(_encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(collection: ConcurrentMovieCollection, host: str, port: int) -> None:
+    server = await MovieServer(MovieService(collection)).start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Сервер коллекции фильмов слушает http://{address[0]}:{address[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP/JSON-сервер коллекции фильмов.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--load", help="файл каталога для загрузки при запуске")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    args = parser.parse_args()
+
+    collection = ConcurrentMovieCollection()
+    if args.load:
+        with collection.batch() as draft:
+            report = import_movies(draft, args.load, args.format)
+        print(f"Загружено фильмов: {report.imported}, ошибок: {report.error_count}")
+    try:
+        asyncio.run(serve(collection, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
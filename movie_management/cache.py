@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Счетчики кеша результатов поиска."""
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+class QueryCache(Generic[T]):
+    """
+    LRU-кеш результатов запросов.
+    Каждое значение помечается поколением данных, для которых оно вычислено;
+    значение другого поколения считается устаревшим. Необязательный ttl
+    ограничивает время жизни записи в секундах.
+    """
+    def __init__(self,
+                 max_size: int,
+                 ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if max_size < 1:
+            raise ValueError("Размер кеша должен быть положительным.")
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        # Ключ запроса -> (поколение, момент истечения или None, значение)
+        self._entries: 'OrderedDict[Hashable, Tuple[int, Optional[float], T]]' = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, generation: int) -> Optional[T]:
+        """Возвращает значение для ключа или None, если его нет или оно устарело."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry_generation, expires_at, value = entry
+            if entry_generation == generation and (expires_at is None or self._clock() < expires_at):
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+            del self._entries[key]
+        self._misses += 1
+        return None
+
+    def put(self, key: Hashable, generation: int, value: T) -> None:
+        """Сохраняет значение, вытесняя самую давно использованную запись при переполнении."""
+        expires_at = None if self._ttl is None else self._clock() + self._ttl
+        self._entries[key] = (generation, expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        """Удаляет все записи, не сбрасывая счетчики."""
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Возвращает снимок счетчиков."""
+        return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._max_size)
@@ -1,19 +1,104 @@
-from typing import Dict, List, Iterator, Set, Optional
-from .movie import Movie
+import heapq
+import os
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import AbstractSet, Callable, Dict, FrozenSet, Iterable, List, Iterator, Sequence, Set, Optional, Tuple
+from .movie import Movie, check_movie_fields, normalize_title
+from .snapshot import LazyMovies, SnapshotReader, write_snapshot
+from . import journal
+from .cache import CacheStats, QueryCache
+from .events import (
+    ChangeEvent,
+    ChangeListener,
+    CollectionCreated,
+    CollectionRemoved,
+    MovieAdded,
+    MovieAddedToCollection,
+    MovieRemoved,
+    MovieRemovedFromCollection,
+)
+from .facets import FacetCounter, Facets
+from .fuzzy import FuzzyIndex
+from .query import Between, CompiledQuery, Contains, InCollection, Query
+from .metrics import CallRecord, Instrumentation, Tracer
+from .indexes import Bitmap, BitmapKeys, HashIndex, NGramIndex, SortedIndex
 from .exceptions import (
     MovieNotFoundError,
     MovieAlreadyExistsError,
     CollectionNotFoundError,
-    CollectionAlreadyExistsError
+    CollectionAlreadyExistsError,
+    SnapshotFormatError
 )
 
+# Получатель текстовых сообщений о действиях коллекции (например, print или logger.info).
+EventSink = Callable[[str], None]
+
+
+def _silent(message: str) -> None:
+    """Получатель сообщений по умолчанию - ничего не делает."""
+
+
+ORDER_FIELDS = ("title", "year", "rating")
+
+
+def _parse_order(order_by: str) -> Tuple[str, bool]:
+    """Разбирает order_by вида "rating" или "-rating" в пару (поле, по убыванию)."""
+    descending = order_by.startswith("-")
+    field_name = order_by[1:] if descending else order_by
+    if field_name not in ORDER_FIELDS:
+        raise ValueError(f"Неизвестное поле сортировки '{order_by}', ожидается одно из: {', '.join(ORDER_FIELDS)}.")
+    return field_name, descending
+
+
+def _ranked(value: object, key: str, descending: bool) -> tuple:
+    """Ключ сортировки по значению поля: пустые значения уходят в конец при любом направлении."""
+    missing = value is None
+    return (not missing if descending else missing, 0 if missing else value, key)
+
+
+def movie_sort_key(order_by: str) -> Tuple[Callable[[Movie], tuple], bool]:
+    """
+    Возвращает ключ сортировки фильмов для order_by и признак убывания.
+    Списки, упорядоченные этим ключом (с reverse при убывании), идут в том же
+    порядке, что и результаты search_movies, поэтому их можно сливать.
+    """
+    field_name, descending = _parse_order(order_by)
+    if field_name == "title":
+        return (lambda movie: (movie.title, movie.key)), descending
+    return (lambda movie: _ranked(getattr(movie, field_name), movie.key, descending)), descending
+
+
+@dataclass
+class BulkResult:
+    """
+    Итог пакетной операции.
+    succeeded - названия успешно обработанных фильмов,
+    failed - пары (название, исключение) для отклоненных элементов.
+    """
+    succeeded: List[str] = field(default_factory=list)
+    failed: List[Tuple[str, Exception]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """True, если все элементы пакета обработаны без ошибок."""
+        return not self.failed
+
+
 class MovieIterator:
     """
     Итератор для перебора фильмов в MovieCollection.
+    Лениво проходит по упорядоченному по названию списку ключей коллекции,
+    не копируя и не сортируя его. Как и у словаря, добавление или удаление
+    фильмов во время перебора - ошибка: следующий шаг поднимает RuntimeError,
+    а не пропускает или повторяет фильмы молча. Изменять подборки можно.
     """
-    def __init__(self, movies_list: List[Movie]):
-        # Сортируем фильмы по названию для единообразного порядка при переборе
-        self._movies: List[Movie] = sorted(movies_list, key=lambda movie: movie.title)
+    def __init__(self, collection: 'MovieCollection'):
+        self._collection = collection
+        self._version: int = collection._structure_version
+        # Открытый снимок перебирается прямо из файла, пока его не загрузят целиком.
+        self._lazy = collection._lazy
+        self._lazy_movies: Optional[Iterator[Movie]] = None if self._lazy is None else self._lazy.in_title_order()
         self._index: int = 0
 
     def __iter__(self) -> 'MovieIterator':
@@ -22,8 +107,19 @@ class MovieIterator:
 
     def __next__(self) -> Movie:
         """Возвращает следующий фильм в коллекции или вызывает StopIteration."""
-        if self._index < len(self._movies):
-            movie_to_return = self._movies[self._index]
+        collection = self._collection
+        if collection._structure_version != self._version:
+            raise RuntimeError("Коллекция изменилась во время перебора.")
+        if self._lazy_movies is not None:
+            if collection._lazy is self._lazy:
+                movie_to_return = next(self._lazy_movies)
+                self._index += 1
+                return movie_to_return
+            # Снимок загружен целиком (например, поиском) без изменения фильмов:
+            # порядок тот же, поэтому перебор продолжается с той же позиции в _order.
+            self._lazy_movies = None
+        if self._index < len(collection._order):
+            movie_to_return = collection._movies[collection._order[self._index][1]]
             self._index += 1
             return movie_to_return
         else:
@@ -35,44 +131,545 @@ class MovieCollection:
     Класс для управления коллекцией фильмов.
     Хранит фильмы и позволяет выполнять различные операции с ними.
     """
-    def __init__(self) -> None:
+    def __init__(self,
+                 ngram_size: Optional[int] = None,
+                 event_sink: Optional[EventSink] = None,
+                 search_cache_size: int = 0,
+                 search_cache_ttl: Optional[float] = None,
+                 fuzzy_index: bool = False) -> None:
+        """
+        ngram_size - длина n-грамм для индекса поиска по подстроке (обычно 3).
+        По умолчанию индекс n-грамм не строится: он ускоряет частичный поиск
+        по названию, режиссеру и жанру, но заметно увеличивает расход памяти.
+        event_sink - получатель сообщений о действиях коллекции. По умолчанию
+        сообщения никуда не выводятся; event_sink=print вернет вывод в консоль.
+        search_cache_size - сколько результатов search_movies хранить в LRU-кеше
+        (0 - кеш выключен); search_cache_ttl - время жизни записи кеша в секундах.
+        fuzzy_index=True поддерживает индекс fuzzy_search с самого начала, и первый
+        поиск с опечатками не строит его по всему каталогу.
+        """
+        self._event_sink: EventSink = event_sink if event_sink is not None else _silent
+
+        # Подписчики на типизированные события изменений (см. subscribe).
+        self._listeners: List[ChangeListener] = []
+
+        # Снимок, открытый через open_snapshot и еще не загруженный целиком.
+        # Пока он есть, _movies читает фильмы прямо из файла, а настоящее
+        # хранилище дожидается загрузки в _storage.
+        self._lazy: Optional[LazyMovies] = None
+        self._storage: Optional[Dict[str, Movie]] = None
+
+        # Журнал изменений (см. open_journal) и снимок, в который он сворачивается.
+        self._journal: Optional[journal.Journal] = None
+        self._journal_snapshot_path: Optional[str] = None
+        self._journal_compact_bytes: int = 0
+
+        # Поколение данных: растет при каждом изменении состава фильмов
+        # и делает недействительными все ранее закешированные результаты поиска.
+        self._generation: int = 0
+        # Версия состава и порядка фильмов (без подборок): по ней перебор
+        # коллекции узнает, что фильмы добавили или удалили во время обхода.
+        self._structure_version: int = 0
+        self._search_cache: Optional[QueryCache[Tuple[Movie, ...]]] = None
+        if search_cache_size > 0:
+            self._search_cache = QueryCache(search_cache_size, search_cache_ttl)
+
+        # Инструментация (см. enable_instrumentation); None - выключена.
+        self._instrumentation: Optional[Instrumentation] = None
+
         # Основное хранилище фильмов.
         # Ключ: нормализованное название фильма.
         # Значение: объект Movie.
         self._movies: Dict[str, Movie] = {}
 
-        self._named_collections: Dict[str, Set[str]] = {}
+        # Плотные целочисленные идентификаторы фильмов. Идентификаторы удаленных
+        # фильмов переиспользуются, поэтому они не превышают размера коллекции.
+        self._ids: Dict[str, int] = {}
+        self._keys_by_id: List[Optional[str]] = []
+        self._free_ids: List[int] = []
+
+        # Именованные подборки: имя -> битовая карта идентификаторов фильмов.
+        self._named_collections: Dict[str, Bitmap] = {}
+
+        # Обратный индекс подборок.
+        # Ключ: нормализованное название фильма.
+        # Значение: имена подборок, в которых фильм состоит (неизменяемое
+        # множество, поэтому копии коллекции могут делить его без копирования).
+        self._memberships: Dict[str, FrozenSet[str]] = {}
+
+        # Группы структур, общие с другой копией коллекции (см. copy()):
+        # "movies" - хранилище и индексы фильмов, "collections" - словари подборок.
+        # Группа копируется целиком перед первым изменением.
+        self._shared: Set[str] = set()
+        # Подборки, битовые карты которых принадлежат этой копии; остальные
+        # копируются при первом изменении (см. _writable_bitmap).
+        self._owned_bitmaps: Set[str] = set()
+
+        # Пары (название, ключ), отсортированные по названию.
+        # Поддерживаются в add_movie/remove_movie, поэтому перебор и списки
+        # фильмов в порядке названий обходятся без сортировки.
+        self._order: List[Tuple[str, str]] = []
+
+        # Ключи фильмов по алфавиту: префикс для autocomplete - непрерывный отрезок списка.
+        self._sorted_keys: List[str] = []
+
+        # Общая таблица строк с небольшим числом различных значений (режиссеры, жанры):
+        # все фильмы коллекции ссылаются на один экземпляр каждой такой строки.
+        self._strings: Dict[str, str] = {}
+
+        # Строковые поля фильма в формате casefold, вычисляются один раз при добавлении.
+        # Ключ: нормализованное название. Значение: (название, режиссер, жанр).
+        self._folded: Dict[str, Tuple[str, str, str]] = {}
+
+        # Счетчики facets() по всей коллекции, обновляются в add_movie/remove_movie.
+        self._facets = FacetCounter()
+
+        # Индекс n-грамм ключей для fuzzy_search. Без fuzzy_index строится при
+        # первом вызове, после чего add_movie/remove_movie поддерживают его сами.
+        self._fuzzy: Optional[FuzzyIndex] = FuzzyIndex() if fuzzy_index else None
+
+        # Вторичные индексы для search_movies, обновляются в add_movie/remove_movie.
+        # Режиссер и жанр индексируются по значению в формате casefold.
+        self._year_index = HashIndex()
+        self._director_index = HashIndex()
+        self._genre_index = HashIndex()
+        self._rating_index = SortedIndex()
+
+        # Необязательные индексы n-грамм: по названиям фильмов и по различным
+        # значениям режиссера и жанра (а не по каждому фильму).
+        self._title_grams: Optional[NGramIndex] = None
+        self._director_grams: Optional[NGramIndex] = None
+        self._genre_grams: Optional[NGramIndex] = None
+        if ngram_size is not None:
+            self._title_grams = NGramIndex(ngram_size)
+            self._director_grams = NGramIndex(ngram_size)
+            self._genre_grams = NGramIndex(ngram_size)
 
     def _normalize_title(self, title: str) -> str:
         """Приводит название фильма к единому формату (могут возникать коллизии, если фильмы имеют одинаковое название - Король лев(1994) и Король лев (2019))."""
-        return title.strip().lower()
+        return normalize_title(title)
+
+    @classmethod
+    def open_snapshot(cls, path: str, **kwargs) -> 'MovieCollection':
+        """
+        Открывает коллекцию из снимка, созданного save_snapshot.
+        Файл отображается в память, и фильмы создаются только при обращении:
+        get_movie, перебор и list_all_movies работают без загрузки каталога.
+        Поиск и любые изменения сначала загружают снимок целиком и строят индексы.
+        Остальные аргументы передаются конструктору коллекции.
+        """
+        collection = cls(**kwargs)
+        reader = SnapshotReader(path)
+        collection._lazy = LazyMovies(reader)
+        collection._storage = collection._movies
+        collection._movies = collection._lazy  # type: ignore[assignment]
+        # Идентификаторы назначаются при загрузке в порядке записей снимка
+        # (см. _ensure_loaded), поэтому номер записи и есть идентификатор фильма.
+        try:
+            named_collections = reader.named_collections()
+        except SnapshotFormatError:
+            reader.close()
+            raise
+        for name, members in named_collections.items():
+            collection._named_collections[name] = Bitmap.from_sorted(sorted(members))
+            collection._owned_bitmaps.add(name)
+            for index in members:
+                key = reader.key_at(index)
+                collection._memberships[key] = collection._memberships.get(key, frozenset()) | {name}
+        return collection
+
+    def copy(self) -> 'MovieCollection':
+        """
+        Возвращает независимую копию коллекции. Копия создается за O(1): до первого
+        изменения она делит хранилище, подборки и индексы с оригиналом, а затем
+        копирует только затронутую группу структур (см. _own_movies,
+        _own_collections и _writable_bitmap) - то же делает и оригинал.
+        Объекты Movie и строки остаются общими. Журнал, кеш результатов
+        поиска и подписчики на события не копируются - у копии их нет.
+        """
+        self._ensure_loaded()
+        clone = MovieCollection.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._journal = None
+        clone._journal_snapshot_path = None
+        clone._search_cache = None
+        clone._listeners = []
+        if self._instrumentation is not None:
+            Instrumentation.detach(clone)
+            clone._instrumentation = None
+        self._shared = {"movies", "collections"}
+        clone._shared = {"movies", "collections"}
+        self._owned_bitmaps = set()
+        clone._owned_bitmaps = set()
+        return clone
+
+    def _own_movies(self) -> None:
+        """Копирует хранилище и индексы фильмов, если они общие с другой копией."""
+        if "movies" not in self._shared:
+            return
+        self._shared.discard("movies")
+        self._movies = self._copy_movies()
+        self._ids = dict(self._ids)
+        self._keys_by_id = list(self._keys_by_id)
+        self._free_ids = list(self._free_ids)
+        self._order = list(self._order)
+        self._sorted_keys = list(self._sorted_keys)
+        self._strings = dict(self._strings)
+        self._folded = dict(self._folded)
+        self._facets = self._facets.copy()
+        self._fuzzy = None if self._fuzzy is None else self._fuzzy.copy()
+        self._year_index = self._year_index.copy()
+        self._director_index = self._director_index.copy()
+        self._genre_index = self._genre_index.copy()
+        self._rating_index = self._rating_index.copy()
+        for name in ("_title_grams", "_director_grams", "_genre_grams"):
+            grams = getattr(self, name)
+            setattr(self, name, None if grams is None else grams.copy())
+
+    def _copy_movies(self) -> Dict[str, Movie]:
+        """Копирует хранилище фильмов для _own_movies()."""
+        return dict(self._movies)
+
+    def _own_collections(self) -> None:
+        """Копирует словари подборок, если они общие с другой копией (сами битовые карты - нет)."""
+        if "collections" not in self._shared:
+            return
+        self._shared.discard("collections")
+        self._named_collections = dict(self._named_collections)
+        self._memberships = dict(self._memberships)
+
+    def _writable_bitmap(self, name: str) -> Bitmap:
+        """Возвращает битовую карту подборки, которую можно изменять, копируя общую."""
+        self._own_collections()
+        bitmap = self._named_collections[name]
+        if name not in self._owned_bitmaps:
+            bitmap = self._named_collections[name] = bitmap.copy()
+            self._owned_bitmaps.add(name)
+        return bitmap
+
+    def save_snapshot(self, path: str) -> None:
+        """Сохраняет фильмы и именованные подборки в двоичный файл снимка."""
+        self._ensure_loaded()
+        keys = sorted(self._movies)
+        position = {key: index for index, key in enumerate(keys)}
+        write_snapshot(
+            path,
+            [self._movies[key] for key in keys],
+            [position[key] for _, key in self._order],
+            {name: sorted(position[key] for key in self._members(bitmap)) for name, bitmap in self._named_collections.items()},
+        )
+        self._event_sink(f"Снимок коллекции сохранен в '{path}'.")
+
+    @classmethod
+    def open_journal(cls,
+                     journal_path: str,
+                     snapshot_path: str,
+                     compact_bytes: int = 64 * 1024 * 1024,
+                     fsync_batch: int = 64,
+                     fsync_interval: float = 0.05,
+                     **kwargs) -> 'MovieCollection':
+        """
+        Открывает коллекцию в режиме журнала.
+        Состояние восстанавливается из базового снимка (если он есть) и операций
+        журнала поверх него; дальше каждое изменение дописывается в журнал.
+        Когда журнал вырастает больше compact_bytes, он сворачивается в снимок.
+        fsync_batch и fsync_interval задают групповой сброс журнала на диск.
+        Остальные аргументы передаются конструктору коллекции.
+        """
+        if os.path.exists(snapshot_path):
+            collection = cls.open_snapshot(snapshot_path, **kwargs)
+        else:
+            collection = cls(**kwargs)
+        for op, args in journal.replay(journal_path):
+            collection._apply_journal_record(op, args)
+        collection._journal = journal.Journal(journal_path, fsync_batch, fsync_interval)
+        collection._journal_snapshot_path = snapshot_path
+        collection._journal_compact_bytes = compact_bytes
+        return collection
+
+    def _apply_journal_record(self, op: int, args: tuple) -> None:
+        """
+        Повторяет операцию из журнала.
+        Если сбой случился между записью снимка и очисткой журнала, часть операций
+        уже отражена в снимке; такие повторы отклоняются коллекцией и пропускаются.
+        """
+        try:
+            if op == journal.ADD_MOVIE:
+                self.add_movie(Movie(*args))
+            elif op == journal.REMOVE_MOVIE:
+                self.remove_movie(*args)
+            elif op == journal.CREATE_COLLECTION:
+                self.create_named_collection(*args)
+            elif op == journal.REMOVE_COLLECTION:
+                self.remove_named_collection(*args)
+            elif op == journal.ADD_TO_COLLECTION:
+                self.add_movie_to_named_collection(*args)
+            elif op == journal.REMOVE_FROM_COLLECTION:
+                self.remove_movie_from_named_collection(*args)
+        except (MovieNotFoundError, MovieAlreadyExistsError, CollectionNotFoundError, CollectionAlreadyExistsError):
+            pass
+
+    def _log(self, op: int, *args) -> None:
+        """Дописывает операцию в журнал, если он включен."""
+        if self._journal is None:
+            return
+        self._journal.append(op, *args)
+        if self._journal.size > self._journal_compact_bytes:
+            self.compact_journal()
+
+    def compact_journal(self) -> None:
+        """Сворачивает журнал в базовый снимок и очищает его."""
+        if self._journal is None or self._journal_snapshot_path is None:
+            return
+        self._journal.flush()
+        # write_snapshot возвращается, когда снимок и его каталог уже сброшены
+        # на диск; только после этого журнал можно очистить без риска потерять
+        # изменения при сбое питания.
+        self.save_snapshot(self._journal_snapshot_path)
+        self._journal.truncate()
+        self._event_sink(f"Журнал '{self._journal.path}' свернут в снимок.")
+
+    def sync_journal(self) -> None:
+        """Немедленно сбрасывает несохраненные записи журнала на диск."""
+        if self._journal is not None:
+            self._journal.flush()
+
+    def close_journal(self) -> None:
+        """Сбрасывает и закрывает журнал; дальнейшие изменения не журналируются."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _ensure_loaded(self) -> None:
+        """Загружает открытый снимок целиком, если это еще не сделано."""
+        if self._lazy is None:
+            return
+        lazy = self._lazy
+        self._lazy = None
+        self._movies = self._storage  # type: ignore[assignment]
+        self._storage = None
+        loaded: Dict[str, Movie] = {}
+        for index in range(len(lazy.reader)):
+            movie = lazy.movie_at(index)
+            movie.director = self._intern(movie.director)
+            movie.genre = self._intern(movie.genre)
+            loaded[movie.key] = movie
+            self._movies[movie.key] = movie
+            self._assign_id(movie.key)
+            self._facets.add(movie.genre, movie.director, movie.year, movie.rating)
+            if self._fuzzy is not None:
+                self._fuzzy.add(movie.key)
+        self._sorted_keys.extend(loaded)
+        self._sorted_keys.sort()
+        self._index_movies(loaded)
+        lazy.reader.close()
+
+    def _assign_id(self, key: str) -> int:
+        """Назначает фильму свободный идентификатор (сначала из освобожденных)."""
+        if self._free_ids:
+            movie_id = self._free_ids.pop()
+            self._keys_by_id[movie_id] = key
+        else:
+            movie_id = len(self._keys_by_id)
+            self._keys_by_id.append(key)
+        self._ids[key] = movie_id
+        return movie_id
+
+    def _release_id(self, key: str) -> None:
+        movie_id = self._ids.pop(key)
+        self._keys_by_id[movie_id] = None
+        self._free_ids.append(movie_id)
+
+    def _members(self, bitmap: Bitmap) -> BitmapKeys:
+        """Представляет битовую карту подборки как множество ключей фильмов."""
+        return BitmapKeys(bitmap, self._ids, self._keys_by_id)
+
+    def _intern(self, value: str) -> str:
+        """Возвращает общий экземпляр строки из таблицы коллекции."""
+        return self._strings.setdefault(value, value)
 
     def add_movie(self, movie: Movie) -> None:
-        """Добавляет фильм в основную коллекцию."""
-        norm_title = self._normalize_title(movie.title)
+        """
+        Добавляет фильм в основную коллекцию.
+        Режиссер и жанр фильма заменяются общими экземплярами строк коллекции.
+        Поля фильма проверяются до любых изменений, поэтому при ошибке
+        (TypeError, ValueError) коллекция остается прежней.
+        """
+        self._ensure_loaded()
+        norm_title = movie.key
         if norm_title in self._movies:
             raise MovieAlreadyExistsError(f"Фильм '{movie.title}' уже есть в коллекции.")
+        # Поля могли измениться после создания фильма, поэтому проверяются еще раз.
+        check_movie_fields(movie.title, movie.director, movie.year, movie.genre, movie.rating)
+        self._own_movies()
+        movie.director = self._intern(movie.director)
+        movie.genre = self._intern(movie.genre)
+        self._facets.add(movie.genre, movie.director, movie.year, movie.rating)
         self._movies[norm_title] = movie
-        print(f"Фильм '{movie.title}' добавлен.")
+        self._assign_id(norm_title)
+        if self._fuzzy is not None:
+            self._fuzzy.add(norm_title)
+        insort(self._sorted_keys, norm_title)
+        self._index_movie(norm_title, movie)
+        self._generation += 1
+        self._structure_version += 1
+        self._log(journal.ADD_MOVIE, movie.title, movie.director, movie.year, movie.genre, movie.rating)
+        self._event_sink(f"Фильм '{movie.title}' добавлен.")
+        if self._listeners:
+            self._emit(MovieAdded(movie))
+
+    def add_movies(self, movies: Iterable[Movie]) -> BulkResult:
+        """
+        Добавляет пакет фильмов.
+        Сначала проверяется весь пакет: фильмы, которые уже есть в коллекции или
+        повторяются внутри пакета, попадают в результат с MovieAlreadyExistsError,
+        а фильмы с полями не того типа - с TypeError или ValueError; они не
+        прерывают загрузку. Остальные вставляются с одним обновлением
+        упорядоченных структур на весь пакет.
+        """
+        self._ensure_loaded()
+        result = BulkResult()
+        accepted: Dict[str, Movie] = {}
+        for movie in movies:
+            if movie.key in self._movies or movie.key in accepted:
+                error = MovieAlreadyExistsError(f"Фильм '{movie.title}' уже есть в коллекции.")
+                result.failed.append((movie.title, error))
+                continue
+            try:
+                check_movie_fields(movie.title, movie.director, movie.year, movie.genre, movie.rating)
+            except (TypeError, ValueError) as error:
+                result.failed.append((movie.title, error))
+                continue
+            accepted[movie.key] = movie
+
+        if accepted:
+            self._own_movies()
+        for key, movie in accepted.items():
+            movie.director = self._intern(movie.director)
+            movie.genre = self._intern(movie.genre)
+            self._facets.add(movie.genre, movie.director, movie.year, movie.rating)
+            self._movies[key] = movie
+            self._assign_id(key)
+            if self._fuzzy is not None:
+                self._fuzzy.add(key)
+            result.succeeded.append(movie.title)
+        self._sorted_keys.extend(accepted)
+        self._sorted_keys.sort()
+        self._index_movies(accepted)
+        if accepted:
+            self._generation += 1
+            self._structure_version += 1
+        for movie in accepted.values():
+            self._log(journal.ADD_MOVIE, movie.title, movie.director, movie.year, movie.genre, movie.rating)
+        self._event_sink(f"Добавлено фильмов: {len(result.succeeded)}, отклонено: {len(result.failed)}.")
+        if self._listeners:
+            for movie in accepted.values():
+                self._emit(MovieAdded(movie))
+        return result
 
     def remove_movie(self, title: str) -> None:
         """
         Удаляет фильм из основной коллекции.
         Также удаляет его из всех именованных подборок, где он мог состоять.
         """
+        self._ensure_loaded()
         norm_title = self._normalize_title(title)
         if norm_title not in self._movies:
             raise MovieNotFoundError(f"Фильм '{title}' не найден.")
         
-        original_title = self._movies[norm_title].title
+        self._own_movies()
+        movie = self._movies[norm_title]
+        original_title = movie.title
+        self._unindex_movie(norm_title, movie)
+        self._facets.remove(movie.genre, movie.director, movie.year, movie.rating)
+        if self._fuzzy is not None:
+            self._fuzzy.remove(norm_title)
+        del self._sorted_keys[bisect_left(self._sorted_keys, norm_title)]
         del self._movies[norm_title]
+        self._generation += 1
+        self._structure_version += 1
 
-        for collection_name in self._named_collections:
-            if norm_title in self._named_collections[collection_name]:
-                self._named_collections[collection_name].remove(norm_title)
-        print(f"Фильм '{original_title}' удален из основной коллекции и всех подборок.")
+        movie_id = self._ids[norm_title]
+        memberships = self._memberships.get(norm_title, frozenset())
+        if memberships:
+            self._own_collections()
+            del self._memberships[norm_title]
+        for collection_name in memberships:
+            self._writable_bitmap(collection_name).discard(movie_id)
+        self._release_id(norm_title)
+        self._log(journal.REMOVE_MOVIE, title)
+        self._event_sink(f"Фильм '{original_title}' удален из основной коллекции и всех подборок.")
+        if self._listeners:
+            for collection_name in sorted(memberships):
+                self._emit(MovieRemovedFromCollection(collection_name, movie))
+            self._emit(MovieRemoved(movie))
 
 
+    def _index_movie(self, key: str, movie: Movie) -> None:
+        """Регистрирует фильм во вторичных индексах."""
+        self._index_fields(key, movie)
+        insort(self._order, (movie.title, key))
+        self._rating_index.add(movie.rating, key)
+
+    def _index_movies(self, movies: Dict[str, Movie]) -> None:
+        """
+        Регистрирует пакет фильмов во вторичных индексах.
+        Упорядоченные структуры дополняются и пересортировываются один раз.
+        """
+        for key, movie in movies.items():
+            self._index_fields(key, movie)
+        self._order.extend((movie.title, key) for key, movie in movies.items())
+        self._order.sort()
+        self._rating_index.add_many((movie.rating, key) for key, movie in movies.items())
+
+    def _index_fields(self, key: str, movie: Movie) -> None:
+        """Заполняет хеш-индексы и индексы n-грамм для одного фильма."""
+        folded = (movie.title.casefold(), self._intern(movie.director.casefold()), self._intern(movie.genre.casefold()))
+        title_folded, director_folded, genre_folded = folded
+        self._folded[key] = folded
+        self._year_index.add(movie.year, key)
+        new_director = self._director_index.add(director_folded, key)
+        new_genre = self._genre_index.add(genre_folded, key)
+        if self._title_grams is not None:
+            self._title_grams.add(title_folded, key)
+        if new_director and self._director_grams is not None:
+            self._director_grams.add(director_folded, director_folded)
+        if new_genre and self._genre_grams is not None:
+            self._genre_grams.add(genre_folded, genre_folded)
+
+    def _unindex_movie(self, key: str, movie: Movie) -> None:
+        """Убирает фильм из вторичных индексов."""
+        title_folded, director_folded, genre_folded = self._folded.pop(key)
+        position = bisect_left(self._order, (movie.title, key))
+        del self._order[position]
+        self._year_index.remove(movie.year, key)
+        self._rating_index.remove(movie.rating, key)
+        gone_director = self._director_index.remove(director_folded, key)
+        gone_genre = self._genre_index.remove(genre_folded, key)
+        if self._title_grams is not None:
+            self._title_grams.remove(title_folded, key)
+        if gone_director and self._director_grams is not None:
+            self._director_grams.remove(director_folded, director_folded)
+        if gone_genre and self._genre_grams is not None:
+            self._genre_grams.remove(genre_folded, genre_folded)
+
+    def subscribe(self, listener: ChangeListener) -> None:
+        """
+        Подписывает listener на события изменений (см. movie_management.events).
+        Событие передается после изменения, когда коллекция уже в новом состоянии.
+        Пока подписчиков нет, события не создаются.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: ChangeListener) -> None:
+        """Отписывает listener; если он не подписан, вызывает ValueError."""
+        self._listeners.remove(listener)
+
+    def _emit(self, event: ChangeEvent) -> None:
+        # Копия списка позволяет подписчику отписаться прямо из обработчика.
+        for listener in list(self._listeners):
+            listener(event)
+
     def get_movie(self, title: str) -> Movie:
         """Находит и возвращает фильм по его названию."""
         norm_title = self._normalize_title(title)
@@ -84,18 +681,35 @@ class MovieCollection:
         """Создает новую пустую именованную подборку."""
         if name in self._named_collections:
             raise CollectionAlreadyExistsError(f"Подборка '{name}' уже существует.")
-        self._named_collections[name] = set()
-        print(f"Подборка '{name}' создана.")
+        self._own_collections()
+        self._named_collections[name] = Bitmap()
+        self._owned_bitmaps.add(name)
+        self._log(journal.CREATE_COLLECTION, name)
+        self._event_sink(f"Подборка '{name}' создана.")
+        if self._listeners:
+            self._emit(CollectionCreated(name))
 
     def remove_named_collection(self, name: str) -> None:
         """Удаляет именованную подборку целиком."""
+        self._ensure_loaded()
         if name not in self._named_collections:
             raise CollectionNotFoundError(f"Подборка '{name}' не найдена.")
-        del self._named_collections[name]
-        print(f"Подборка '{name}' удалена.")
+        self._own_collections()
+        self._owned_bitmaps.discard(name)
+        members = list(self._members(self._named_collections.pop(name)))
+        for movie_key in members:
+            self._forget_membership(movie_key, name)
+        self._generation += 1
+        self._log(journal.REMOVE_COLLECTION, name)
+        self._event_sink(f"Подборка '{name}' удалена.")
+        if self._listeners:
+            for movie_key in members:
+                self._emit(MovieRemovedFromCollection(name, self._movies[movie_key]))
+            self._emit(CollectionRemoved(name))
 
     def add_movie_to_named_collection(self, movie_title: str, collection_name: str) -> None:
         """Добавляет существующий фильм в указанную именованную подборку."""
+        self._ensure_loaded()
         norm_movie_title = self._normalize_title(movie_title)
         
         if norm_movie_title not in self._movies:
@@ -103,92 +717,672 @@ class MovieCollection:
         if collection_name not in self._named_collections:
             raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
         
-        self._named_collections[collection_name].add(norm_movie_title)
-        actual_movie_title = self._movies[norm_movie_title].title
-        print(f"Фильм '{actual_movie_title}' добавлен в подборку '{collection_name}'.")
+        movie_id = self._ids[norm_movie_title]
+        added = movie_id not in self._named_collections[collection_name]
+        if added:
+            self._writable_bitmap(collection_name).add(movie_id)
+            self._join_collection(norm_movie_title, collection_name)
+            self._generation += 1
+        self._log(journal.ADD_TO_COLLECTION, movie_title, collection_name)
+        movie = self._movies[norm_movie_title]
+        self._event_sink(f"Фильм '{movie.title}' добавлен в подборку '{collection_name}'.")
+        if added and self._listeners:
+            self._emit(MovieAddedToCollection(collection_name, movie))
+
+    def add_movies_to_named_collection(self, movie_titles: Iterable[str], collection_name: str) -> BulkResult:
+        """
+        Добавляет пакет фильмов в именованную подборку.
+        Отсутствие подборки - ошибка всего пакета; названия, которых нет
+        в основной коллекции, попадают в результат с MovieNotFoundError.
+        """
+        self._ensure_loaded()
+        if collection_name not in self._named_collections:
+            raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
+
+        result = BulkResult()
+        accepted: List[str] = []
+        for movie_title in movie_titles:
+            norm_movie_title = self._normalize_title(movie_title)
+            if norm_movie_title not in self._movies:
+                error = MovieNotFoundError(f"Фильм '{movie_title}' не найден в основной коллекции.")
+                result.failed.append((movie_title, error))
+                continue
+            accepted.append(norm_movie_title)
+
+        members = self._writable_bitmap(collection_name) if accepted else self._named_collections[collection_name]
+        added: List[str] = []
+        for norm_movie_title in accepted:
+            if members.add(self._ids[norm_movie_title]):
+                added.append(norm_movie_title)
+                self._join_collection(norm_movie_title, collection_name)
+            result.succeeded.append(self._movies[norm_movie_title].title)
+            self._log(journal.ADD_TO_COLLECTION, norm_movie_title, collection_name)
+        if added:
+            self._generation += 1
+        self._event_sink(f"В подборку '{collection_name}' добавлено фильмов: {len(result.succeeded)}, "
+                         f"отклонено: {len(result.failed)}.")
+        if self._listeners:
+            for norm_movie_title in added:
+                self._emit(MovieAddedToCollection(collection_name, self._movies[norm_movie_title]))
+        return result
 
     def remove_movie_from_named_collection(self, movie_title: str, collection_name: str) -> None:
         """Удаляет фильм из указанной именованной подборки (но не из основной коллекции)."""
+        self._ensure_loaded()
         norm_movie_title = self._normalize_title(movie_title)
 
         if collection_name not in self._named_collections:
             raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
         
-        if norm_movie_title not in self._named_collections[collection_name]:
-            print(f"Фильма '{movie_title}' нет в подборке '{collection_name}'.")
+        movie_id = self._ids.get(norm_movie_title)
+        if movie_id is None or movie_id not in self._named_collections[collection_name]:
+            self._event_sink(f"Фильма '{movie_title}' нет в подборке '{collection_name}'.")
             return
             
-        self._named_collections[collection_name].remove(norm_movie_title)
+        self._writable_bitmap(collection_name).discard(movie_id)
+        self._generation += 1
+        self._forget_membership(norm_movie_title, collection_name)
+        self._log(journal.REMOVE_FROM_COLLECTION, movie_title, collection_name)
         actual_movie_title = movie_title 
         if norm_movie_title in self._movies:
             actual_movie_title = self._movies[norm_movie_title].title
-        print(f"Фильм '{actual_movie_title}' удален из подборки '{collection_name}'.")
+        self._event_sink(f"Фильм '{actual_movie_title}' удален из подборки '{collection_name}'.")
+        if self._listeners:
+            self._emit(MovieRemovedFromCollection(collection_name, self._movies[norm_movie_title]))
+
+    def _join_collection(self, movie_key: str, collection_name: str) -> None:
+        """Добавляет подборку в обратный индекс фильма."""
+        self._own_collections()
+        self._memberships[movie_key] = self._memberships.get(movie_key, frozenset()) | {collection_name}
+
+    def _forget_membership(self, movie_key: str, collection_name: str) -> None:
+        """Убирает подборку из обратного индекса фильма."""
+        names = self._memberships.get(movie_key)
+        if names is None:
+            return
+        self._own_collections()
+        names = names - {collection_name}
+        if names:
+            self._memberships[movie_key] = names
+        else:
+            del self._memberships[movie_key]
+
+    def collections_containing(self, title: str) -> List[str]:
+        """Возвращает отсортированный список подборок, в которых состоит фильм."""
+        norm_title = self._normalize_title(title)
+        if norm_title not in self._movies:
+            raise MovieNotFoundError(f"Фильм '{title}' не найден.")
+        return sorted(self._memberships.get(norm_title, ()))
 
-    def get_movies_in_named_collection(self, collection_name: str) -> List[Movie]:
-        """Возвращает список фильмов (объектов Movie) из указанной подборки."""
+    def get_movies_in_named_collection(self,
+                                       collection_name: str,
+                                       order_by: str = "title",
+                                       offset: int = 0,
+                                       limit: Optional[int] = None) -> List[Movie]:
+        """
+        Возвращает список фильмов (объектов Movie) из указанной подборки.
+        Порядок и постраничная выборка - как в search_movies.
+        """
+        self._ensure_loaded()
         if collection_name not in self._named_collections:
             raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
-        
-        movie_titles_in_set = self._named_collections[collection_name]
-        movies_list = []
-        for title_key in movie_titles_in_set:
-            if title_key in self._movies:
-                movies_list.append(self._movies[title_key])
-        return sorted(movies_list, key=lambda movie: movie.title)
+
+        keys = self._members(self._named_collections[collection_name])
+        return [self._movies[key] for key in self._page_keys(keys, None, order_by, offset, limit)]
+
+    def union_named_collections(self,
+                                collection_names: Iterable[str],
+                                order_by: str = "title",
+                                offset: int = 0,
+                                limit: Optional[int] = None) -> List[Movie]:
+        """Возвращает фильмы, входящие хотя бы в одну из подборок."""
+        return self._combine_named_collections(collection_names, Bitmap.__or__, order_by, offset, limit)
+
+    def intersect_named_collections(self,
+                                    collection_names: Iterable[str],
+                                    order_by: str = "title",
+                                    offset: int = 0,
+                                    limit: Optional[int] = None) -> List[Movie]:
+        """Возвращает фильмы, входящие во все подборки."""
+        return self._combine_named_collections(collection_names, Bitmap.__and__, order_by, offset, limit)
+
+    def difference_named_collections(self,
+                                     collection_names: Iterable[str],
+                                     order_by: str = "title",
+                                     offset: int = 0,
+                                     limit: Optional[int] = None) -> List[Movie]:
+        """Возвращает фильмы первой подборки, не входящие ни в одну из остальных."""
+        return self._combine_named_collections(collection_names, Bitmap.__sub__, order_by, offset, limit)
+
+    def _combine_named_collections(self,
+                                   collection_names: Iterable[str],
+                                   operation: Callable[[Bitmap, Bitmap], Bitmap],
+                                   order_by: str,
+                                   offset: int,
+                                   limit: Optional[int]) -> List[Movie]:
+        """
+        Сворачивает битовые карты подборок слева направо операцией operation.
+        Операции выполняются над картами целиком, без перебора фильмов;
+        порядок и страницы результата - как в search_movies.
+        """
+        self._ensure_loaded()
+        bitmaps = []
+        for collection_name in collection_names:
+            bitmap = self._named_collections.get(collection_name)
+            if bitmap is None:
+                raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
+            bitmaps.append(bitmap)
+        if not bitmaps:
+            raise ValueError("Нужна хотя бы одна подборка.")
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = operation(result, bitmap)
+        keys = self._members(result)
+        return [self._movies[key] for key in self._page_keys(keys, None, order_by, offset, limit)]
 
     def search_movies(self,
                       title: Optional[str] = None,
                       director: Optional[str] = None,
                       year: Optional[int] = None,
                       genre: Optional[str] = None,
-                      min_rating: Optional[float] = None) -> List[Movie]:
+                      min_rating: Optional[float] = None,
+                      order_by: str = "title",
+                      offset: int = 0,
+                      limit: Optional[int] = None,
+                      in_collection: Optional[str] = None) -> Sequence[Movie]:
         """
         Ищет фильмы по заданным критериям.
         Критерии объединяются по "И" (фильм должен соответствовать всем указанным).
         Поиск по строковым полям (title, director, genre) - частичное совпадение без учета регистра.
         Поиск по году - точное совпадение.
         Поиск по min_rating - фильм должен иметь рейтинг не ниже указанного.
+        in_collection - имя подборки: ищутся только ее фильмы. Битовая карта подборки
+        участвует в пересечении кандидатов как еще один критерий индекса.
+
+        Кандидаты отбираются по индексам (см. _index_candidates), а частичное
+        совпадение названия окончательно проверяется по заранее сохраненной
+        форме casefold. Запросы короче длины n-граммы индексом n-грамм не
+        обрабатываются: название проверяется перебором кандидатов (или всей
+        коллекции), а режиссер и жанр - перебором их различных значений.
+
+        order_by - поле сортировки: "title", "year" или "rating"; префикс "-"
+        означает убывание. Фильмы без рейтинга всегда идут последними.
+        offset и limit задают страницу результатов. Страница в порядке названий
+        набирается обходом упорядоченного списка без сортировки, а для года
+        и рейтинга - отбором offset + limit лучших через кучу.
+
+        Если включен кеш (search_cache_size > 0), результат возвращается
+        неизменяемым кортежем и повторный запрос с теми же нормализованными
+        критериями берется из кеша, пока коллекция не изменилась.
         """
-        results: List[Movie] = []
-        for movie_obj in self._movies.values():
-            match = True
+        self._ensure_loaded()
+        if self._search_cache is None:
+            return self._search(title, director, year, genre, min_rating, in_collection, order_by, offset, limit)
 
-            if title:
-                if title.lower() not in movie_obj.title.lower():
-                    match = False
-            if director and match:
-                if director.lower() not in movie_obj.director.lower():
-                    match = False
-            
-            if year and match:
-                if movie_obj.year != year:
-                    match = False
-            
-            if genre and match:
-                if genre.lower() not in movie_obj.genre.lower():
-                    match = False
-            
-            if min_rating and match:
-                if movie_obj.rating is None or movie_obj.rating < min_rating:
-                    match = False
-            
-            if match:
-                results.append(movie_obj)
-        
-        return sorted(results, key=lambda movie: movie.title)
+        # Пустые критерии search_movies игнорирует, поэтому они нормализуются в None
+        query = (
+            title.casefold() if title else None,
+            director.casefold() if director else None,
+            year or None,
+            genre.casefold() if genre else None,
+            min_rating or None,
+            in_collection,
+            order_by,
+            offset,
+            limit,
+        )
+        cached = self._search_cache.get(query, self._generation)
+        if cached is not None:
+            return cached
+        results = tuple(self._search(title, director, year, genre, min_rating, in_collection, order_by, offset, limit))
+        self._search_cache.put(query, self._generation, results)
+        return results
+
+    def iter_search_movies(self,
+                           title: Optional[str] = None,
+                           director: Optional[str] = None,
+                           year: Optional[int] = None,
+                           genre: Optional[str] = None,
+                           min_rating: Optional[float] = None,
+                           order_by: str = "title",
+                           in_collection: Optional[str] = None) -> Iterator[Movie]:
+        """
+        Генератор результатов search_movies.
+        В порядке названий совпадения находятся и отдаются по одному, поэтому
+        прерванный перебор не платит за остаток коллекции; для сортировки
+        по году или рейтингу совпадения сначала собираются и сортируются.
+        """
+        self._ensure_loaded()
+        field, descending = _parse_order(order_by)
+        keys, accept = self._match(title, director, year, genre, min_rating, in_collection)
+        for key in self._ordered_keys(keys, accept, field, descending):
+            yield self._movies[key]
+
+    def facets(self,
+               title: Optional[str] = None,
+               director: Optional[str] = None,
+               year: Optional[int] = None,
+               genre: Optional[str] = None,
+               min_rating: Optional[float] = None,
+               in_collection: Optional[str] = None) -> Facets:
+        """
+        Возвращает число фильмов по жанрам, режиссерам, десятилетиям и целой
+        части рейтинга. Критерии - как в search_movies.
+        Без критериев ответ берется из счетчиков, которые add_movie и remove_movie
+        обновляют за O(1), поэтому не зависит от размера коллекции.
+        С критериями считаются только совпадения поиска.
+        """
+        self._ensure_loaded()
+        if not (title or director or year or genre or min_rating) and in_collection is None:
+            return self._facets.snapshot()
+        keys, accept = self._match(title, director, year, genre, min_rating, in_collection)
+        counter = FacetCounter()
+        movies = self._movies
+        for key in self._pool(keys, accept):
+            movie = movies[key]
+            counter.add(movie.genre, movie.director, movie.year, movie.rating)
+        return counter.snapshot()
+
+    def search_movies_with_facets(self,
+                                  title: Optional[str] = None,
+                                  director: Optional[str] = None,
+                                  year: Optional[int] = None,
+                                  genre: Optional[str] = None,
+                                  min_rating: Optional[float] = None,
+                                  order_by: str = "title",
+                                  offset: int = 0,
+                                  limit: Optional[int] = None,
+                                  in_collection: Optional[str] = None) -> Tuple[List[Movie], Facets]:
+        """
+        Возвращает страницу search_movies и facets() по всем совпадениям поиска.
+        Совпадения перебираются один раз: по ходу перебора считаются счетчики
+        и собираются ключи, из которых затем выбирается страница.
+        Кеш поиска не используется.
+        """
+        self._ensure_loaded()
+        keys, accept = self._match(title, director, year, genre, min_rating, in_collection)
+        if keys is None and accept is None:
+            page = self._page_keys(None, None, order_by, offset, limit)
+            return [self._movies[key] for key in page], self._facets.snapshot()
+        counter = FacetCounter()
+        matched: Set[str] = set()
+        movies = self._movies
+        for key in self._pool(keys, accept):
+            movie = movies[key]
+            counter.add(movie.genre, movie.director, movie.year, movie.rating)
+            matched.add(key)
+        page = self._page_keys(matched, None, order_by, offset, limit)
+        return [movies[key] for key in page], counter.snapshot()
+
+    def fuzzy_search(self, title: str, max_distance: int = 2, limit: Optional[int] = 10) -> List[Movie]:
+        """
+        Ищет фильмы, название которых отличается от title не более чем на
+        max_distance вставок, удалений или замен символов (без учета регистра
+        и крайних пробелов). Результаты упорядочены по расстоянию, затем по
+        ключу; limit - сколько вернуть (None - все).
+        Кандидаты отбираются по n-граммам запроса (см. FuzzyIndex), и расстояние
+        считается только для них: на каталоге в 1 млн фильмов поиск с
+        max_distance=2 занимает несколько миллисекунд. Индекс занимает память,
+        сравнимую с индексом n-грамм из ngram_size; если коллекция создана без
+        fuzzy_index=True, он строится при первом вызове (O(n)), а дальше
+        add_movie и remove_movie обновляют его инкрементально.
+        """
+        if max_distance < 0 or (limit is not None and limit < 0):
+            raise ValueError("max_distance и limit не могут быть отрицательными.")
+        self._ensure_loaded()
+        if self._fuzzy is None:
+            index = FuzzyIndex()
+            for key in self._movies:
+                index.add(key)
+            self._fuzzy = index
+        matches = self._fuzzy.search(self._normalize_title(title), max_distance)
+        ranked = sorted(matches) if limit is None else heapq.nsmallest(limit, matches)
+        return [self._movies[key] for _, key in ranked]
+
+    def autocomplete(self, prefix: str, limit: int = 10, order_by: str = "title") -> List[Movie]:
+        """
+        Возвращает до limit фильмов, нормализованное название которых начинается
+        с prefix (без учета регистра и начальных пробелов).
+        order_by="title" - в алфавитном порядке ключей; поиск отрезка в списке
+        ключей и выборка стоят O(log n + limit).
+        order_by="-rating" - сначала лучшие по рейтингу, фильмы без рейтинга последними.
+        Небольшой отрезок перебирается целиком, а для короткого префикса, которому
+        подходит много фильмов, обходится индекс рейтинга от лучших, пока не наберется
+        limit совпадений. Выбирается более дешевый путь, поэтому в среднем стоимость
+        не превышает O(sqrt(n * limit)) даже для префикса из одной буквы.
+        """
+        if limit < 0:
+            raise ValueError("limit не может быть отрицательным.")
+        if order_by not in ("title", "-rating"):
+            raise ValueError(f"Неизвестный порядок подсказок '{order_by}', ожидается 'title' или '-rating'.")
+        self._ensure_loaded()
+        needle = prefix.lstrip().lower()
+        keys = self._sorted_keys
+        start = bisect_left(keys, needle)
+        stop = bisect_left(keys, needle + "\U0010ffff", start)
+        if order_by == "title":
+            return [self._movies[key] for key in keys[start:min(stop, start + limit)]]
+
+        size = stop - start
+        rated = self._rated_keys_descending() if size * size > limit * len(keys) else None
+        if rated is None:
+            best = heapq.nlargest(limit, keys[start:stop], key=self._sort_key("rating", True))
+            return [self._movies[key] for key in best]
+        found = list(islice((key for key in rated if key.startswith(needle)), limit))
+        if len(found) < limit:
+            # Рейтинг есть не у всех подходящих фильмов: остальные идут последними,
+            # в том же порядке, что и в search_movies(order_by="-rating").
+            unrated = (key for key in reversed(keys[start:stop]) if self._sort_value(key, "rating") is None)
+            found.extend(islice(unrated, limit - len(found)))
+        return [self._movies[key] for key in found]
 
+    def _rated_keys_descending(self) -> Optional[Iterator[str]]:
+        """Ключи фильмов с рейтингом от лучшего к худшему или None, если индекса рейтинга нет."""
+        return self._rating_index.descending()
 
-    def __iter__(self) -> MovieIterator:
+    def compile_query(self, query: Query) -> CompiledQuery:
+        """
+        Готовит составной запрос (см. movie_management.query) к выполнению:
+        оценивает по индексам, скольким фильмам подходит каждое условие,
+        и упорядочивает условия от самых избирательных. CompiledQuery.explain()
+        показывает порядок вычисления и сколько фильмов отсеяло каждое условие.
+        """
+        self._ensure_loaded()
+        return CompiledQuery(self, query)
+
+    def query_movies(self,
+                     query: Query,
+                     order_by: str = "title",
+                     offset: int = 0,
+                     limit: Optional[int] = None) -> List[Movie]:
+        """
+        Возвращает фильмы, подходящие под составной запрос с диапазонами,
+        ИЛИ и НЕ. Порядок и страница - как в search_movies.
+        """
+        return self.compile_query(query).run(order_by, offset, limit)
+
+    def _leaf_postings(self, query: Query) -> Optional[List[AbstractSet[str]]]:
+        """
+        Возвращает списки ключей из индексов для простого условия запроса
+        или None, если индекс для него не помогает. Для названия списки
+        из индекса n-грамм - лишь надмножество совпадений.
+        """
+        if isinstance(query, InCollection):
+            return [self._collection_members(query.name)]
+        if isinstance(query, Between):
+            if query.field == "rating":
+                return [self._rating_index.between(query.low, query.high)]
+            low = float("-inf") if query.low is None else query.low
+            high = float("inf") if query.high is None else query.high
+            return self._year_index.matching(lambda value: low <= value <= high)
+        if isinstance(query, Contains) and query.needle:
+            needle = query.needle.casefold()
+            if query.field == "director":
+                return self._value_postings(self._director_index, self._director_grams, needle)
+            if query.field == "genre":
+                return self._value_postings(self._genre_index, self._genre_grams, needle)
+            if self._title_grams is not None:
+                title_keys = self._title_grams.candidates(needle)
+                if title_keys is not None:
+                    return [title_keys]  # type: ignore[list-item]
+        return None
+
+    def _leaf_predicate(self, query: Query) -> Callable[[str], bool]:
+        """Возвращает проверку простого условия запроса по ключу фильма."""
+        if isinstance(query, InCollection):
+            return self._collection_members(query.name).__contains__
+        if isinstance(query, Between):
+            movies = self._movies
+            name = query.field
+            low = float("-inf") if query.low is None else query.low
+            high = float("inf") if query.high is None else query.high
+
+            def in_range(key: str) -> bool:
+                value = getattr(movies[key], name)
+                return value is not None and low <= value <= high
+            return in_range
+        needle = query.needle.casefold()  # type: ignore[attr-defined]
+        if not needle:
+            return lambda key: True
+        position = ("title", "director", "genre").index(query.field)  # type: ignore[attr-defined]
+        folded = self._folded
+        return lambda key: needle in folded[key][position]
+
+    def search_cache_stats(self) -> Optional[CacheStats]:
+        """Возвращает счетчики кеша поиска (попадания, промахи, вытеснения) или None, если кеш выключен."""
+        if self._search_cache is None:
+            return None
+        return self._search_cache.stats()
+
+    def enable_instrumentation(self,
+                               slow_query_threshold: Optional[float] = None,
+                               slow_query_log_size: int = 100,
+                               tracer: Optional[Tracer] = None,
+                               hook: Optional[Callable[[CallRecord], None]] = None) -> Instrumentation:
+        """
+        Включает сбор метрик публичных методов: число вызовов и ошибок,
+        гистограммы задержек, размеры результатов, а для search_movies -
+        сколько строк просмотрено и сколько из них подошло.
+        slow_query_threshold - порог в секундах для журнала медленных запросов;
+        tracer - фабрика контекстных менеджеров для внешнего профилировщика
+        или трассировщика (вызывается с именем метода); hook получает CallRecord
+        после каждого вызова. Повторное включение начинает счетчики заново.
+        Пока инструментация выключена, она ничего не стоит.
+        """
+        self.disable_instrumentation()
+        self._instrumentation = Instrumentation(slow_query_threshold, slow_query_log_size, tracer, hook)
+        self._instrumentation.attach(self)
+        return self._instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """Выключает инструментацию и возвращает методам исходную скорость."""
+        if self._instrumentation is not None:
+            Instrumentation.detach(self)
+            self._instrumentation = None
+
+    def stats(self) -> Optional[Dict[str, object]]:
+        """
+        Возвращает снимок метрик (словарь, пригодный для JSON) или None,
+        если инструментация выключена.
+        """
+        if self._instrumentation is None:
+            return None
+        return self._instrumentation.stats()
+
+    def _search(self,
+                title: Optional[str],
+                director: Optional[str],
+                year: Optional[int],
+                genre: Optional[str],
+                min_rating: Optional[float],
+                in_collection: Optional[str],
+                order_by: str,
+                offset: int,
+                limit: Optional[int]) -> List[Movie]:
+        """Выполняет поиск без кеша."""
+        keys, accept = self._match(title, director, year, genre, min_rating, in_collection)
+        return [self._movies[key] for key in self._page_keys(keys, accept, order_by, offset, limit)]
+
+    def _match(self,
+               title: Optional[str],
+               director: Optional[str],
+               year: Optional[int],
+               genre: Optional[str],
+               min_rating: Optional[float],
+               in_collection: Optional[str] = None) -> Tuple[Optional[AbstractSet[str]], Optional[Callable[[str], bool]]]:
+        """
+        Отбирает совпадения поиска.
+        Возвращает множество подходящих ключей (None - вся коллекция) и
+        необязательный предикат, который ключ должен еще пройти. Предикат
+        нужен, когда индексы ничего не отсекли, чтобы проверка названия шла
+        лениво по ходу обхода в нужном порядке.
+        Переопределяется альтернативными хранилищами.
+        """
+        title_needle = title.casefold() if title else None
+        members = None if in_collection is None else self._collection_members(in_collection)
+        candidates = self._index_candidates(title_needle, director, year, genre, min_rating, members)
+        folded = self._folded
+        if candidates is None:
+            if title_needle:
+                return None, lambda key: title_needle in folded[key][0]
+            return None, None
+        if title_needle:
+            candidates = {key for key in candidates if title_needle in folded[key][0]}
+        return candidates, None
+
+    def _collection_members(self, collection_name: str) -> BitmapKeys:
+        """Возвращает ключи фильмов подборки или вызывает CollectionNotFoundError."""
+        bitmap = self._named_collections.get(collection_name)
+        if bitmap is None:
+            raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
+        return self._members(bitmap)
+
+    def _sort_value(self, key: str, field: str) -> object:
+        """Возвращает значение поля фильма для сортировки."""
+        return getattr(self._movies[key], field)
+
+    def _ordered_keys(self,
+                      keys: Optional[AbstractSet[str]],
+                      accept: Optional[Callable[[str], bool]],
+                      field: str,
+                      descending: bool) -> Iterator[str]:
+        """
+        Перебирает ключи (None - все ключи коллекции) в порядке поля field.
+        Порядок по названию берется из упорядоченного списка коллекции лениво;
+        небольшое множество ключей дешевле отсортировать само по себе.
+        """
+        if field == "title":
+            if keys is None or len(keys) * 8 >= len(self._order):
+                order = reversed(self._order) if descending else self._order
+                ordered: Iterable[str] = (key for _, key in order if keys is None or key in keys)
+                if accept is not None:
+                    ordered = filter(accept, ordered)
+                return iter(ordered)
+        pool = self._pool(keys, accept)
+        return iter(sorted(pool, key=self._sort_key(field, descending), reverse=descending))
+
+    def _page_keys(self,
+                   keys: Optional[AbstractSet[str]],
+                   accept: Optional[Callable[[str], bool]],
+                   order_by: str,
+                   offset: int,
+                   limit: Optional[int]) -> List[str]:
+        """
+        Возвращает ключи страницы [offset, offset + limit) в порядке order_by.
+        Если страница ограничена, вместо полной сортировки через кучу
+        отбираются offset + limit лучших ключей: O(n log k) вместо O(n log n).
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset и limit не могут быть отрицательными.")
+        field, descending = _parse_order(order_by)
+        if limit is None:
+            return list(islice(self._ordered_keys(keys, accept, field, descending), offset, None))
+        end = offset + limit
+        if field == "title" and (keys is None or len(keys) * 8 >= len(self._order)):
+            return list(islice(self._ordered_keys(keys, accept, field, descending), offset, end))
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(end, self._pool(keys, accept), key=self._sort_key(field, descending))[offset:]
+
+    def _pool(self,
+              keys: Optional[AbstractSet[str]],
+              accept: Optional[Callable[[str], bool]]) -> Iterable[str]:
+        """Ключи-кандидаты для сортировки: только присутствующие в коллекции и прошедшие предикат."""
+        movies = self._movies
+        pool: Iterable[str] = movies.keys() if keys is None else (key for key in keys if key in movies)
+        if accept is not None:
+            pool = filter(accept, pool)
+        return pool
+
+    def _sort_key(self, field: str, descending: bool) -> Callable[[str], tuple]:
+        """
+        Ключ сортировки по полю с ключом фильма для однозначного порядка.
+        Пустые значения (фильмы без рейтинга) уходят в конец при любом направлении.
+        """
+        sort_value = self._sort_value
+        if field == "title":
+            return lambda key: (sort_value(key, "title"), key)
+        return lambda key: _ranked(sort_value(key, field), key, descending)
+
+    def _value_postings(self,
+                        index: HashIndex,
+                        grams: Optional[NGramIndex],
+                        needle: str) -> List[Set[str]]:
+        """
+        Возвращает списки ключей для всех значений поля, содержащих подстроку needle.
+        Если есть индекс n-грамм, проверяются только значения-кандидаты из него,
+        иначе (или для слишком короткого запроса) - все различные значения поля.
+        """
+        values = grams.candidates(needle) if grams is not None else None
+        if values is None:
+            return index.matching(lambda value: needle in value)
+        return [index.get(value) for value in values if needle in value]  # type: ignore[operator]
+
+    def _index_candidates(self,
+                          title_needle: Optional[str],
+                          director: Optional[str],
+                          year: Optional[int],
+                          genre: Optional[str],
+                          min_rating: Optional[float],
+                          members: Optional[AbstractSet[str]] = None) -> Optional[Set[str]]:
+        """
+        Возвращает множество ключей фильмов, подходящих под все индексируемые критерии,
+        или None, если ни один такой критерий не задан. members - ключи подборки,
+        которой ограничен поиск.
+        Каждый критерий дает список непересекающихся множеств ключей; пересечение
+        строится от самого маленького, остальные критерии лишь фильтруют его.
+        Для названия индекс дает лишь надмножество совпадений, поэтому подстроку
+        в названии search_movies проверяет отдельно.
+        """
+        criteria: List[List[AbstractSet[str]]] = []
+        if title_needle and self._title_grams is not None:
+            title_keys = self._title_grams.candidates(title_needle)
+            if title_keys is not None:
+                criteria.append([title_keys])  # type: ignore[list-item]
+        if year:
+            criteria.append([self._year_index.get(year)])
+        if director:
+            criteria.append(self._value_postings(self._director_index, self._director_grams, director.casefold()))
+        if genre:
+            criteria.append(self._value_postings(self._genre_index, self._genre_grams, genre.casefold()))
+        if min_rating:
+            criteria.append([self._rating_index.at_least(min_rating)])
+        if members is not None:
+            criteria.append([members])
+        if not criteria:
+            return None
+
+        criteria.sort(key=lambda postings: sum(len(posting) for posting in postings))
+        smallest, *rest = criteria
+        candidates: Set[str] = set()
+        for posting in smallest:
+            candidates.update(posting)
+        for postings in rest:
+            if not candidates:
+                break
+            candidates = {key for key in candidates if any(key in posting for posting in postings)}
+        return candidates
+
+
+    def __iter__(self) -> Iterator[Movie]:
         """Позволяет перебирать фильмы коллекции в цикле for."""
-        return MovieIterator(list(self._movies.values()))
+        return MovieIterator(self)
 
     def __len__(self) -> int:
         """Возвращает общее количество фильмов в основной коллекции."""
         return len(self._movies)
 
-    def list_all_movies(self) -> List[Movie]:
-        """Возвращает список всех фильмов в коллекции, отсортированных по названию."""
-        return sorted(list(self._movies.values()), key=lambda movie: movie.title)
+    def list_all_movies(self,
+                        order_by: str = "title",
+                        offset: int = 0,
+                        limit: Optional[int] = None) -> List[Movie]:
+        """
+        Возвращает список всех фильмов в коллекции, по умолчанию отсортированных по названию.
+        Порядок и постраничная выборка - как в search_movies.
+        """
+        if self._lazy is not None and order_by == "title" and offset >= 0 and (limit is None or limit >= 0):
+            return list(islice(self._lazy.in_title_order(), offset, None if limit is None else offset + limit))
+        self._ensure_loaded()
+        return [self._movies[key] for key in self._page_keys(None, None, order_by, offset, limit)]
 
     def list_named_collections(self) -> List[str]:
         """Возвращает список названий всех именованных подборок, отсортированный по алфавиту."""
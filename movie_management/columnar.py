@@ -0,0 +1,307 @@
+from bisect import bisect_left, insort
+from typing import AbstractSet, Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+from .collection import EventSink, MovieCollection
+from .movie import Movie
+from .query import Between, InCollection, Query
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость
+    np = None
+
+
+class _Dictionary:
+    """
+    Словарное кодирование строкового столбца: значение -> целочисленный код.
+    Коды не переиспользуются, поэтому словарь растет только с числом различных значений.
+    """
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._folded: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        """Возвращает код значения, заводя новый при первой встрече."""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+            self._folded.append(value.casefold())
+        return code
+
+    def copy(self) -> '_Dictionary':
+        clone = _Dictionary()
+        clone.values = list(self.values)
+        clone._folded = list(self._folded)
+        clone._codes = dict(self._codes)
+        return clone
+
+    def matching(self, needle: str) -> 'np.ndarray':
+        """Возвращает коды значений, содержащих подстроку needle (без учета регистра)."""
+        return np.array([code for code, value in enumerate(self._folded) if needle in value], dtype=np.int32)
+
+
+class ColumnarStore(MutableMapping[str, Movie]):
+    """
+    Колоночное хранилище фильмов, доступное как словарь "ключ -> Movie".
+    Год и рейтинг лежат в массивах NumPy (NaN - нет рейтинга), режиссер и жанр
+    закодированы словарем, названия хранятся в таблице по номеру строки.
+    Объект Movie создается только при обращении к конкретной строке.
+    Удаление помечает строку как мертвую; когда мертвых строк становится больше
+    доли compact_ratio, хранилище уплотняется.
+    """
+    def __init__(self, capacity: int = 1024, compact_ratio: float = 0.25) -> None:
+        if np is None:
+            raise ImportError("Для колоночного хранилища нужен пакет numpy.")
+        self._compact_ratio = compact_ratio
+        self._size: int = 0
+        self._tombstones: int = 0
+        self._years = np.zeros(capacity, dtype=np.int64)
+        self._ratings = np.full(capacity, np.nan, dtype=np.float64)
+        self._director_codes = np.zeros(capacity, dtype=np.int32)
+        self._genre_codes = np.zeros(capacity, dtype=np.int32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._titles: List[Optional[str]] = []
+        self._folded_titles: List[Optional[str]] = []
+        self._keys: List[Optional[str]] = []
+        self._row_of: Dict[str, int] = {}
+        self._directors = _Dictionary()
+        self._genres = _Dictionary()
+
+    def _grow(self) -> None:
+        """Удваивает емкость массивов."""
+        extra = max(len(self._years), 1)
+        self._years = np.concatenate([self._years, np.zeros(extra, dtype=np.int64)])
+        self._ratings = np.concatenate([self._ratings, np.full(extra, np.nan, dtype=np.float64)])
+        self._director_codes = np.concatenate([self._director_codes, np.zeros(extra, dtype=np.int32)])
+        self._genre_codes = np.concatenate([self._genre_codes, np.zeros(extra, dtype=np.int32)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+
+    def __setitem__(self, key: str, movie: Movie) -> None:
+        if key in self._row_of:
+            del self[key]
+        if self._size == len(self._years):
+            self._grow()
+        row = self._size
+        self._years[row] = movie.year
+        self._ratings[row] = np.nan if movie.rating is None else movie.rating
+        self._director_codes[row] = self._directors.encode(movie.director)
+        self._genre_codes[row] = self._genres.encode(movie.genre)
+        self._alive[row] = True
+        self._titles.append(movie.title)
+        self._folded_titles.append(movie.title.casefold())
+        self._keys.append(key)
+        self._row_of[key] = row
+        self._size += 1
+
+    def __getitem__(self, key: str) -> Movie:
+        return self.movie_at(self._row_of[key])
+
+    def __delitem__(self, key: str) -> None:
+        row = self._row_of.pop(key)
+        self._alive[row] = False
+        self._titles[row] = None
+        self._folded_titles[row] = None
+        self._keys[row] = None
+        self._tombstones += 1
+        if self._tombstones > self._compact_ratio * self._size:
+            self.compact()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._row_of
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._row_of)
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def copy(self) -> 'ColumnarStore':
+        """Возвращает независимую копию хранилища: массивы и таблицы копируются целиком."""
+        clone = ColumnarStore.__new__(ColumnarStore)
+        clone.__dict__.update(self.__dict__)
+        for name in ("_years", "_ratings", "_director_codes", "_genre_codes", "_alive"):
+            setattr(clone, name, getattr(self, name).copy())
+        clone._titles = list(self._titles)
+        clone._folded_titles = list(self._folded_titles)
+        clone._keys = list(self._keys)
+        clone._row_of = dict(self._row_of)
+        clone._directors = self._directors.copy()
+        clone._genres = self._genres.copy()
+        return clone
+
+    def compact(self) -> None:
+        """Удаляет мертвые строки и перенумеровывает оставшиеся."""
+        rows = np.flatnonzero(self._alive[:self._size])
+        self._years = self._years[rows]
+        self._ratings = self._ratings[rows]
+        self._director_codes = self._director_codes[rows]
+        self._genre_codes = self._genre_codes[rows]
+        self._alive = np.ones(len(rows), dtype=bool)
+        row_list = rows.tolist()
+        self._titles = [self._titles[row] for row in row_list]
+        self._folded_titles = [self._folded_titles[row] for row in row_list]
+        self._keys = [self._keys[row] for row in row_list]
+        self._row_of = {key: row for row, key in enumerate(self._keys)}  # type: ignore[misc]
+        self._size = len(row_list)
+        self._tombstones = 0
+
+    def movie_at(self, row: int) -> Movie:
+        """Собирает объект Movie из строки хранилища."""
+        rating = float(self._ratings[row])
+        return Movie(
+            self._titles[row],  # type: ignore[arg-type]
+            self._directors.values[self._director_codes[row]],
+            int(self._years[row]),
+            self._genres.values[self._genre_codes[row]],
+            None if rating != rating else rating,
+        )
+
+    def title_at(self, row: int) -> str:
+        return self._titles[row]  # type: ignore[return-value]
+
+    def folded_title_at(self, row: int) -> str:
+        return self._folded_titles[row]  # type: ignore[return-value]
+
+    def key_at(self, row: int) -> str:
+        return self._keys[row]  # type: ignore[return-value]
+
+    def value_at(self, row: int, field: str) -> object:
+        """Возвращает значение поля строки (для рейтинга None - нет рейтинга)."""
+        if field == "title":
+            return self._titles[row]
+        if field == "director":
+            return self._directors.values[self._director_codes[row]]
+        if field == "genre":
+            return self._genres.values[self._genre_codes[row]]
+        if field == "year":
+            return int(self._years[row])
+        rating = float(self._ratings[row])
+        return None if rating != rating else rating
+
+    def row_of(self, key: str) -> int:
+        return self._row_of[key]
+
+    def select(self,
+               director: Optional[str] = None,
+               year: Optional[int] = None,
+               genre: Optional[str] = None,
+               min_rating: Optional[float] = None) -> 'np.ndarray':
+        """
+        Возвращает номера живых строк, подходящих под критерии.
+        Каждый критерий - векторная булева маска; строки режиссера и жанра
+        сравниваются через коды значений, содержащих подстроку.
+        """
+        size = self._size
+        mask = self._alive[:size].copy()
+        if year:
+            mask &= self._years[:size] == year
+        if min_rating:
+            mask &= self._ratings[:size] >= min_rating
+        if director:
+            mask &= np.isin(self._director_codes[:size], self._directors.matching(director.casefold()))
+        if genre:
+            mask &= np.isin(self._genre_codes[:size], self._genres.matching(genre.casefold()))
+        return np.flatnonzero(mask)
+
+
+class ColumnarMovieCollection(MovieCollection):
+    """
+    Коллекция фильмов с колоночным хранилищем (нужен numpy).
+    Публичный интерфейс совпадает с MovieCollection, но фильмы хранятся
+    в ColumnarStore, а search_movies фильтрует их векторными масками
+    вместо вторичных индексов.
+    """
+    def __init__(self,
+                 compact_ratio: float = 0.25,
+                 event_sink: Optional[EventSink] = None,
+                 search_cache_size: int = 0,
+                 search_cache_ttl: Optional[float] = None,
+                 fuzzy_index: bool = False) -> None:
+        super().__init__(event_sink=event_sink,
+                         search_cache_size=search_cache_size,
+                         search_cache_ttl=search_cache_ttl,
+                         fuzzy_index=fuzzy_index)
+        self._columns = ColumnarStore(compact_ratio=compact_ratio)
+        self._movies = self._columns  # type: ignore[assignment]
+
+    def _index_movie(self, key: str, movie: Movie) -> None:
+        """Колоночному хранилищу нужен только порядок по названию."""
+        insort(self._order, (movie.title, key))
+
+    def _index_movies(self, movies: Dict[str, Movie]) -> None:
+        self._order.extend((movie.title, key) for key, movie in movies.items())
+        self._order.sort()
+
+    def _unindex_movie(self, key: str, movie: Movie) -> None:
+        del self._order[bisect_left(self._order, (movie.title, key))]
+
+    def _match(self,
+               title: Optional[str],
+               director: Optional[str],
+               year: Optional[int],
+               genre: Optional[str],
+               min_rating: Optional[float],
+               in_collection: Optional[str] = None) -> Tuple[Optional[AbstractSet[str]], None]:
+        """
+        Отбирает совпадения по тем же правилам, что и MovieCollection.search_movies.
+        Год, рейтинг, режиссер и жанр проверяются масками по всем строкам сразу,
+        подстрока в названии - только у строк, прошедших маски.
+        """
+        columns = self._columns
+        members = None if in_collection is None else self._collection_members(in_collection)
+        rows: List[int] = columns.select(director, year, genre, min_rating).tolist()
+        if title:
+            needle = title.casefold()
+            rows = [row for row in rows if needle in columns.folded_title_at(row)]
+        if members is not None:
+            return {key for key in map(columns.key_at, rows) if key in members}, None
+        return {columns.key_at(row) for row in rows}, None
+
+    def _sort_value(self, key: str, field: str) -> object:
+        """Значение для сортировки берется из столбца, без сборки объекта Movie."""
+        return self._columns.value_at(self._columns.row_of(key), field)
+
+    def _leaf_postings(self, query: Query) -> Optional[List[AbstractSet[str]]]:
+        """Вторичных индексов нет: кандидатов дает только битовая карта подборки."""
+        if isinstance(query, InCollection):
+            return super()._leaf_postings(query)
+        return None
+
+    def _leaf_predicate(self, query: Query) -> Callable[[str], bool]:
+        """Условия проверяются по столбцам, без сборки объекта Movie."""
+        if isinstance(query, InCollection):
+            return super()._leaf_predicate(query)
+        columns = self._columns
+        name = query.field  # type: ignore[attr-defined]
+        if isinstance(query, Between):
+            low = float("-inf") if query.low is None else query.low
+            high = float("inf") if query.high is None else query.high
+
+            def in_range(key: str) -> bool:
+                value = columns.value_at(columns.row_of(key), name)
+                return value is not None and low <= value <= high  # type: ignore[operator]
+            return in_range
+        needle = query.needle.casefold()  # type: ignore[attr-defined]
+        if name == "title":
+            return lambda key: needle in columns.folded_title_at(columns.row_of(key))
+        return lambda key: needle in columns.value_at(columns.row_of(key), name).casefold()  # type: ignore[union-attr]
+
+    def _rated_keys_descending(self) -> None:
+        """Индекса рейтинга нет: autocomplete перебирает отрезок ключей."""
+        return None
+
+    def _copy_movies(self) -> ColumnarStore:
+        """Копируются столбцы, без сборки объектов Movie."""
+        return self._columns.copy()
+
+    def _own_movies(self) -> None:
+        super()._own_movies()
+        self._columns = self._movies  # type: ignore[assignment]
+
+    def compact(self) -> None:
+        """Принудительно уплотняет хранилище, не дожидаясь порога мертвых строк."""
+        self._own_movies()
+        self._columns.compact()
@@ -0,0 +1,252 @@
+"""
+Потокобезопасная коллекция фильмов с копированием при записи.
+
+Опубликованная версия - обычная MovieCollection, которую после публикации
+никто не изменяет. Читатели берут ссылку на текущую версию без блокировок
+и работают с ней, сколько бы изменений ни произошло за это время. Писатели
+выполняются по одному: копируют текущую версию, применяют к копии изменения
+и публикуют ее одним присваиванием ссылки.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .collection import BulkResult, EventSink, MovieCollection
+from .events import ChangeEvent, ChangeListener
+from .facets import Facets
+from .query import CompiledQuery, Query
+from .movie import Movie
+
+
+class ConcurrentMovieCollection:
+    """
+    Коллекция фильмов для одновременной работы многих читающих потоков
+    и фоновых писателей.
+    Новая версия делит с прежней все структуры, которые изменение не затронуло
+    (см. MovieCollection.copy). Изменение подборки копирует только ее битовую
+    карту и словари подборок; добавление или удаление фильма копирует таблицы
+    фильмов и индексов без самих множеств индекса - около 35 мс на 200 тыс.
+    фильмов. Поэтому серию изменений фильмов следует выполнять внутри
+    batch() - тогда таблицы копируются один раз.
+    Кеш результатов поиска не поддерживается: версии живут недолго,
+    а кеш изменялся бы читателями без синхронизации.
+    """
+    def __init__(self,
+                 ngram_size: Optional[int] = None,
+                 event_sink: Optional[EventSink] = None,
+                 fuzzy_index: bool = False) -> None:
+        self._write_lock = threading.RLock()
+        self._current = MovieCollection(ngram_size=ngram_size, event_sink=event_sink, fuzzy_index=fuzzy_index)
+        # Копия, которую изменяет открытый пакет batch(); None вне пакета.
+        self._draft: Optional[MovieCollection] = None
+        # Подписчики на события изменений (см. subscribe).
+        self._listeners: List[ChangeListener] = []
+
+    def version(self) -> MovieCollection:
+        """
+        Возвращает текущую опубликованную версию.
+        Несколько чтений из одной версии согласованы между собой.
+        Версию нельзя изменять.
+        """
+        return self._current
+
+    @contextmanager
+    def batch(self) -> Iterator[MovieCollection]:
+        """
+        Открывает пакет изменений и отдает изменяемую копию коллекции.
+        Изменения публикуются все сразу при выходе из блока; если блок
+        завершился исключением, копия отбрасывается и версия не меняется.
+        Читатели, в том числе сам пишущий поток, до выхода из блока видят
+        прежнюю версию. Вложенные пакеты и вызовы изменяющих методов внутри
+        пакета работают с той же копией.
+        """
+        with self._write_lock:
+            if self._draft is not None:
+                yield self._draft
+                return
+            self._draft = self._current.copy()
+            # События пакета копятся и передаются подписчикам после публикации.
+            events: List[ChangeEvent] = []
+            collecting = bool(self._listeners)
+            if collecting:
+                self._draft.subscribe(events.append)
+            try:
+                yield self._draft
+                if collecting:
+                    self._draft.unsubscribe(events.append)
+                self._current = self._draft
+            finally:
+                self._draft = None
+            for event in events:
+                for listener in list(self._listeners):
+                    listener(event)
+
+    def subscribe(self, listener: ChangeListener) -> None:
+        """
+        Подписывает listener на события изменений (см. movie_management.events).
+        События пакета передаются в потоке писателя после публикации версии,
+        в которой они произошли; текущая версия к этому моменту уже содержит
+        все изменения пакета.
+        """
+        with self._write_lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: ChangeListener) -> None:
+        """Отписывает listener; если он не подписан, вызывает ValueError."""
+        with self._write_lock:
+            self._listeners.remove(listener)
+
+    # Изменения
+
+    def add_movie(self, movie: Movie) -> None:
+        """Добавляет фильм и публикует новую версию."""
+        with self.batch() as draft:
+            draft.add_movie(movie)
+
+    def add_movies(self, movies: Iterable[Movie]) -> BulkResult:
+        """Добавляет пакет фильмов одной новой версией."""
+        with self.batch() as draft:
+            return draft.add_movies(movies)
+
+    def remove_movie(self, title: str) -> None:
+        """Удаляет фильм и публикует новую версию."""
+        with self.batch() as draft:
+            draft.remove_movie(title)
+
+    def create_named_collection(self, name: str) -> None:
+        with self.batch() as draft:
+            draft.create_named_collection(name)
+
+    def remove_named_collection(self, name: str) -> None:
+        with self.batch() as draft:
+            draft.remove_named_collection(name)
+
+    def add_movie_to_named_collection(self, movie_title: str, collection_name: str) -> None:
+        with self.batch() as draft:
+            draft.add_movie_to_named_collection(movie_title, collection_name)
+
+    def add_movies_to_named_collection(self, movie_titles: Iterable[str], collection_name: str) -> BulkResult:
+        with self.batch() as draft:
+            return draft.add_movies_to_named_collection(movie_titles, collection_name)
+
+    def remove_movie_from_named_collection(self, movie_title: str, collection_name: str) -> None:
+        with self.batch() as draft:
+            draft.remove_movie_from_named_collection(movie_title, collection_name)
+
+    # Чтение - без блокировок, из текущей версии
+
+    def get_movie(self, title: str) -> Movie:
+        return self._current.get_movie(title)
+
+    def search_movies(self,
+                      title: Optional[str] = None,
+                      director: Optional[str] = None,
+                      year: Optional[int] = None,
+                      genre: Optional[str] = None,
+                      min_rating: Optional[float] = None,
+                      order_by: str = "title",
+                      offset: int = 0,
+                      limit: Optional[int] = None,
+                      in_collection: Optional[str] = None) -> Sequence[Movie]:
+        return self._current.search_movies(title, director, year, genre, min_rating, order_by, offset, limit,
+                                           in_collection)
+
+    def iter_search_movies(self,
+                           title: Optional[str] = None,
+                           director: Optional[str] = None,
+                           year: Optional[int] = None,
+                           genre: Optional[str] = None,
+                           min_rating: Optional[float] = None,
+                           order_by: str = "title",
+                           in_collection: Optional[str] = None) -> Iterator[Movie]:
+        return self._current.iter_search_movies(title, director, year, genre, min_rating, order_by, in_collection)
+
+    def fuzzy_search(self, title: str, max_distance: int = 2, limit: Optional[int] = 10) -> List[Movie]:
+        return self._current.fuzzy_search(title, max_distance, limit)
+
+    def autocomplete(self, prefix: str, limit: int = 10, order_by: str = "title") -> List[Movie]:
+        return self._current.autocomplete(prefix, limit, order_by)
+
+    def query_movies(self,
+                     query: Query,
+                     order_by: str = "title",
+                     offset: int = 0,
+                     limit: Optional[int] = None) -> List[Movie]:
+        return self._current.query_movies(query, order_by, offset, limit)
+
+    def compile_query(self, query: Query) -> CompiledQuery:
+        """Готовит запрос для текущей версии; более поздних изменений он не увидит."""
+        return self._current.compile_query(query)
+
+    def facets(self,
+               title: Optional[str] = None,
+               director: Optional[str] = None,
+               year: Optional[int] = None,
+               genre: Optional[str] = None,
+               min_rating: Optional[float] = None,
+               in_collection: Optional[str] = None) -> Facets:
+        return self._current.facets(title, director, year, genre, min_rating, in_collection)
+
+    def search_movies_with_facets(self,
+                                  title: Optional[str] = None,
+                                  director: Optional[str] = None,
+                                  year: Optional[int] = None,
+                                  genre: Optional[str] = None,
+                                  min_rating: Optional[float] = None,
+                                  order_by: str = "title",
+                                  offset: int = 0,
+                                  limit: Optional[int] = None,
+                                  in_collection: Optional[str] = None) -> Tuple[List[Movie], Facets]:
+        return self._current.search_movies_with_facets(title, director, year, genre, min_rating,
+                                                       order_by, offset, limit, in_collection)
+
+    def list_all_movies(self,
+                        order_by: str = "title",
+                        offset: int = 0,
+                        limit: Optional[int] = None) -> List[Movie]:
+        return self._current.list_all_movies(order_by, offset, limit)
+
+    def get_movies_in_named_collection(self,
+                                       collection_name: str,
+                                       order_by: str = "title",
+                                       offset: int = 0,
+                                       limit: Optional[int] = None) -> List[Movie]:
+        return self._current.get_movies_in_named_collection(collection_name, order_by, offset, limit)
+
+    def union_named_collections(self,
+                                collection_names: Iterable[str],
+                                order_by: str = "title",
+                                offset: int = 0,
+                                limit: Optional[int] = None) -> List[Movie]:
+        return self._current.union_named_collections(collection_names, order_by, offset, limit)
+
+    def intersect_named_collections(self,
+                                    collection_names: Iterable[str],
+                                    order_by: str = "title",
+                                    offset: int = 0,
+                                    limit: Optional[int] = None) -> List[Movie]:
+        return self._current.intersect_named_collections(collection_names, order_by, offset, limit)
+
+    def difference_named_collections(self,
+                                     collection_names: Iterable[str],
+                                     order_by: str = "title",
+                                     offset: int = 0,
+                                     limit: Optional[int] = None) -> List[Movie]:
+        return self._current.difference_named_collections(collection_names, order_by, offset, limit)
+
+    def collections_containing(self, title: str) -> List[str]:
+        return self._current.collections_containing(title)
+
+    def list_named_collections(self) -> List[str]:
+        return self._current.list_named_collections()
+
+    def save_snapshot(self, path: str) -> None:
+        """Сохраняет текущую версию в файл снимка, не задерживая писателей."""
+        self._current.save_snapshot(path)
+
+    def __iter__(self) -> Iterator[Movie]:
+        """Перебирает фильмы версии, текущей на момент начала перебора."""
+        return iter(self._current)
+
+    def __len__(self) -> int:
+        return len(self._current)
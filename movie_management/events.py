@@ -0,0 +1,54 @@
+"""
+События изменений MovieCollection.
+
+Подписчик, зарегистрированный через MovieCollection.subscribe, получает
+событие после каждого изменения, когда коллекция уже находится в новом
+состоянии. Удаление фильма сначала сообщает о выходе фильма из каждой его
+подборки, затем о самом удалении; удаление подборки - о выходе каждого
+ее фильма, затем об удалении подборки.
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+from .movie import Movie
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Базовый класс событий изменения коллекции."""
+
+
+@dataclass(frozen=True)
+class MovieAdded(ChangeEvent):
+    movie: Movie
+
+
+@dataclass(frozen=True)
+class MovieRemoved(ChangeEvent):
+    movie: Movie
+
+
+@dataclass(frozen=True)
+class CollectionCreated(ChangeEvent):
+    collection_name: str
+
+
+@dataclass(frozen=True)
+class CollectionRemoved(ChangeEvent):
+    collection_name: str
+
+
+@dataclass(frozen=True)
+class MovieAddedToCollection(ChangeEvent):
+    collection_name: str
+    movie: Movie
+
+
+@dataclass(frozen=True)
+class MovieRemovedFromCollection(ChangeEvent):
+    collection_name: str
+    movie: Movie
+
+
+# Подписчик на события изменений коллекции.
+ChangeListener = Callable[[ChangeEvent], None]
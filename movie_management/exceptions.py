@@ -12,4 +12,12 @@ class CollectionNotFoundError(Exception):
 
 class CollectionAlreadyExistsError(Exception):
     """Исключение, когда именованная коллекция уже существует."""
+    pass
+
+class SnapshotFormatError(Exception):
+    """Исключение, когда файл не является снимком коллекции или поврежден."""
+    pass
+
+class JournalCorruptedError(Exception):
+    """Исключение, когда журнал изменений поврежден не только в последней записи."""
     pass
\ No newline at end of file
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional
+
+
+@dataclass(frozen=True)
+class Facets:
+    """
+    Число фильмов по значениям полей: жанрам, режиссерам, десятилетиям
+    и целой части рейтинга; unrated - фильмы без рейтинга.
+    """
+    total: int
+    genres: Dict[str, int]
+    directors: Dict[str, int]
+    decades: Dict[int, int]
+    ratings: Dict[int, int]
+    unrated: int
+
+
+def _bump(counts: Dict[Hashable, int], value: Hashable, delta: int) -> None:
+    count = counts.get(value, 0) + delta
+    if count:
+        counts[value] = count
+    else:
+        del counts[value]
+
+
+class FacetCounter:
+    """
+    Счетчики для Facets, изменяемые за O(1) на каждый добавленный или удаленный фильм.
+    Значения с нулевым счетчиком удаляются.
+    """
+    def __init__(self) -> None:
+        self.total = 0
+        self.unrated = 0
+        self.genres: Dict[str, int] = {}
+        self.directors: Dict[str, int] = {}
+        self.decades: Dict[int, int] = {}
+        self.ratings: Dict[int, int] = {}
+
+    def add(self, genre: str, director: str, year: int, rating: Optional[float], delta: int = 1) -> None:
+        """Учитывает фильм с указанными полями; delta=-1 - убирает его."""
+        self.total += delta
+        _bump(self.genres, genre, delta)
+        _bump(self.directors, director, delta)
+        _bump(self.decades, year // 10 * 10, delta)
+        if rating is None:
+            self.unrated += delta
+        else:
+            _bump(self.ratings, int(rating), delta)
+
+    def remove(self, genre: str, director: str, year: int, rating: Optional[float]) -> None:
+        self.add(genre, director, year, rating, -1)
+
+    def snapshot(self) -> Facets:
+        """Возвращает копию счетчиков; стоимость зависит только от числа различных значений."""
+        return Facets(self.total, dict(self.genres), dict(self.directors),
+                      dict(self.decades), dict(self.ratings), self.unrated)
+
+    def copy(self) -> 'FacetCounter':
+        clone = FacetCounter()
+        clone.total, clone.unrated = self.total, self.unrated
+        clone.genres, clone.directors = dict(self.genres), dict(self.directors)
+        clone.decades, clone.ratings = dict(self.decades), dict(self.ratings)
+        return clone
@@ -0,0 +1,148 @@
+"""
+Поиск названий с опечатками.
+
+Кандидаты отбираются по n-граммам: одна правка (вставка, удаление или замена
+символа) портит не больше n n-грамм строки, поэтому у строки на расстоянии
+не больше k от запроса отсутствует не больше k * n различных n-грамм запроса.
+Значит, из g n-грамм запроса у нее есть хотя бы g - k * n. Такие строки
+находятся операциями над множествами строк, начиная с самых редких n-грамм,
+а расстояние Левенштейна считается только для найденных кандидатов и только
+в полосе шириной 2k + 1.
+"""
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .indexes import PostingMap
+
+_EMPTY: Set[str] = set()
+
+
+def levenshtein(first: str, second: str, limit: Optional[int] = None) -> int:
+    """
+    Расстояние Левенштейна (вставка, удаление, замена символа).
+    Если задан limit, считаются только клетки в полосе |i - j| <= limit,
+    а при расстоянии больше limit досрочно возвращается limit + 1.
+    """
+    if first == second:
+        return 0
+    if len(first) < len(second):
+        first, second = second, first
+    width = len(second)
+    if limit is None:
+        limit = len(first)
+    if len(first) - width > limit:
+        return limit + 1
+    if not width:
+        return len(first)
+    over = limit + 1
+    previous = [column if column <= limit else over for column in range(width + 1)]
+    for row, char in enumerate(first, 1):
+        current = [over] * (width + 1)
+        if row <= limit:
+            current[0] = row
+        best = current[0]
+        for column in range(max(1, row - limit), min(width, row + limit) + 1):
+            value = previous[column - 1] + (char != second[column - 1])
+            if previous[column] + 1 < value:
+                value = previous[column] + 1
+            if current[column - 1] + 1 < value:
+                value = current[column - 1] + 1
+            if value > over:
+                value = over
+            current[column] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return over
+        previous = current
+    return min(previous[width], over)
+
+
+class FuzzyIndex:
+    """
+    Индекс n-грамм строк для поиска с опечатками.
+    Строки дополняются по краям служебным символом, поэтому даже у короткой
+    строки есть n-граммы, а начало и конец строки учитываются отдельно.
+    Кроме n-грамм хранятся строки по длинам: короткий запрос, у которого
+    n-грамм слишком мало для отбора, сравнивается только со строками близкой длины.
+    """
+    def __init__(self, n: int = 3) -> None:
+        if n < 1:
+            raise ValueError("Длина n-граммы должна быть положительной.")
+        self.n: int = n
+        self._postings = PostingMap()
+        self._by_length = PostingMap()
+
+    def _grams(self, text: str) -> Set[str]:
+        padding = "\0" * (self.n - 1)
+        padded = f"{padding}{text}{padding}"
+        return {padded[start:start + self.n] for start in range(len(padded) - self.n + 1)}
+
+    def add(self, text: str) -> None:
+        for gram in self._grams(text):
+            self._postings.add(gram, text)
+        self._by_length.add(len(text), text)
+
+    def remove(self, text: str) -> None:
+        for gram in self._grams(text):
+            self._postings.discard(gram, text)
+        self._by_length.discard(len(text), text)
+
+    def copy(self) -> 'FuzzyIndex':
+        """Возвращает независимую копию индекса (множества строк копируются при записи)."""
+        clone = FuzzyIndex(self.n)
+        clone._postings = self._postings.copy()
+        clone._by_length = self._by_length.copy()
+        return clone
+
+    def _candidates(self, query: str, max_distance: int) -> Iterable[str]:
+        grams = self._grams(query)
+        allowed_missing = max_distance * self.n
+        if len(grams) <= allowed_missing:
+            length = len(query)
+            return [text
+                    for size in range(max(0, length - max_distance), length + max_distance + 1)
+                    for text in self._by_length.get(size, _EMPTY)]
+        required = len(grams) - allowed_missing
+        # N-граммы, которых нет ни у одной строки, отсутствуют и у кандидатов.
+        postings = sorted((posting for posting in map(self._postings.get, grams) if posting), key=len)
+        if len(postings) < required:
+            return ()
+        # hits[h] - строки, у которых есть хотя бы h из уже пройденных n-грамм.
+        # Уровень, который не успеет набрать required на оставшихся n-граммах,
+        # больше не пополняется, поэтому объединяются только самые редкие
+        # списки, а частые лишь пересекаются с уже небольшими множествами.
+        hits: List[Optional[Set[str]]] = [None] * (required + 1)
+        for number, posting in enumerate(postings, 1):
+            remaining = len(postings) - number
+            for level in range(min(number, required), 0, -1):
+                if level + remaining < required:
+                    break
+                if level == 1:
+                    found = posting
+                else:
+                    below = hits[level - 1]
+                    if not below:
+                        continue
+                    found = below & posting if len(below) < len(posting) else posting & below
+                current = hits[level]
+                hits[level] = found if current is None else current | found
+        return hits[required] or ()
+
+    def search(self, query: str, max_distance: int) -> List[Tuple[int, str]]:
+        """Возвращает пары (расстояние, строка) для всех строк не дальше max_distance от запроса."""
+        found = []
+        length = len(query)
+        grams = self._grams(query)
+        allowed_missing = max_distance * self.n
+        for text in self._candidates(query, max_distance):
+            if abs(len(text) - length) > max_distance:
+                continue
+            # Та же оценка через n-граммы, но по всем n-граммам кандидата:
+            # проверка множеств намного дешевле расстояния Левенштейна.
+            text_grams = self._grams(text)
+            if len(grams - text_grams) > allowed_missing or len(text_grams - grams) > allowed_missing:
+                continue
+            distance = levenshtein(query, text, max_distance)
+            if distance <= max_distance:
+                found.append((distance, text))
+        return found
@@ -0,0 +1,437 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+class PostingMap:
+    """
+    Словарь "значение -> множество элементов" с копированием множеств при записи.
+    copy() копирует только словарь ссылок, а сами множества остаются общими
+    у оригинала и копии; множество копируется, когда одна из сторон впервые
+    изменяет его. Поэтому копия индекса стоит O(числа значений), а не O(числа
+    элементов), и изменение одного фильма копирует только затронутые множества.
+    Возвращаемые множества можно только читать.
+    """
+    __slots__ = ("_sets", "_owned")
+
+    def __init__(self) -> None:
+        self._sets: Dict[Hashable, Set[Any]] = {}
+        # Значения, множества которых принадлежат только этому словарю.
+        self._owned: Set[Hashable] = set()
+
+    def get(self, value: Hashable, default: Any = None) -> Any:
+        return self._sets.get(value, default)
+
+    def items(self) -> Iterable[Tuple[Hashable, Set[Any]]]:
+        return self._sets.items()
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def add(self, value: Hashable, item: Any) -> bool:
+        """Добавляет элемент; возвращает True, если значение появилось впервые."""
+        posting = self._sets.get(value)
+        if posting is None:
+            self._sets[value] = {item}
+            self._owned.add(value)
+            return True
+        if value not in self._owned:
+            posting = self._sets[value] = set(posting)
+            self._owned.add(value)
+        posting.add(item)
+        return False
+
+    def discard(self, value: Hashable, item: Any) -> bool:
+        """Убирает элемент; пустое множество удаляется. Возвращает True, если значение пропало."""
+        posting = self._sets.get(value)
+        if posting is None or item not in posting:
+            return False
+        if len(posting) == 1:
+            del self._sets[value]
+            self._owned.discard(value)
+            return True
+        if value not in self._owned:
+            posting = self._sets[value] = set(posting)
+            self._owned.add(value)
+        posting.discard(item)
+        return False
+
+    def copy(self) -> 'PostingMap':
+        """Возвращает копию, разделяющую множества с оригиналом до первой записи."""
+        clone = PostingMap()
+        clone._sets = dict(self._sets)
+        self._owned = set()
+        return clone
+
+
+class HashIndex:
+    """
+    Хеш-индекс: значение поля -> множество ключей фильмов с этим значением.
+    Обновляется инкрементально при добавлении и удалении фильмов.
+    """
+    def __init__(self) -> None:
+        self._postings = PostingMap()
+
+    def add(self, value: Hashable, key: str) -> bool:
+        """
+        Регистрирует ключ фильма под указанным значением.
+        Возвращает True, если значение появилось в индексе впервые.
+        """
+        return self._postings.add(value, key)
+
+    def remove(self, value: Hashable, key: str) -> bool:
+        """
+        Убирает ключ фильма; пустые списки значений удаляются сразу.
+        Возвращает True, если значение пропало из индекса.
+        """
+        return self._postings.discard(value, key)
+
+    def get(self, value: Hashable) -> Set[str]:
+        """Возвращает множество ключей для значения (пустое, если значения нет)."""
+        return self._postings.get(value, set())
+
+    def matching(self, predicate: Callable[[Any], bool]) -> List[Set[str]]:
+        """
+        Возвращает списки ключей для всех значений, удовлетворяющих предикату.
+        Проверка идет по различным значениям, а не по фильмам, поэтому
+        для полей с небольшим числом значений (режиссер, жанр) она дешевая.
+        """
+        return [posting for value, posting in self._postings.items() if predicate(value)]
+
+    def copy(self) -> 'HashIndex':
+        """Возвращает независимую копию индекса (множества ключей копируются при записи)."""
+        clone = HashIndex()
+        clone._postings = self._postings.copy()
+        return clone
+
+    def __len__(self) -> int:
+        """Возвращает количество различных значений в индексе."""
+        return len(self._postings)
+
+
+class RangeView:
+    """
+    Ленивое представление ключей отсортированного индекса со значением в диапазоне [low, high].
+    Поддерживает len, in и перебор, не создавая промежуточного множества.
+    """
+    def __init__(self, index: 'SortedIndex', start: int, stop: int, low: Any, high: Any = None) -> None:
+        self._index = index
+        self._start = start
+        self._stop = stop
+        self._low = low
+        self._high = high
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __contains__(self, key: object) -> bool:
+        value = self._index._values.get(key)  # type: ignore[call-overload]
+        if value is None:
+            return False
+        return (self._low is None or value >= self._low) and (self._high is None or value <= self._high)
+
+    def __iter__(self) -> Iterator[str]:
+        entries = self._index._entries
+        for position in range(self._start, self._stop):
+            yield entries[position][1]
+
+
+class SortedIndex:
+    """
+    Отсортированный индекс пар (значение, ключ) для запросов по диапазону.
+    Ключи со значением None в индекс не попадают.
+    """
+    def __init__(self) -> None:
+        self._entries: List[Tuple[Any, str]] = []
+        self._values: Dict[str, Any] = {}
+
+    def add(self, value: Any, key: str) -> None:
+        """Вставляет пару (значение, ключ) с сохранением порядка."""
+        if value is None:
+            return
+        insort(self._entries, (value, key))
+        self._values[key] = value
+
+    def add_many(self, pairs: Iterable[Tuple[Any, str]]) -> None:
+        """Вставляет пакет пар (значение, ключ) с одной пересортировкой."""
+        fresh = [(value, key) for value, key in pairs if value is not None]
+        self._entries.extend(fresh)
+        self._entries.sort()
+        self._values.update((key, value) for value, key in fresh)
+
+    def remove(self, value: Any, key: str) -> None:
+        """Удаляет пару (значение, ключ), если она есть в индексе."""
+        if value is None:
+            return
+        position = bisect_left(self._entries, (value, key))
+        if position < len(self._entries) and self._entries[position] == (value, key):
+            del self._entries[position]
+            self._values.pop(key, None)
+
+    def at_least(self, low: Any) -> RangeView:
+        """Возвращает ключи, у которых значение не меньше low."""
+        return RangeView(self, bisect_left(self._entries, (low,)), len(self._entries), low)
+
+    def between(self, low: Any = None, high: Any = None) -> RangeView:
+        """Возвращает ключи со значением в диапазоне [low, high]; None - граница не задана."""
+        entries = self._entries
+        start = 0 if low is None else bisect_left(entries, (low,))
+        # Ключи - строки, поэтому пара (high, максимальный символ) не меньше любой пары со значением high.
+        stop = len(entries) if high is None else bisect_right(entries, (high, "\U0010ffff"), start)
+        return RangeView(self, start, stop, low, high)
+
+    def descending(self) -> Iterator[str]:
+        """Перебирает ключи от наибольшего значения к наименьшему."""
+        return (key for _, key in reversed(self._entries))
+
+    def copy(self) -> 'SortedIndex':
+        """Возвращает независимую копию индекса."""
+        clone = SortedIndex()
+        clone._entries = list(self._entries)
+        clone._values = dict(self._values)
+        return clone
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class NGramIndex:
+    """
+    Индекс n-грамм для поиска по подстроке.
+    Каждая n-грамма текста указывает на множество документов, где она встречается.
+    Текст должен быть уже приведен к единому регистру.
+    """
+    def __init__(self, n: int = 3) -> None:
+        if n < 1:
+            raise ValueError("Длина n-граммы должна быть положительной.")
+        self.n: int = n
+        self._postings = PostingMap()
+
+    def _grams(self, text: str) -> Set[str]:
+        """Возвращает множество n-грамм текста."""
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def add(self, text: str, doc: Hashable) -> None:
+        """Индексирует текст документа."""
+        for gram in self._grams(text):
+            self._postings.add(gram, doc)
+
+    def remove(self, text: str, doc: Hashable) -> None:
+        """Убирает документ из индекса; текст должен совпадать с проиндексированным."""
+        for gram in self._grams(text):
+            self._postings.discard(gram, doc)
+
+    def candidates(self, query: str) -> Optional[Set[Hashable]]:
+        """
+        Возвращает документы, содержащие все n-граммы запроса.
+        Это надмножество настоящих совпадений: подстроку все равно нужно проверить.
+        Для запросов короче n возвращает None - индекс ничего не может отсечь,
+        и вызывающий код должен перейти к полному перебору.
+        """
+        grams = self._grams(query)
+        if not grams:
+            return None
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(posting)
+        return result
+
+    def copy(self) -> 'NGramIndex':
+        """Возвращает независимую копию индекса (множества документов копируются при записи)."""
+        clone = NGramIndex(self.n)
+        clone._postings = self._postings.copy()
+        return clone
+
+
+class Bitmap:
+    """
+    Множество плотных целочисленных идентификаторов в одном из двух представлений.
+    Пока элементов мало, они хранятся отсортированным массивом array('I')
+    (4 байта на элемент, поиск - bisect), поэтому небольшая подборка в большом
+    каталоге занимает память по числу своих фильмов, а не по числу фильмов каталога.
+    Когда массив становится больше несжатой битовой карты до наибольшего
+    идентификатора (бит на идентификатор), множество переходит на нее и
+    возвращается к массиву, когда элементов снова становится мало.
+    Объединение, пересечение и разность двух массивов выполняются над множествами
+    Python, а с участием битовой карты - над целыми числами, в обоих случаях в C.
+    """
+    __slots__ = ("_ids", "_bits", "_count")
+
+    def __init__(self) -> None:
+        # Ровно одно из представлений не None.
+        self._ids: Optional[array] = array("I")
+        self._bits: Optional[bytearray] = None
+        self._count = 0
+
+    @classmethod
+    def from_int(cls, value: int) -> 'Bitmap':
+        bitmap = cls()
+        bitmap._bits = bytearray(value.to_bytes((value.bit_length() + 7) // 8, "little"))
+        bitmap._ids = None
+        bitmap._count = value.bit_count()
+        bitmap._rebalance()
+        return bitmap
+
+    @classmethod
+    def from_sorted(cls, positions: Iterable[int]) -> 'Bitmap':
+        """Строит множество из возрастающей последовательности без повторов."""
+        bitmap = cls()
+        bitmap._ids = array("I", positions)
+        bitmap._count = len(bitmap._ids)
+        bitmap._rebalance()
+        return bitmap
+
+    def to_int(self) -> int:
+        if self._bits is not None:
+            return int.from_bytes(self._bits, "little")
+        ids = self._ids
+        if not ids:
+            return 0
+        bits = bytearray(ids[-1] // 8 + 1)
+        for position in ids:
+            bits[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(bits, "little")
+
+    def _rebalance(self) -> None:
+        """Выбирает представление, которое занимает меньше памяти."""
+        if self._ids is not None:
+            ids = self._ids
+            if ids and len(ids) * 32 > ids[-1] + 1:
+                self._bits = bytearray(self.to_int().to_bytes(ids[-1] // 8 + 1, "little"))
+                self._ids = None
+        elif self._count * 64 < len(self._bits) * 8:
+            # Возврат к массиву с запасом в два раза, чтобы множество на границе
+            # не переключалось туда и обратно при каждом изменении.
+            self._ids = array("I", self._iter_bits())
+            self._bits = None
+
+    def add(self, position: int) -> bool:
+        """Добавляет идентификатор; возвращает True, если его не было."""
+        if self._ids is not None:
+            ids = self._ids
+            index = bisect_left(ids, position)
+            if index < len(ids) and ids[index] == position:
+                return False
+            ids.insert(index, position)
+            self._count += 1
+            if len(ids) * 32 > ids[-1] + 1:
+                self._rebalance()
+            return True
+        bits = self._bits
+        byte, mask = position >> 3, 1 << (position & 7)
+        if byte >= len(bits):
+            bits.extend(bytes(byte + 1 - len(bits)))
+        if bits[byte] & mask:
+            return False
+        bits[byte] |= mask
+        self._count += 1
+        self._rebalance()
+        return True
+
+    def discard(self, position: int) -> bool:
+        """Удаляет идентификатор; возвращает True, если он был."""
+        if self._ids is not None:
+            ids = self._ids
+            index = bisect_left(ids, position)
+            if index == len(ids) or ids[index] != position:
+                return False
+            del ids[index]
+            self._count -= 1
+            return True
+        bits = self._bits
+        byte, mask = position >> 3, 1 << (position & 7)
+        if byte >= len(bits) or not bits[byte] & mask:
+            return False
+        bits[byte] &= ~mask
+        self._count -= 1
+        self._rebalance()
+        return True
+
+    def __contains__(self, position: object) -> bool:
+        if not isinstance(position, int):
+            return False
+        if self._ids is not None:
+            ids = self._ids
+            index = bisect_left(ids, position)
+            return index < len(ids) and ids[index] == position
+        byte = position >> 3
+        return 0 <= byte < len(self._bits) and bool(self._bits[byte] & (1 << (position & 7)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        """Перебирает идентификаторы по возрастанию."""
+        if self._ids is not None:
+            return iter(self._ids)
+        return self._iter_bits()
+
+    def _iter_bits(self) -> Iterator[int]:
+        # Строка битов от младшего к старшему; поиск единиц идет в str.find, а не в цикле Python
+        bits = bin(self.to_int())[:1:-1]
+        position = bits.find("1")
+        while position != -1:
+            yield position
+            position = bits.find("1", position + 1)
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        if self._ids is not None and other._ids is not None:
+            return Bitmap.from_sorted(sorted(set(self._ids).union(other._ids)))
+        return Bitmap.from_int(self.to_int() | other.to_int())
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        if self._ids is not None and other._ids is not None:
+            return Bitmap.from_sorted(sorted(set(self._ids).intersection(other._ids)))
+        if self._ids is not None or other._ids is not None:
+            # Пересечение не больше меньшего из множеств: достаточно проверить его элементы.
+            sparse, dense = (self, other) if self._ids is not None else (other, self)
+            return Bitmap.from_sorted([position for position in sparse._ids if position in dense])
+        return Bitmap.from_int(self.to_int() & other.to_int())
+
+    def __sub__(self, other: 'Bitmap') -> 'Bitmap':
+        if self._ids is not None:
+            if other._ids is not None:
+                return Bitmap.from_sorted(sorted(set(self._ids).difference(other._ids)))
+            return Bitmap.from_sorted([position for position in self._ids if position not in other])
+        return Bitmap.from_int(self.to_int() & ~other.to_int())
+
+    def copy(self) -> 'Bitmap':
+        clone = Bitmap()
+        clone._ids = None if self._ids is None else array("I", self._ids)
+        clone._bits = None if self._bits is None else bytearray(self._bits)
+        clone._count = self._count
+        return clone
+
+
+class BitmapKeys:
+    """
+    Представление битовой карты как множества ключей фильмов.
+    Поддерживает len, in и перебор, поэтому участвует в пересечении
+    критериев поиска наравне с множествами ключей индексов.
+    """
+    def __init__(self, bitmap: Bitmap, ids: Dict[str, int], keys: List[Optional[str]]) -> None:
+        self._bitmap = bitmap
+        self._ids = ids
+        self._keys = keys
+
+    def __len__(self) -> int:
+        return len(self._bitmap)
+
+    def __contains__(self, key: object) -> bool:
+        movie_id = self._ids.get(key)  # type: ignore[call-overload]
+        return movie_id is not None and movie_id in self._bitmap
+
+    def __iter__(self) -> Iterator[str]:
+        keys = self._keys
+        for movie_id in self._bitmap:
+            yield keys[movie_id]  # type: ignore[misc]
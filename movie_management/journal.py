@@ -0,0 +1,182 @@
+"""
+Журнал изменений коллекции (write-ahead log).
+
+Каждая изменяющая операция записывается в конец файла компактной записью:
+заголовок (код операции, длина данных, CRC32 данных, CRC32 самого заголовка)
+и поля операции. Отдельная контрольная сумма заголовка позволяет отличить
+недописанную последнюю запись от испорченной длины в середине файла.
+Записи копятся в буфере и сбрасываются на диск группой - по достижении
+fsync_batch записей или через fsync_interval секунд после первой
+несброшенной записи, смотря что наступит раньше.
+"""
+import math
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .exceptions import JournalCorruptedError
+
+ADD_MOVIE = 1
+REMOVE_MOVIE = 2
+CREATE_COLLECTION = 3
+REMOVE_COLLECTION = 4
+ADD_TO_COLLECTION = 5
+REMOVE_FROM_COLLECTION = 6
+
+# Типы полей каждой операции: s - строка, i - целое, f - число или None
+SCHEMAS: Dict[int, str] = {
+    ADD_MOVIE: "ssisf",  # название, режиссер, год, жанр, рейтинг
+    REMOVE_MOVIE: "s",  # название
+    CREATE_COLLECTION: "s",  # имя подборки
+    REMOVE_COLLECTION: "s",  # имя подборки
+    ADD_TO_COLLECTION: "ss",  # название фильма, имя подборки
+    REMOVE_FROM_COLLECTION: "ss",  # название фильма, имя подборки
+}
+
+# код операции, длина данных, CRC32 данных; за ними - CRC32 этих трех полей
+RECORD_HEADER = struct.Struct("<BIII")
+_HEADER_FIELDS = struct.Struct("<BII")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+
+def encode_record(op: int, args: Tuple[Any, ...]) -> bytes:
+    """Кодирует операцию в запись журнала."""
+    payload = bytearray()
+    for kind, value in zip(SCHEMAS[op], args):
+        if kind == "s":
+            data = value.encode("utf-8")
+            payload += _U32.pack(len(data)) + data
+        elif kind == "i":
+            payload += _I64.pack(value)
+        else:
+            payload += _F64.pack(math.nan if value is None else value)
+    fields = _HEADER_FIELDS.pack(op, len(payload), zlib.crc32(payload))
+    return fields + _U32.pack(zlib.crc32(fields)) + payload
+
+
+def decode_payload(op: int, payload: bytes) -> Tuple[Any, ...]:
+    """Разбирает поля операции из данных записи."""
+    args: List[Any] = []
+    position = 0
+    for kind in SCHEMAS[op]:
+        if kind == "s":
+            (length,) = _U32.unpack_from(payload, position)
+            position += _U32.size
+            args.append(payload[position:position + length].decode("utf-8"))
+            position += length
+        elif kind == "i":
+            args.append(_I64.unpack_from(payload, position)[0])
+            position += _I64.size
+        else:
+            value = _F64.unpack_from(payload, position)[0]
+            args.append(None if math.isnan(value) else value)
+            position += _F64.size
+    return tuple(args)
+
+
+class Journal:
+    """
+    Журнал изменений в файле, открытом на дозапись.
+    fsync_batch - сколько записей копить до сброса на диск (1 - сбрасывать каждую);
+    fsync_interval - сколько секунд самое большее ждет несброшенная запись.
+    """
+    def __init__(self, path: str, fsync_batch: int = 64, fsync_interval: float = 0.05) -> None:
+        self.path = path
+        self._fsync_batch = max(fsync_batch, 1)
+        self._fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._buffer: List[bytes] = []
+        self._timer: Optional[threading.Timer] = None
+        self._file = open(path, "ab")
+        self._size: int = self._file.tell()
+
+    @property
+    def size(self) -> int:
+        """Размер журнала в байтах с учетом еще не сброшенных записей."""
+        return self._size
+
+    def append(self, op: int, *args: Any) -> None:
+        """Добавляет запись об операции."""
+        record = encode_record(op, args)
+        with self._lock:
+            self._buffer.append(record)
+            self._size += len(record)
+            if len(self._buffer) >= self._fsync_batch:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._fsync_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Записывает накопленные записи и дожидается fsync."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer or self._file.closed:
+            return
+        self._file.write(b"".join(self._buffer))
+        self._buffer.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def truncate(self) -> None:
+        """Очищает журнал - после того, как его содержимое попало в снимок."""
+        with self._lock:
+            self._flush_locked()
+            self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._size = 0
+
+    def close(self) -> None:
+        """Сбрасывает буфер и закрывает файл."""
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+
+def replay(path: str) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    """
+    Перебирает операции журнала по порядку.
+    Недописанная запись в конце файла (обрыв при сбое) считается концом
+    журнала и отрезается: это неполный заголовок, нулевой хвост или запись
+    с верным заголовком, данные которой не дописаны. Любое другое повреждение,
+    в том числе испорченный заголовок, означает, что журнал испорчен, и вызывает
+    JournalCorruptedError - без усечения файла.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as journal_file:
+        data = journal_file.read()
+    position = 0
+    while position + RECORD_HEADER.size <= len(data):
+        op, length, checksum, header_checksum = RECORD_HEADER.unpack_from(data, position)
+        start = position + RECORD_HEADER.size
+        if zlib.crc32(data[position:position + _HEADER_FIELDS.size]) != header_checksum:
+            # Файловая система может оставить после сбоя хвост из нулей.
+            if data.count(0, position) == len(data) - position:
+                break
+            raise JournalCorruptedError(f"Журнал '{path}' поврежден: заголовок записи (смещение {position}).")
+        if op not in SCHEMAS:
+            raise JournalCorruptedError(f"Журнал '{path}' поврежден: неизвестная операция (смещение {position}).")
+        payload = data[start:start + length]
+        if len(payload) < length:
+            break
+        if zlib.crc32(payload) != checksum:
+            if start + length < len(data):
+                raise JournalCorruptedError(f"Журнал '{path}' поврежден (смещение {position}).")
+            break
+        yield op, decode_payload(op, payload)
+        position = start + length
+    if position < len(data):
+        with open(path, "r+b") as journal_file:
+            journal_file.truncate(position)
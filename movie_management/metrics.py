@@ -0,0 +1,296 @@
+"""
+Необязательная инструментация MovieCollection.
+
+Instrumentation подменяет публичные методы конкретной коллекции обертками,
+записанными в атрибуты экземпляра; выключение удаляет эти атрибуты, и вызовы
+снова идут прямо в методы класса. Поэтому выключенная инструментация ничего
+не стоит. Специальные методы (__iter__, __len__) ищутся Python в классе
+и не инструментируются.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Публичные методы, которые оборачивает инструментация.
+INSTRUMENTED_METHODS = (
+    "add_movie", "add_movies", "remove_movie", "get_movie",
+    "create_named_collection", "remove_named_collection",
+    "add_movie_to_named_collection", "add_movies_to_named_collection",
+    "remove_movie_from_named_collection", "collections_containing",
+    "get_movies_in_named_collection", "union_named_collections",
+    "intersect_named_collections", "difference_named_collections",
+    "search_movies", "iter_search_movies", "search_movies_with_facets", "facets",
+    "query_movies", "fuzzy_search", "autocomplete",
+    "list_all_movies", "list_named_collections", "save_snapshot", "copy",
+)
+
+# Методы-генераторы: время, размер результата и число строк считаются
+# за время перебора результата, а не за создание генератора.
+ITERATOR_METHODS = ("iter_search_movies",)
+
+# Методы, у которых считаются просмотренные и подошедшие строки.
+SCANNING_METHODS = ("search_movies",) + ITERATOR_METHODS
+
+# Верхние границы корзин гистограммы задержек в секундах (последняя - бесконечность).
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(
+    scale * step for scale in (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0) for step in (1, 2, 5)
+) + (10.0, float("inf"))
+
+Tracer = Callable[[str], ContextManager[Any]]
+
+
+@dataclass(frozen=True)
+class CallRecord:
+    """Сведения об одном вызове, передаваемые в hook и журнал медленных запросов."""
+    method: str
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    seconds: float
+    result_size: Optional[int]
+    error: Optional[str]
+    rows_scanned: Optional[int] = None
+    rows_matched: Optional[int] = None
+
+
+@dataclass
+class MethodStats:
+    """Накопленные счетчики одного метода."""
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+    result_total: int = 0
+    result_max: int = 0
+    rows_scanned: int = 0
+    rows_matched: int = 0
+
+    def percentile(self, fraction: float) -> float:
+        """Приближенный перцентиль задержки - верхняя граница корзины, в которую он попадает."""
+        if not self.calls:
+            return 0.0
+        rank = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "p50_seconds": self.percentile(0.5),
+            "p90_seconds": self.percentile(0.9),
+            "p99_seconds": self.percentile(0.99),
+            "max_seconds": self.max_seconds,
+            "histogram": {str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.buckets) if count},
+            "result_size_total": self.result_total,
+            "result_size_max": self.result_max,
+            "rows_scanned": self.rows_scanned,
+            "rows_matched": self.rows_matched,
+        }
+
+
+class _ScanCounter:
+    """Счетчик просмотренных и подошедших строк текущего поиска."""
+    __slots__ = ("scanned", "matched")
+
+    def __init__(self) -> None:
+        self.scanned = 0
+        self.matched = 0
+
+
+def _result_size(result: Any) -> Optional[int]:
+    succeeded = getattr(result, "succeeded", None)
+    if succeeded is not None:
+        return len(succeeded) + len(result.failed)
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return None
+
+
+class Instrumentation:
+    """
+    Счетчики вызовов, гистограммы задержек, размеры результатов и журнал
+    медленных запросов для одной коллекции.
+    slow_query_threshold - порог в секундах, начиная с которого вызов попадает
+    в журнал медленных запросов (None - журнал не ведется);
+    tracer - фабрика контекстных менеджеров, в которые оборачивается каждый
+    вызов (например, tracer.start_as_current_span из OpenTelemetry);
+    hook - функция, получающая CallRecord после каждого вызова.
+    """
+    def __init__(self,
+                 slow_query_threshold: Optional[float] = None,
+                 slow_query_log_size: int = 100,
+                 tracer: Optional[Tracer] = None,
+                 hook: Optional[Callable[[CallRecord], None]] = None,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_queries: Deque[CallRecord] = deque(maxlen=slow_query_log_size)
+        self._tracer = tracer
+        self._hook = hook
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._methods: Dict[str, MethodStats] = {}
+        self._scan = threading.local()
+
+    def attach(self, collection: Any) -> None:
+        """Подменяет публичные методы коллекции инструментированными обертками."""
+        for name in INSTRUMENTED_METHODS:
+            setattr(collection, name, self._wrap(name, getattr(type(collection), name).__get__(collection)))
+        match = type(collection)._match.__get__(collection)
+        index_candidates = type(collection)._index_candidates.__get__(collection)
+        collection._match = lambda *args: self._count_match(collection, match, args)
+        collection._index_candidates = lambda *args: self._count_candidates(collection, index_candidates, args)
+
+    @staticmethod
+    def detach(collection: Any) -> None:
+        """Возвращает коллекции методы класса."""
+        for name in INSTRUMENTED_METHODS + ("_match", "_index_candidates"):
+            collection.__dict__.pop(name, None)
+
+    def _wrap(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        if name in ITERATOR_METHODS:
+            def instrumented(*args: Any, **kwargs: Any) -> Any:
+                return self._iterate(name, method, args, kwargs)
+            instrumented.__name__ = name
+            instrumented.__doc__ = method.__doc__
+            return instrumented
+
+        def instrumented(*args: Any, **kwargs: Any) -> Any:
+            scan = None
+            if name in SCANNING_METHODS:
+                scan = self._scan.counter = _ScanCounter()
+            error = None
+            result = None
+            started = self._clock()
+            try:
+                with self._tracer(name) if self._tracer is not None else nullcontext():
+                    result = method(*args, **kwargs)
+                return result
+            except Exception as exception:
+                error = f"{type(exception).__name__}: {exception}"
+                raise
+            finally:
+                if scan is not None:
+                    self._scan.counter = None
+                self._record(CallRecord(
+                    name, args, kwargs, self._clock() - started, _result_size(result), error,
+                    None if scan is None else scan.scanned,
+                    None if scan is None else scan.matched,
+                ))
+        instrumented.__name__ = name
+        instrumented.__doc__ = method.__doc__
+        return instrumented
+
+    def _iterate(self, name: str, method: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Перебирает результат метода-генератора, считая время только внутри
+        шагов генератора (без времени потребителя), число выданных элементов
+        и строки, просмотренные поиском. Запись о вызове делается, когда
+        перебор закончен или генератор закрыт. Трассировщик оборачивает
+        первый шаг - в нем выполняется сам поиск.
+        """
+        scan = _ScanCounter()
+        error = None
+        produced = 0
+        seconds = 0.0
+        iterator = method(*args, **kwargs)
+        try:
+            while True:
+                self._scan.counter = scan
+                started = self._clock()
+                try:
+                    if produced == 0 and self._tracer is not None:
+                        with self._tracer(name):
+                            item = next(iterator)
+                    else:
+                        item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    self._scan.counter = None
+                    seconds += self._clock() - started
+                produced += 1
+                yield item
+        except Exception as exception:
+            error = f"{type(exception).__name__}: {exception}"
+            raise
+        finally:
+            self._record(CallRecord(name, args, kwargs, seconds, produced, error, scan.scanned, scan.matched))
+
+    def _counter(self) -> Optional[_ScanCounter]:
+        return getattr(self._scan, "counter", None)
+
+    def _count_candidates(self, collection: Any, index_candidates: Callable[..., Any], args: tuple) -> Any:
+        candidates = index_candidates(*args)
+        counter = self._counter()
+        if counter is not None:
+            counter.scanned = len(collection) if candidates is None else len(candidates)
+        return candidates
+
+    def _count_match(self, collection: Any, match: Callable[..., Any], args: tuple) -> Any:
+        counter = self._counter()
+        if counter is None:
+            return match(*args)
+        counter.scanned = len(collection)
+        keys, accept = match(*args)
+        if accept is not None:
+            # Совпадения проверяются лениво по ходу обхода - считаются по мере проверки.
+            counter.scanned = 0
+
+            def counting(key: str) -> bool:
+                counter.scanned += 1
+                passed = accept(key)
+                counter.matched += passed
+                return passed
+            return keys, counting
+        counter.matched = len(collection) if keys is None else len(keys)
+        return keys, accept
+
+    def _record(self, record: CallRecord) -> None:
+        with self._lock:
+            stats = self._methods.get(record.method)
+            if stats is None:
+                stats = self._methods[record.method] = MethodStats()
+            stats.calls += 1
+            stats.errors += record.error is not None
+            stats.total_seconds += record.seconds
+            stats.max_seconds = max(stats.max_seconds, record.seconds)
+            stats.buckets[bisect_left(LATENCY_BUCKETS, record.seconds)] += 1
+            if record.result_size is not None:
+                stats.result_total += record.result_size
+                stats.result_max = max(stats.result_max, record.result_size)
+            if record.rows_scanned is not None:
+                stats.rows_scanned += record.rows_scanned
+                stats.rows_matched += record.rows_matched or 0
+            if self.slow_query_threshold is not None and record.seconds >= self.slow_query_threshold:
+                self.slow_queries.append(record)
+        if self._hook is not None:
+            self._hook(record)
+
+    def stats(self) -> Dict[str, Any]:
+        """Снимок счетчиков в виде словаря, пригодного для JSON."""
+        with self._lock:
+            return {
+                "methods": {name: stats.as_dict() for name, stats in sorted(self._methods.items())},
+                "slow_queries": [
+                    {"method": record.method, "args": repr(record.args), "kwargs": repr(record.kwargs),
+                     "seconds": record.seconds, "result_size": record.result_size, "error": record.error}
+                    for record in self.slow_queries
+                ],
+            }
+
+    def reset(self) -> None:
+        """Обнуляет счетчики и журнал медленных запросов."""
+        with self._lock:
+            self._methods.clear()
+            self.slow_queries.clear()
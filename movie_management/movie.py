@@ -1,19 +1,67 @@
+import math
+import numbers
 from typing import Optional
 
+
+def normalize_title(title: str) -> str:
+    """Приводит название фильма к ключу коллекции: без крайних пробелов и в нижнем регистре."""
+    return title.strip().lower()
+
+
+def check_movie_fields(title: object, director: object, year: object, genre: object, rating: object) -> None:
+    """
+    Проверяет типы полей фильма: коллекция раскладывает их по индексам и
+    счетчикам, и значение не того типа сломало бы добавление на полпути.
+    Год - любое целое (numbers.Integral), рейтинг - любое вещественное число
+    (numbers.Real), кроме bool. Неверный тип поднимается как TypeError,
+    бесконечный или NaN рейтинг - как ValueError.
+    """
+    for name, value in (("Название", title), ("Режиссер", director), ("Жанр", genre)):
+        if not isinstance(value, str):
+            raise TypeError(f"{name} фильма должен быть строкой.")
+    if isinstance(year, bool) or not isinstance(year, numbers.Integral):
+        raise TypeError("Год выпуска должен быть целым числом.")
+    if rating is not None:
+        if isinstance(rating, bool) or not isinstance(rating, numbers.Real):
+            raise TypeError("Рейтинг должен быть числом.")
+        if not math.isfinite(rating):
+            raise ValueError("Рейтинг должен быть конечным числом.")
+
+
 class Movie:
     """
     Класс для представления одного фильма.
     Содержит информацию о названии, режиссере, годе выпуска, жанре и рейтинге.
+    Атрибуты хранятся в __slots__, а нормализованный ключ названия и его хеш
+    вычисляются один раз - при создании фильма или смене названия.
     """
+    __slots__ = ("_title", "_key", "_hash", "director", "year", "genre", "rating")
+
     def __init__(self, title: str, director: str, year: int, genre: str, rating: Optional[float] = None):
-        if not title: 
+        if not title:
             raise ValueError("Название фильма не может быть пустым.")
-        self.title: str = title
+        self.title = title
         self.director: str = director
         self.year: int = year
         self.genre: str = genre
         self.rating: Optional[float] = rating
 
+    @property
+    def title(self) -> str:
+        """Название фильма в исходном виде."""
+        return self._title
+
+    @title.setter
+    def title(self, value: str) -> None:
+        self._title: str = value
+        self._key: str = normalize_title(value)
+        self._hash: int = hash(self._key)
+
+    @property
+    def key(self) -> str:
+        """Нормализованное название, под которым фильм хранится в коллекции."""
+        return self._key
+
     def __str__(self) -> str:
         """Возвращает строковое представление фильма для пользователя."""
         rating_str = f", Рейтинг: {self.rating}" if self.rating is not None else ""
@@ -27,15 +75,23 @@ class Movie:
     def __eq__(self, other: object) -> bool:
         """
         Сравнивает два фильма. Фильмы считаются равными, если их названия совпадают
-        (без учета регистра). Это полезно, чтобы не добавлять "один и тот же" фильм
-        с разным регистром в названии как два разных.
+        (без учета регистра и крайних пробелов). Это полезно, чтобы не добавлять
+        "один и тот же" фильм с разным регистром в названии как два разных.
         """
         if not isinstance(other, Movie):
             return NotImplemented # Не сравниваем с объектами других типов
-        return self.title.lower() == other.title.lower()
+        return self._key == other._key
 
     def __hash__(self) -> int:
         """
-        Возвращает хеш фильма, основанный на названии.
+        Возвращает хеш фильма, основанный на нормализованном названии.
+        """
+        return self._hash
+
+    def __reduce__(self) -> tuple:
+        """
+        Сериализует фильм через его поля, а не через __slots__: хеш строк
+        зависит от PYTHONHASHSEED процесса, поэтому сохраненный _hash в другом
+        процессе был бы неверным. При загрузке ключ и хеш вычисляются заново.
         """
-        return hash(self.title.lower())
\ No newline at end of file
+        return (type(self), (self.title, self.director, self.year, self.genre, self.rating))
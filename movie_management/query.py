@@ -0,0 +1,358 @@
+"""
+Составные запросы к MovieCollection.
+
+Запрос собирается из условий contains, between и in_collection операторами
+& (И), | (ИЛИ) и ~ (НЕ):
+
+    query = (between("year", 1990, 1999)
+             & (contains("genre", "драма") | contains("genre", "комедия"))
+             & ~contains("director", "нолан")
+             & between("rating", high=8.0))
+
+MovieCollection.compile_query превращает запрос в CompiledQuery: условия
+каждого И упорядочиваются по оценке числа подходящих фильмов, самое
+избирательное условие с индексом дает кандидатов, а остальные проверяются
+у каждого кандидата по порядку до первого непрошедшего.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AbstractSet, Callable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .collection import MovieCollection
+    from .movie import Movie
+
+TEXT_FIELDS = ("title", "director", "genre")
+RANGE_FIELDS = ("year", "rating")
+
+Predicate = Callable[[str], bool]
+
+
+class Query(ABC):
+    """Базовый класс условий запроса; поддерживает &, | и ~."""
+
+    def __and__(self, other: 'Query') -> 'Query':
+        return And(_flatten(And, (self, other)))
+
+    def __or__(self, other: 'Query') -> 'Query':
+        return Or(_flatten(Or, (self, other)))
+
+    def __invert__(self) -> 'Query':
+        return Not(self)
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Возвращает условие в читаемом виде (для explain)."""
+
+    @abstractmethod
+    def matches(self, movie: 'Movie', collections: AbstractSet[str]) -> bool:
+        """Проверяет один фильм; collections - имена подборок, в которых он состоит."""
+
+
+def _flatten(kind: type, clauses: Tuple[Query, ...]) -> Tuple[Query, ...]:
+    """Раскрывает вложенные операторы того же вида: (a & b) & c -> И(a, b, c)."""
+    flat: List[Query] = []
+    for clause in clauses:
+        if isinstance(clause, kind):
+            flat.extend(clause.clauses)  # type: ignore[attr-defined]
+        else:
+            flat.append(clause)
+    return tuple(flat)
+
+
+@dataclass(frozen=True)
+class Contains(Query):
+    """Поле title, director или genre содержит подстроку (без учета регистра)."""
+    field: str
+    needle: str
+
+    def __post_init__(self) -> None:
+        if self.field not in TEXT_FIELDS:
+            raise ValueError(f"Поле '{self.field}' не поддерживает поиск подстроки.")
+
+    def describe(self) -> str:
+        return f"{self.field} содержит '{self.needle}'"
+
+    def matches(self, movie: 'Movie', collections: AbstractSet[str]) -> bool:
+        return self.needle.casefold() in getattr(movie, self.field).casefold()
+
+
+@dataclass(frozen=True)
+class Between(Query):
+    """Значение поля year или rating в диапазоне [low, high]; None - граница не задана."""
+    field: str
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        if self.field not in RANGE_FIELDS:
+            raise ValueError(f"Поле '{self.field}' не поддерживает диапазоны.")
+
+    def describe(self) -> str:
+        if self.low is not None and self.low == self.high:
+            return f"{self.field} = {self.low}"
+        low = "-inf" if self.low is None else self.low
+        high = "+inf" if self.high is None else self.high
+        return f"{self.field} в [{low}, {high}]"
+
+    def matches(self, movie: 'Movie', collections: AbstractSet[str]) -> bool:
+        value = getattr(movie, self.field)
+        if value is None:
+            return False
+        return (self.low is None or value >= self.low) and (self.high is None or value <= self.high)
+
+
+@dataclass(frozen=True)
+class InCollection(Query):
+    """Фильм состоит в именованной подборке."""
+    name: str
+
+    def describe(self) -> str:
+        return f"в подборке '{self.name}'"
+
+    def matches(self, movie: 'Movie', collections: AbstractSet[str]) -> bool:
+        return self.name in collections
+
+
+@dataclass(frozen=True)
+class And(Query):
+    clauses: Tuple[Query, ...]
+
+    def describe(self) -> str:
+        return "И"
+
+    def matches(self, movie: 'Movie', collections: AbstractSet[str]) -> bool:
+        return all(clause.matches(movie, collections) for clause in self.clauses)
+
+
+@dataclass(frozen=True)
+class Or(Query):
+    clauses: Tuple[Query, ...]
+
+    def describe(self) -> str:
+        return "ИЛИ"
+
+    def matches(self, movie: 'Movie', collections: AbstractSet[str]) -> bool:
+        return any(clause.matches(movie, collections) for clause in self.clauses)
+
+
+@dataclass(frozen=True)
+class Not(Query):
+    clause: Query
+
+    def describe(self) -> str:
+        return "НЕ"
+
+    def matches(self, movie: 'Movie', collections: AbstractSet[str]) -> bool:
+        return not self.clause.matches(movie, collections)
+
+
+def contains(field: str, needle: str) -> Contains:
+    """Условие "поле содержит подстроку"; пустая подстрока подходит любому фильму."""
+    return Contains(field, needle)
+
+
+def between(field: str, low: Optional[float] = None, high: Optional[float] = None) -> Between:
+    """Условие "значение поля в диапазоне [low, high]"; фильмы без рейтинга не подходят."""
+    return Between(field, low, high)
+
+
+def in_collection(name: str) -> InCollection:
+    """Условие "фильм состоит в подборке"."""
+    return InCollection(name)
+
+
+@dataclass(frozen=True)
+class ClauseReport:
+    """
+    Строка плана: условие, глубина вложенности, оценка числа подходящих фильмов,
+    сколько фильмов условие проверило и сколько из них отсеяло.
+    by_index - условие дало кандидатов из индекса и отсеяло остальные фильмы без проверки.
+    """
+    clause: str
+    depth: int
+    estimate: int
+    evaluated: int
+    eliminated: int
+    by_index: bool = False
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Результат explain(): условия в порядке вычисления и число найденных фильмов."""
+    total: int
+    matched: int
+    clauses: List[ClauseReport]
+
+    def __str__(self) -> str:
+        lines = [f"Фильмов: {self.total}, найдено: {self.matched}"]
+        for report in self.clauses:
+            access = "индекс" if report.by_index else "проверка"
+            lines.append(f"{'  ' * report.depth}[{access}] {report.clause}: оценка {report.estimate}, "
+                         f"проверено {report.evaluated}, отсеяно {report.eliminated}")
+        return "\n".join(lines)
+
+
+@dataclass(eq=False)
+class _Node:
+    """Узел плана: условие, его оценка и счетчики explain()."""
+    query: Query
+    estimate: int
+    # False - оценки нет (условие без индекса), estimate равна размеру коллекции.
+    known: bool = True
+    children: List['_Node'] = field(default_factory=list)
+    # Списки ключей из индекса для листового условия (None - индекса нет)
+    # и признак того, что они совпадают с условием точно, а не с запасом.
+    postings: Optional[List[AbstractSet[str]]] = None
+    exact: bool = True
+    evaluated: int = 0
+    eliminated: int = 0
+
+
+def _plan(collection: 'MovieCollection', query: Query, total: int) -> _Node:
+    """Строит план: оценивает условия и упорядочивает их внутри И и ИЛИ."""
+    if isinstance(query, And):
+        children = sorted((_plan(collection, clause, total) for clause in query.clauses),
+                          key=lambda node: node.estimate)
+        known = [node.estimate for node in children if node.known]
+        return _Node(query, min(known, default=total), bool(known), children)
+    if isinstance(query, Or):
+        # Внутри ИЛИ первыми проверяются условия, которым подходит больше фильмов.
+        children = sorted((_plan(collection, clause, total) for clause in query.clauses),
+                          key=lambda node: node.estimate, reverse=True)
+        known = all(node.known for node in children)
+        estimate = min(total, sum(node.estimate for node in children)) if known else total
+        return _Node(query, estimate, known, children)
+    if isinstance(query, Not):
+        child = _plan(collection, query.clause, total)
+        estimate = max(0, total - child.estimate) if child.known else total
+        return _Node(query, estimate, child.known, [child])
+    postings = collection._leaf_postings(query)
+    if postings is None:
+        return _Node(query, total, known=False, exact=False)
+    estimate = sum(len(posting) for posting in postings)
+    return _Node(query, estimate, postings=postings, exact=not isinstance(query, Contains) or query.field != "title")
+
+
+def _candidates(node: _Node) -> Optional[AbstractSet[str]]:
+    """Кандидаты узла из индексов (надмножество совпадений) или None, если индекс не помогает."""
+    if node.postings is not None:
+        if len(node.postings) == 1:
+            return node.postings[0]
+        keys = set()
+        for posting in node.postings:
+            keys.update(posting)
+        return keys
+    if isinstance(node.query, Or) and node.children:
+        parts = [_candidates(child) for child in node.children]
+        if any(part is None for part in parts):
+            return None
+        union = set()
+        for part in parts:
+            union.update(part)  # type: ignore[arg-type]
+        return union
+    return None
+
+
+def _is_exact(node: _Node) -> bool:
+    """True, если кандидаты узла из индексов совпадают с условием и его можно не проверять."""
+    if isinstance(node.query, Or):
+        return all(child.postings is not None and _is_exact(child) for child in node.children)
+    return node.postings is not None and node.exact
+
+
+def _predicate(collection: 'MovieCollection', node: _Node, counting: bool) -> Predicate:
+    """Собирает предикат узла; И прекращает проверку на первом непрошедшем условии, ИЛИ - на первом прошедшем."""
+    if isinstance(node.query, (And, Or)):
+        checks = [_predicate(collection, child, counting) for child in node.children]
+        if isinstance(node.query, And):
+            check: Predicate = lambda key: all(part(key) for part in checks)
+        else:
+            check = lambda key: any(part(key) for part in checks)
+    elif isinstance(node.query, Not):
+        inner = _predicate(collection, node.children[0], counting)
+        check = lambda key: not inner(key)
+    else:
+        check = collection._leaf_predicate(node.query)
+    if not counting:
+        return check
+
+    def counted(key: str) -> bool:
+        node.evaluated += 1
+        passed = check(key)
+        node.eliminated += not passed
+        return passed
+    return counted
+
+
+def _reports(node: _Node, depth: int, output: List[ClauseReport]) -> None:
+    output.append(ClauseReport(node.query.describe(), depth, node.estimate, node.evaluated, node.eliminated))
+    for child in node.children:
+        _reports(child, depth + 1, output)
+
+
+class CompiledQuery:
+    """
+    Запрос, подготовленный для конкретной коллекции.
+    При изменении коллекции план перестраивается перед следующим выполнением.
+    """
+    def __init__(self, collection: 'MovieCollection', query: Query) -> None:
+        self.query = query
+        self._collection = collection
+        self._generation: Optional[int] = None
+        self._driver: Optional[_Node] = None
+        self._residual: List[_Node] = []
+        self._compile()
+
+    def _compile(self) -> None:
+        collection = self._collection
+        if self._generation == collection._generation:
+            return
+        root = _plan(collection, self.query, len(collection))
+        children = root.children if isinstance(root.query, And) else [root]
+        # Кандидатов дает первое (самое избирательное) условие с индексом;
+        # остальные условия проверяются у каждого кандидата.
+        driver = next((child for child in children if _candidates(child) is not None), None)
+        self._driver = driver
+        self._residual = [child for child in children if child is not driver or not _is_exact(child)]
+        self._generation = collection._generation
+
+    def _match(self, counting: bool) -> Tuple[Optional[AbstractSet[str]], Optional[Predicate]]:
+        keys = None if self._driver is None else _candidates(self._driver)
+        checks = [_predicate(self._collection, node, counting) for node in self._residual]
+        if not checks:
+            return keys, None
+        if len(checks) == 1:
+            return keys, checks[0]
+        return keys, lambda key: all(check(key) for check in checks)
+
+    def run(self, order_by: str = "title", offset: int = 0, limit: Optional[int] = None) -> List['Movie']:
+        """Возвращает подходящие фильмы; порядок и страница - как в search_movies."""
+        collection = self._collection
+        collection._ensure_loaded()
+        self._compile()
+        keys, accept = self._match(counting=False)
+        return [collection._movies[key] for key in collection._page_keys(keys, accept, order_by, offset, limit)]
+
+    def explain(self) -> QueryPlan:
+        """
+        Выполняет запрос целиком и возвращает план: условия в порядке
+        вычисления, их оценки и сколько фильмов каждое проверило и отсеяло.
+        """
+        collection = self._collection
+        collection._ensure_loaded()
+        # План строится заново, чтобы счетчики относились только к этому выполнению.
+        self._generation = None
+        self._compile()
+        total = len(collection)
+        keys, accept = self._match(counting=True)
+        matched = sum(1 for _ in collection._pool(keys, accept))
+
+        reports: List[ClauseReport] = []
+        if self._driver is not None:
+            candidates = len(keys)  # type: ignore[arg-type]
+            reports.append(ClauseReport(self._driver.query.describe(), 0, self._driver.estimate,
+                                        total, total - candidates, by_index=True))
+        for node in self._residual:
+            _reports(node, 0, reports)
+        return QueryPlan(total, matched, reports)
@@ -0,0 +1,489 @@
+"""
+Коллекция фильмов, разделенная на сегменты по хешу ключа, с поиском в нескольких процессах.
+
+Родительский процесс хранит сегменты как обычные MovieCollection и выполняет
+все изменения, точечные чтения и операции с подборками. Закрепленный за
+сегментом рабочий процесс держит собственную загруженную копию сегмента.
+Небольшие изменения передаются ему вместе со следующим запросом поиска как
+список операций (добавление и удаление фильмов), и процесс применяет их к своей
+копии: стоимость синхронизации пропорциональна числу изменений, а не размеру
+сегмента. Только если операций накопилось больше доли delta_share от размера
+сегмента (например, после первоначальной загрузки), сегмент сохраняется в файл
+снимка, а процесс заново открывает его через mmap (open_snapshot): это O(размер
+сегмента) в запросе поиска, который первым увидит такое изменение.
+Сегменты возвращают свои первые offset + limit совпадений уже упорядоченными,
+и родитель сливает их k-путевым слиянием (heapq.merge).
+
+Поиск внутри подборки (in_collection), facets, fuzzy_search и autocomplete
+выполняются в родительском процессе: первый перебирает только фильмы
+подборки, остальные опрашивают сегменты по очереди и объединяют ответы.
+Составные запросы (query_movies, compile_query) и iter_search_movies не
+поддерживаются: их условия на подборки пришлось бы проверять в сегментах,
+а подборки есть только у родителя.
+"""
+import heapq
+import os
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import AbstractSet, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .collection import BulkResult, EventSink, MovieCollection, _silent, movie_sort_key
+from .facets import FacetCounter, Facets
+from .fuzzy import levenshtein
+from .movie import Movie, normalize_title
+from .query import Query, between, contains
+from .exceptions import (
+    MovieNotFoundError,
+    CollectionNotFoundError,
+    CollectionAlreadyExistsError
+)
+
+# Сегменты, открытые в рабочем процессе: путь снимка -> (версия, коллекция).
+_worker_shards: Dict[str, Tuple[int, MovieCollection]] = {}
+
+# Операции над сегментом, которые передаются рабочему процессу.
+ADD_MOVIE = "add"
+REMOVE_MOVIE = "remove"
+
+Operation = Tuple[str, Union[Movie, str]]
+
+
+def _search_shard(path: str,
+                  version: int,
+                  ngram_size: Optional[int],
+                  operations: List[Operation],
+                  criteria: tuple,
+                  order_by: str,
+                  limit: Optional[int]) -> List[Movie]:
+    """
+    Выполняется в рабочем процессе: при необходимости переоткрывает снимок
+    сегмента, применяет к своей копии изменения, сделанные после последней
+    синхронизации, и ищет в ней.
+    """
+    entry = _worker_shards.get(path)
+    if entry is None or entry[0] != version:
+        entry = (version, MovieCollection.open_snapshot(path, ngram_size=ngram_size))
+        _worker_shards[path] = entry
+    shard = entry[1]
+    for operation, argument in operations:
+        if operation == ADD_MOVIE:
+            shard.add_movie(argument)  # type: ignore[arg-type]
+        else:
+            shard.remove_movie(argument)  # type: ignore[arg-type]
+    return list(shard.search_movies(*criteria, order_by=order_by, limit=limit))
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Номер сегмента для ключа фильма; не зависит от случайного хеширования строк в процессе."""
+    return zlib.crc32(key.encode("utf-8")) % shards
+
+
+class ShardedMovieCollection:
+    """
+    Коллекция фильмов с интерфейсом MovieCollection, разделенная на shards сегментов.
+    Каждому сегменту принадлежит отдельный рабочий процесс; поиск выполняется
+    во всех сегментах параллельно. Именованные подборки хранятся в родительском
+    процессе и могут содержать фильмы из разных сегментов.
+    После работы коллекцию нужно закрыть (close или with).
+    """
+    def __init__(self,
+                 shards: Optional[int] = None,
+                 ngram_size: Optional[int] = None,
+                 event_sink: Optional[EventSink] = None,
+                 directory: Optional[str] = None,
+                 delta_share: float = 0.25) -> None:
+        """
+        shards - число сегментов и рабочих процессов (по умолчанию - число ядер);
+        directory - каталог для файлов снимков сегментов (по умолчанию временный);
+        delta_share - до какой доли от размера сегмента изменения передаются
+        рабочему процессу списком операций, а не новым снимком.
+        """
+        if delta_share < 0:
+            raise ValueError("delta_share не может быть отрицательным.")
+        self._delta_share = delta_share
+        self._event_sink: EventSink = event_sink if event_sink is not None else _silent
+        self._ngram_size = ngram_size
+        count = shards or os.cpu_count() or 1
+        self._shards = [MovieCollection(ngram_size=ngram_size, event_sink=event_sink) for _ in range(count)]
+        self._owns_directory = directory is None
+        self._directory = tempfile.mkdtemp(prefix="movie-shards-") if directory is None else directory
+        self._paths = [os.path.join(self._directory, f"shard-{number}.snap") for number in range(count)]
+        # Версия последнего снимка сегмента; рабочий процесс переоткрывает
+        # снимок, когда версия меняется. Устаревший сегмент (еще без снимка
+        # или после сбоя рабочего процесса) перед поиском сохраняется заново.
+        self._saved_versions = [0] * count
+        self._stale = [True] * count
+        # Операции над сегментом, которые рабочий процесс еще не получил.
+        self._pending: List[List[Operation]] = [[] for _ in range(count)]
+        self._pools = [ProcessPoolExecutor(max_workers=1) for _ in range(count)]
+
+        self._named_collections: Dict[str, Set[str]] = {}
+        self._memberships: Dict[str, Set[str]] = {}
+
+    def close(self) -> None:
+        """Останавливает рабочие процессы и удаляет временные файлы сегментов."""
+        for pool in self._pools:
+            pool.shutdown()
+        if self._owns_directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+    def __enter__(self) -> 'ShardedMovieCollection':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _shard(self, key: str) -> MovieCollection:
+        return self._shards[shard_of(key, len(self._shards))]
+
+    def _record(self, key: str, operation: str, argument: Union[Movie, str]) -> None:
+        self._pending[shard_of(key, len(self._shards))].append((operation, argument))
+
+    def add_movie(self, movie: Movie) -> None:
+        """Добавляет фильм в его сегмент."""
+        self._shard(movie.key).add_movie(movie)
+        self._record(movie.key, ADD_MOVIE, movie)
+
+    def add_movies(self, movies: Iterable[Movie]) -> BulkResult:
+        """
+        Добавляет пакет фильмов, раскладывая его по сегментам.
+        Повторы внутри пакета попадают в один сегмент и отклоняются им самим.
+        """
+        batches: List[List[Movie]] = [[] for _ in self._shards]
+        for movie in movies:
+            batches[shard_of(movie.key, len(self._shards))].append(movie)
+        result = BulkResult()
+        for number, batch in enumerate(batches):
+            if not batch:
+                continue
+            shard_result = self._shards[number].add_movies(batch)
+            result.succeeded.extend(shard_result.succeeded)
+            result.failed.extend(shard_result.failed)
+            # Повтор внутри пакета имеет тот же ключ, что и принятый фильм,
+            # поэтому принятым считается первый фильм с каждым ключом.
+            accepted = {normalize_title(title) for title in shard_result.succeeded}
+            for movie in batch:
+                if movie.key in accepted:
+                    accepted.discard(movie.key)
+                    self._pending[number].append((ADD_MOVIE, movie))
+        return result
+
+    def remove_movie(self, title: str) -> None:
+        """Удаляет фильм из его сегмента и из всех подборок."""
+        key = normalize_title(title)
+        self._shard(key).remove_movie(title)
+        self._record(key, REMOVE_MOVIE, key)
+        for collection_name in self._memberships.pop(key, ()):
+            self._named_collections[collection_name].discard(key)
+
+    def get_movie(self, title: str) -> Movie:
+        """Находит и возвращает фильм по его названию."""
+        return self._shard(normalize_title(title)).get_movie(title)
+
+    def _has(self, key: str) -> bool:
+        try:
+            self._shard(key).get_movie(key)
+        except MovieNotFoundError:
+            return False
+        return True
+
+    def create_named_collection(self, name: str) -> None:
+        """Создает новую пустую именованную подборку."""
+        if name in self._named_collections:
+            raise CollectionAlreadyExistsError(f"Подборка '{name}' уже существует.")
+        self._named_collections[name] = set()
+        self._event_sink(f"Подборка '{name}' создана.")
+
+    def remove_named_collection(self, name: str) -> None:
+        """Удаляет именованную подборку целиком."""
+        if name not in self._named_collections:
+            raise CollectionNotFoundError(f"Подборка '{name}' не найдена.")
+        for key in self._named_collections.pop(name):
+            self._forget_membership(key, name)
+        self._event_sink(f"Подборка '{name}' удалена.")
+
+    def add_movie_to_named_collection(self, movie_title: str, collection_name: str) -> None:
+        """Добавляет существующий фильм в указанную именованную подборку."""
+        key = normalize_title(movie_title)
+        if not self._has(key):
+            raise MovieNotFoundError(f"Фильм '{movie_title}' не найден в основной коллекции.")
+        if collection_name not in self._named_collections:
+            raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
+        self._named_collections[collection_name].add(key)
+        self._memberships.setdefault(key, set()).add(collection_name)
+        self._event_sink(f"Фильм '{self.get_movie(key).title}' добавлен в подборку '{collection_name}'.")
+
+    def add_movies_to_named_collection(self, movie_titles: Iterable[str], collection_name: str) -> BulkResult:
+        """Добавляет пакет фильмов в именованную подборку (см. MovieCollection)."""
+        if collection_name not in self._named_collections:
+            raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
+        result = BulkResult()
+        members = self._named_collections[collection_name]
+        for movie_title in movie_titles:
+            key = normalize_title(movie_title)
+            if not self._has(key):
+                error = MovieNotFoundError(f"Фильм '{movie_title}' не найден в основной коллекции.")
+                result.failed.append((movie_title, error))
+                continue
+            members.add(key)
+            self._memberships.setdefault(key, set()).add(collection_name)
+            result.succeeded.append(self.get_movie(key).title)
+        self._event_sink(f"В подборку '{collection_name}' добавлено фильмов: {len(result.succeeded)}, "
+                         f"отклонено: {len(result.failed)}.")
+        return result
+
+    def remove_movie_from_named_collection(self, movie_title: str, collection_name: str) -> None:
+        """Удаляет фильм из указанной именованной подборки (но не из основной коллекции)."""
+        key = normalize_title(movie_title)
+        if collection_name not in self._named_collections:
+            raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
+        if key not in self._named_collections[collection_name]:
+            self._event_sink(f"Фильма '{movie_title}' нет в подборке '{collection_name}'.")
+            return
+        self._named_collections[collection_name].remove(key)
+        self._forget_membership(key, collection_name)
+        self._event_sink(f"Фильм '{self.get_movie(key).title}' удален из подборки '{collection_name}'.")
+
+    def _forget_membership(self, key: str, collection_name: str) -> None:
+        names = self._memberships.get(key)
+        if names is None:
+            return
+        names.discard(collection_name)
+        if not names:
+            del self._memberships[key]
+
+    def collections_containing(self, title: str) -> List[str]:
+        """Возвращает отсортированный список подборок, в которых состоит фильм."""
+        key = normalize_title(title)
+        if not self._has(key):
+            raise MovieNotFoundError(f"Фильм '{title}' не найден.")
+        return sorted(self._memberships.get(key, ()))
+
+    def get_movies_in_named_collection(self,
+                                       collection_name: str,
+                                       order_by: str = "title",
+                                       offset: int = 0,
+                                       limit: Optional[int] = None) -> List[Movie]:
+        """Возвращает фильмы подборки; порядок и страницы - как в search_movies."""
+        if collection_name not in self._named_collections:
+            raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
+        movies = (self._shard(key).get_movie(key) for key in self._named_collections[collection_name])
+        return _page(movies, order_by, offset, limit)
+
+    def union_named_collections(self,
+                                collection_names: Iterable[str],
+                                order_by: str = "title",
+                                offset: int = 0,
+                                limit: Optional[int] = None) -> List[Movie]:
+        """Возвращает фильмы, входящие хотя бы в одну из подборок."""
+        return self._combine_named_collections(collection_names, set.union, order_by, offset, limit)
+
+    def intersect_named_collections(self,
+                                    collection_names: Iterable[str],
+                                    order_by: str = "title",
+                                    offset: int = 0,
+                                    limit: Optional[int] = None) -> List[Movie]:
+        """Возвращает фильмы, входящие во все подборки."""
+        return self._combine_named_collections(collection_names, set.intersection, order_by, offset, limit)
+
+    def difference_named_collections(self,
+                                     collection_names: Iterable[str],
+                                     order_by: str = "title",
+                                     offset: int = 0,
+                                     limit: Optional[int] = None) -> List[Movie]:
+        """Возвращает фильмы первой подборки, не входящие ни в одну из остальных."""
+        return self._combine_named_collections(collection_names, set.difference, order_by, offset, limit)
+
+    def _combine_named_collections(self,
+                                   collection_names: Iterable[str],
+                                   operation: Callable[[Set[str], Set[str]], Set[str]],
+                                   order_by: str,
+                                   offset: int,
+                                   limit: Optional[int]) -> List[Movie]:
+        """Сворачивает множества ключей подборок слева направо операцией operation."""
+        members = [self._collection_keys(collection_name) for collection_name in collection_names]
+        if not members:
+            raise ValueError("Нужна хотя бы одна подборка.")
+        keys = members[0]
+        for other in members[1:]:
+            keys = operation(keys, other)
+        return _page((self._shard(key).get_movie(key) for key in keys), order_by, offset, limit)
+
+    def _collection_keys(self, collection_name: str) -> Set[str]:
+        keys = self._named_collections.get(collection_name)
+        if keys is None:
+            raise CollectionNotFoundError(f"Подборка '{collection_name}' не найдена.")
+        return keys
+
+    def list_named_collections(self) -> List[str]:
+        """Возвращает список имен всех именованных подборок, отсортированный по алфавиту."""
+        return sorted(self._named_collections)
+
+    def _collection_matches(self,
+                            collection_name: str,
+                            title: Optional[str],
+                            director: Optional[str],
+                            year: Optional[int],
+                            genre: Optional[str],
+                            min_rating: Optional[float]) -> Iterator[Movie]:
+        """Перебирает фильмы подборки, подходящие под критерии search_movies."""
+        clauses = _criteria_clauses(title, director, year, genre, min_rating)
+        for key in self._collection_keys(collection_name):
+            movie = self._shard(key).get_movie(key)
+            if all(clause.matches(movie, _NO_COLLECTIONS) for clause in clauses):
+                yield movie
+
+    def _sync(self) -> List[List[Operation]]:
+        """
+        Готовит сегменты к поиску и возвращает для каждого операции, которые
+        рабочий процесс должен применить перед поиском. Сегмент без снимка или
+        с операциями больше доли delta_share от его размера сохраняется в снимок.
+        """
+        deltas: List[List[Operation]] = []
+        for number, shard in enumerate(self._shards):
+            pending = self._pending[number]
+            if self._stale[number] or len(pending) > self._delta_share * len(shard):
+                shard.save_snapshot(self._paths[number])
+                # Новая версия заставит процесс переоткрыть снимок, где эти операции уже есть.
+                self._saved_versions[number] += 1
+                self._stale[number] = False
+                pending = []
+            self._pending[number] = []
+            deltas.append(pending)
+        return deltas
+
+    def search_movies(self,
+                      title: Optional[str] = None,
+                      director: Optional[str] = None,
+                      year: Optional[int] = None,
+                      genre: Optional[str] = None,
+                      min_rating: Optional[float] = None,
+                      order_by: str = "title",
+                      offset: int = 0,
+                      limit: Optional[int] = None,
+                      in_collection: Optional[str] = None) -> List[Movie]:
+        """
+        Ищет фильмы по правилам MovieCollection.search_movies во всех сегментах параллельно.
+        Каждый сегмент возвращает не больше offset + limit лучших совпадений
+        в порядке order_by, и эти списки сливаются k-путевым слиянием.
+        С in_collection рабочие процессы не участвуют: родитель проверяет
+        критерии только у фильмов подборки.
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset и limit не могут быть отрицательными.")
+        if in_collection is not None:
+            matches = self._collection_matches(in_collection, title, director, year, genre, min_rating)
+            return _page(matches, order_by, offset, limit)
+        sort_key, descending = movie_sort_key(order_by)
+        deltas = self._sync()
+        criteria = (title, director, year, genre, min_rating)
+        end = None if limit is None else offset + limit
+        futures = [pool.submit(_search_shard, path, version, self._ngram_size, delta, criteria, order_by, end)
+                   for pool, path, version, delta in zip(self._pools, self._paths, self._saved_versions, deltas)]
+        results: List[List[Movie]] = []
+        error: Optional[Exception] = None
+        for number, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                # Неизвестно, успел ли процесс применить операции, поэтому
+                # следующий поиск передаст ему сегмент новым снимком.
+                self._stale[number] = True
+                error = error or exc
+        if error is not None:
+            raise error
+        merged = heapq.merge(*results, key=sort_key, reverse=descending)
+        return list(islice(merged, offset, end))
+
+    def facets(self,
+               title: Optional[str] = None,
+               director: Optional[str] = None,
+               year: Optional[int] = None,
+               genre: Optional[str] = None,
+               min_rating: Optional[float] = None,
+               in_collection: Optional[str] = None) -> Facets:
+        """Возвращает facets всех сегментов (см. MovieCollection.facets), сложенные вместе."""
+        counter = FacetCounter()
+        if in_collection is not None:
+            for movie in self._collection_matches(in_collection, title, director, year, genre, min_rating):
+                counter.add(movie.genre, movie.director, movie.year, movie.rating)
+            return counter.snapshot()
+        for shard in self._shards:
+            part = shard.facets(title, director, year, genre, min_rating)
+            counter.total += part.total
+            counter.unrated += part.unrated
+            for merged, counts in ((counter.genres, part.genres), (counter.directors, part.directors),
+                                   (counter.decades, part.decades), (counter.ratings, part.ratings)):
+                for value, count in counts.items():
+                    merged[value] = merged.get(value, 0) + count
+        return counter.snapshot()
+
+    def fuzzy_search(self, title: str, max_distance: int = 2, limit: Optional[int] = 10) -> List[Movie]:
+        """
+        Ищет названия с опечатками (см. MovieCollection.fuzzy_search) в каждом
+        сегменте и оставляет limit ближайших из их ответов.
+        """
+        needle = normalize_title(title)
+        found = [(levenshtein(needle, movie.key, max_distance), movie.key, movie)
+                 for shard in self._shards
+                 for movie in shard.fuzzy_search(title, max_distance, limit)]
+        ranked = sorted(found) if limit is None else heapq.nsmallest(limit, found)
+        return [movie for _, _, movie in ranked]
+
+    def autocomplete(self, prefix: str, limit: int = 10, order_by: str = "title") -> List[Movie]:
+        """Подсказки по префиксу (см. MovieCollection.autocomplete) из всех сегментов."""
+        candidates = [movie for shard in self._shards for movie in shard.autocomplete(prefix, limit, order_by)]
+        if order_by == "title":
+            return heapq.nsmallest(limit, candidates, key=lambda movie: movie.key)
+        return _page(candidates, "-rating", 0, limit)
+
+    def list_all_movies(self,
+                        order_by: str = "title",
+                        offset: int = 0,
+                        limit: Optional[int] = None) -> List[Movie]:
+        """Возвращает фильмы всех сегментов; порядок и страницы - как в search_movies."""
+        if order_by == "title" and offset >= 0 and (limit is None or limit >= 0):
+            return list(islice(iter(self), offset, None if limit is None else offset + limit))
+        return _page((movie for shard in self._shards for movie in shard), order_by, offset, limit)
+
+    def __iter__(self) -> Iterator[Movie]:
+        """Перебирает фильмы всех сегментов в порядке названий, сливая упорядоченные сегменты."""
+        sort_key, _ = movie_sort_key("title")
+        return heapq.merge(*self._shards, key=sort_key)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+_NO_COLLECTIONS: AbstractSet[str] = frozenset()
+
+
+def _criteria_clauses(title: Optional[str],
+                      director: Optional[str],
+                      year: Optional[int],
+                      genre: Optional[str],
+                      min_rating: Optional[float]) -> List[Query]:
+    """Условия критериев search_movies; пустые критерии, как и там, не учитываются."""
+    clauses: List[Query] = []
+    for field_name, needle in (("title", title), ("director", director), ("genre", genre)):
+        if needle:
+            clauses.append(contains(field_name, needle))
+    if year:
+        clauses.append(between("year", year, year))
+    if min_rating:
+        clauses.append(between("rating", min_rating))
+    return clauses
+
+
+def _page(movies: Iterable[Movie], order_by: str, offset: int, limit: Optional[int]) -> List[Movie]:
+    """Страница фильмов в порядке order_by: через кучу, если страница ограничена."""
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset и limit не могут быть отрицательными.")
+    sort_key, descending = movie_sort_key(order_by)
+    if limit is None:
+        return sorted(movies, key=sort_key, reverse=descending)[offset:]
+    select = heapq.nlargest if descending else heapq.nsmallest
+    return select(offset + limit, movies, key=sort_key)[offset:]
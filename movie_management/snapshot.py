@@ -0,0 +1,254 @@
+"""
+Двоичный формат снимка коллекции.
+
+Файл состоит из заголовка, таблицы записей фиксированной длины, отсортированной
+по ключу фильма, массива номеров записей в порядке названий, секции именованных
+подборок и кучи строк. Записи ссылаются на строки кучи по смещению и длине;
+повторяющиеся значения (режиссеры, жанры) лежат в куче один раз.
+Все числа записаны в порядке байт little-endian.
+"""
+import math
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .exceptions import SnapshotFormatError
+from .movie import Movie
+
+MAGIC = b"MVSNAP\x00\x01"
+VERSION = 1
+
+# magic, версия, число фильмов, смещения: записей, порядка названий, подборок, кучи строк
+HEADER = struct.Struct("<8sIIQQQQ")
+# название, ключ, режиссер, жанр (смещение в куче и длина), год, рейтинг (NaN - нет рейтинга)
+RECORD = struct.Struct("<QIQIQIQIid")
+U32 = struct.Struct("<I")
+
+
+class _Heap:
+    """Накопитель кучи строк с дедупликацией одинаковых значений."""
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.size: int = 0
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+
+    def put(self, value: str) -> Tuple[int, int]:
+        ref = self._offsets.get(value)
+        if ref is None:
+            data = value.encode("utf-8")
+            ref = (self.size, len(data))
+            self._offsets[value] = ref
+            self.chunks.append(data)
+            self.size += len(data)
+        return ref
+
+
+def fsync_directory(path: str) -> None:
+    """
+    Сбрасывает на диск каталог файла path: без этого переименование или
+    создание файла может не пережить сбой питания, даже если сам файл сброшен.
+    На системах, где каталог нельзя открыть (Windows), ничего не делает.
+    """
+    try:
+        descriptor = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def write_snapshot(path: str,
+                   movies: Sequence[Movie],
+                   title_order: Sequence[int],
+                   named_collections: Mapping[str, Sequence[int]]) -> None:
+    """
+    Записывает снимок в файл.
+    movies - фильмы, отсортированные по ключу; title_order - номера фильмов
+    в порядке названий; named_collections - номера фильмов каждой подборки.
+    Файл сначала пишется во временный, сбрасывается на диск и затем атомарно
+    подменяет прежний; после переименования сбрасывается и каталог.
+    """
+    heap = _Heap()
+    records = bytearray()
+    for movie in movies:
+        rating = math.nan if movie.rating is None else movie.rating
+        records += RECORD.pack(*heap.put(movie.title), *heap.put(movie.key),
+                               *heap.put(movie.director), *heap.put(movie.genre),
+                               movie.year, rating)
+
+    order = struct.pack(f"<{len(title_order)}I", *title_order)
+
+    named = bytearray(U32.pack(len(named_collections)))
+    for name, members in named_collections.items():
+        encoded_name = name.encode("utf-8")
+        named += U32.pack(len(encoded_name)) + encoded_name
+        named += U32.pack(len(members)) + struct.pack(f"<{len(members)}I", *members)
+
+    records_offset = HEADER.size
+    order_offset = records_offset + len(records)
+    named_offset = order_offset + len(order)
+    heap_offset = named_offset + len(named)
+    header = HEADER.pack(MAGIC, VERSION, len(movies), records_offset, order_offset, named_offset, heap_offset)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as output:
+        output.write(header)
+        output.write(records)
+        output.write(order)
+        output.write(named)
+        for chunk in heap.chunks:
+            output.write(chunk)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temp_path, path)
+    fsync_directory(path)
+
+
+class SnapshotReader:
+    """
+    Снимок коллекции, отображенный в память через mmap.
+    Записи разбираются только при обращении к ним.
+    """
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Пустой файл нельзя отобразить в память
+            self._file.close()
+            raise SnapshotFormatError(f"Файл '{path}' не является снимком коллекции.")
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise SnapshotFormatError(f"Файл '{path}' не является снимком коллекции.")
+        (magic, version, self._count, self._records_offset, self._order_offset,
+         self._named_offset, self._heap_offset) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotFormatError(f"Файл '{path}' не является снимком коллекции.")
+        # Секции идут подряд; обрезанный или испорченный файл отсекается здесь,
+        # а не ошибкой struct при первом чтении записи.
+        if (self._records_offset != HEADER.size
+                or self._order_offset != self._records_offset + self._count * RECORD.size
+                or self._named_offset != self._order_offset + self._count * U32.size
+                or not self._named_offset + U32.size <= self._heap_offset <= len(self._map)):
+            self.close()
+            raise SnapshotFormatError(f"Снимок '{path}' поврежден: секции не помещаются в файл.")
+        self._path = path
+
+    def close(self) -> None:
+        """Освобождает отображение и файл."""
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._heap_offset + offset
+        if start + length > len(self._map):
+            raise SnapshotFormatError(f"Снимок '{self._path}' поврежден: строка за концом файла.")
+        return self._map[start:start + length].decode("utf-8")
+
+    def _record(self, index: int) -> tuple:
+        return RECORD.unpack_from(self._map, self._records_offset + index * RECORD.size)
+
+    def key_at(self, index: int) -> str:
+        """Возвращает ключ фильма записи с номером index."""
+        record = self._record(index)
+        return self._string(record[2], record[3])
+
+    def movie_at(self, index: int) -> Movie:
+        """Собирает объект Movie из записи с номером index."""
+        (title_offset, title_length, _, _, director_offset, director_length,
+         genre_offset, genre_length, year, rating) = self._record(index)
+        return Movie(self._string(title_offset, title_length),
+                     self._string(director_offset, director_length),
+                     year,
+                     self._string(genre_offset, genre_length),
+                     None if math.isnan(rating) else rating)
+
+    def find(self, key: str) -> Optional[int]:
+        """Ищет запись по ключу двоичным поиском; возвращает ее номер или None."""
+        target = key.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            record = self._record(middle)
+            start = self._heap_offset + record[2]
+            probe = self._map[start:start + record[3]]
+            if probe < target:
+                low = middle + 1
+            elif probe > target:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def title_order(self) -> Iterator[int]:
+        """Перебирает номера записей в порядке названий."""
+        end = self._order_offset + self._count * U32.size
+        for (index,) in U32.iter_unpack(self._map[self._order_offset:end]):
+            yield index
+
+    def named_collections(self) -> Dict[str, List[int]]:
+        """Читает секцию подборок: имя -> номера записей."""
+        section = self._map[self._named_offset:self._heap_offset]
+        try:
+            (count,) = U32.unpack_from(section, 0)
+            position = U32.size
+            result: Dict[str, List[int]] = {}
+            for _ in range(count):
+                (name_length,) = U32.unpack_from(section, position)
+                position += U32.size
+                name = section[position:position + name_length].decode("utf-8")
+                position += name_length
+                (member_count,) = U32.unpack_from(section, position)
+                position += U32.size
+                members = list(struct.unpack_from(f"<{member_count}I", section, position))
+                position += member_count * U32.size
+                if members and max(members) >= self._count:
+                    raise ValueError("номер записи за пределами таблицы")
+                result[name] = members
+        except (struct.error, ValueError) as error:
+            raise SnapshotFormatError(f"Снимок '{self._path}' поврежден: секция подборок ({error}).") from error
+        return result
+
+
+class LazyMovies(Mapping[str, Movie]):
+    """
+    Словарь "ключ -> Movie" поверх снимка.
+    Фильм создается при первом обращении и дальше берется из кеша,
+    поэтому повторные обращения возвращают тот же объект.
+    """
+    def __init__(self, reader: SnapshotReader) -> None:
+        self.reader = reader
+        self._loaded: Dict[int, Movie] = {}
+
+    def movie_at(self, index: int) -> Movie:
+        movie = self._loaded.get(index)
+        if movie is None:
+            movie = self.reader.movie_at(index)
+            self._loaded[index] = movie
+        return movie
+
+    def __getitem__(self, key: str) -> Movie:
+        index = self.reader.find(key)
+        if index is None:
+            raise KeyError(key)
+        return self.movie_at(index)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.reader.find(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.reader.key_at(index) for index in range(len(self.reader)))
+
+    def __len__(self) -> int:
+        return len(self.reader)
+
+    def in_title_order(self) -> Iterator[Movie]:
+        """Перебирает фильмы в порядке названий, создавая их по мере обхода."""
+        for index in self.reader.title_order():
+            yield self.movie_at(index)
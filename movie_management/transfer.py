@@ -0,0 +1,172 @@
+"""
+Потоковый импорт и экспорт каталога в форматах CSV и JSON Lines.
+
+Файл читается построчно генератором, строки приводятся к типам Movie и
+передаются в коллекцию пакетами через add_movies, так что расход памяти
+ограничен размером пакета. Экспорт пишет фильмы прямо из итератора коллекции.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .collection import MovieCollection
+from .movie import Movie, normalize_title
+
+FORMATS = ("csv", "jsonl")
+FIELDS = ("title", "director", "year", "genre", "rating")
+
+
+@dataclass
+class RowError:
+    """Строка файла, которую не удалось импортировать."""
+    line: int
+    row: Dict[str, Any]
+    message: str
+
+
+@dataclass
+class ImportReport:
+    """
+    Итог импорта: число добавленных фильмов и ошибки по строкам.
+    В errors хранятся первые max_errors ошибок, error_count - их общее число.
+    """
+    imported: int = 0
+    error_count: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    max_errors: int = 1000
+
+    def add_error(self, error: RowError) -> None:
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(error)
+
+
+def _check_format(format: str) -> None:
+    if format not in FORMATS:
+        raise ValueError(f"Неизвестный формат '{format}', ожидается один из: {', '.join(FORMATS)}.")
+
+
+def read_rows(path: str, format: str = "csv") -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Перебирает строки файла как пары (номер строки, словарь полей)."""
+    _check_format(format)
+    with open(path, encoding="utf-8", newline="") as source:
+        if format == "csv":
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as error:
+                    yield line_number, {"__error__": f"Некорректный JSON: {error}"}
+                    continue
+                yield line_number, row if isinstance(row, dict) else {"__error__": "Строка не является объектом JSON."}
+
+
+def row_to_movie(row: Dict[str, Any]) -> Movie:
+    """
+    Приводит поля строки к типам Movie: год - целое число, рейтинг - число
+    или None для пустого значения. Ошибки приведения и проверки Movie
+    поднимаются как ValueError.
+    """
+    if "__error__" in row:
+        raise ValueError(row["__error__"])
+    # В JSON Lines поле может оказаться числом или списком: такой фильм
+    # нельзя ни нормализовать, ни проиндексировать, поэтому это ошибка строки.
+    for name in ("title", "director", "genre"):
+        value = row.get(name)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"Поле '{name}' должно быть строкой.")
+    year = row.get("year")
+    if isinstance(year, str):
+        year = year.strip()
+    if year in (None, ""):
+        raise ValueError("Не указан год выпуска.")
+    if isinstance(year, bool) or not isinstance(year, (int, str)):
+        raise ValueError("Год выпуска должен быть целым числом.")
+    rating = row.get("rating")
+    if isinstance(rating, str):
+        rating = rating.strip() or None
+    if isinstance(rating, bool) or not isinstance(rating, (int, float, str, type(None))):
+        raise ValueError("Рейтинг должен быть числом.")
+    return Movie(
+        row.get("title") or "",
+        row.get("director") or "",
+        int(year),
+        row.get("genre") or "",
+        None if rating is None else float(rating),
+    )
+
+
+def import_movies(collection: MovieCollection,
+                  path: str,
+                  format: str = "csv",
+                  batch_size: int = 10_000,
+                  max_errors: int = 1000) -> ImportReport:
+    """
+    Загружает фильмы из файла в коллекцию пакетами по batch_size.
+    Строки, которые не проходят приведение типов или проверку Movie, а также
+    фильмы, уже имеющиеся в коллекции, попадают в отчет и не прерывают загрузку.
+    """
+    report = ImportReport(max_errors=max_errors)
+    rows = read_rows(path, format)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        # Повторы внутри пакета отсекаются здесь, поэтому отказы add_movies
+        # относятся к фильмам, уже бывшим в коллекции, и однозначно связаны со строкой.
+        batch: Dict[str, Tuple[Movie, int, Dict[str, Any]]] = {}
+        for line, row in chunk:
+            try:
+                movie = row_to_movie(row)
+            except (TypeError, ValueError) as error:
+                report.add_error(RowError(line, row, str(error)))
+                continue
+            if movie.key in batch:
+                report.add_error(RowError(line, row, f"Фильм '{movie.title}' повторяется в файле."))
+                continue
+            batch[movie.key] = (movie, line, row)
+        result = collection.add_movies(movie for movie, _, _ in batch.values())
+        report.imported += len(result.succeeded)
+        for title, error in result.failed:
+            _, line, row = batch[normalize_title(title)]
+            report.add_error(RowError(line, row, str(error)))
+    return report
+
+
+def movie_to_row(movie: Movie) -> Dict[str, Any]:
+    """Представляет фильм словарем полей (рейтинг None - нет рейтинга)."""
+    return {"title": movie.title, "director": movie.director, "year": movie.year,
+            "genre": movie.genre, "rating": movie.rating}
+
+
+def export_movies(collection: MovieCollection, path: str, format: str = "csv") -> int:
+    """
+    Записывает все фильмы коллекции в файл в порядке названий.
+    Фильмы берутся из итератора коллекции по одному, без промежуточного списка.
+    Возвращает число записанных фильмов.
+    """
+    _check_format(format)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as target:
+        if format == "csv":
+            writer = csv.DictWriter(target, fieldnames=FIELDS)
+            writer.writeheader()
+            for movie in collection:
+                row = movie_to_row(movie)
+                if row["rating"] is None:
+                    row["rating"] = ""
+                writer.writerow(row)
+                count += 1
+        else:
+            for movie in collection:
+                target.write(json.dumps(movie_to_row(movie), ensure_ascii=False))
+                target.write("\n")
+                count += 1
+    return count
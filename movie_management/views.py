@@ -0,0 +1,147 @@
+"""
+Материализованные представления MovieCollection.
+
+Представление - отфильтрованный составным запросом и отсортированный список
+фильмов, который обновляется по событиям изменений коллекции (см. events)
+вместо пересчета с нуля: каждое событие затрагивает не больше одного фильма,
+и его место в списке находится двоичным поиском по коротким отрезкам.
+"""
+from bisect import bisect_left, insort
+from itertools import chain, islice
+from typing import Dict, Iterator, List, Optional, Union
+
+from .collection import MovieCollection, movie_sort_key
+from .concurrent import ConcurrentMovieCollection
+from .events import ChangeEvent, MovieAdded, MovieAddedToCollection, MovieRemoved, MovieRemovedFromCollection
+from .exceptions import MovieNotFoundError
+from .movie import Movie
+from .query import Query
+
+
+class _SortedChunks:
+    """
+    Отсортированный список, разбитый на отрезки не длиннее 2 * CHUNK.
+    Вставка и удаление находят отрезок двоичным поиском по их максимумам
+    и сдвигают элементы только внутри него, а не во всем списке.
+    """
+    CHUNK = 512
+
+    def __init__(self, items: List[tuple]) -> None:
+        # items уже отсортированы.
+        self._chunks = [items[start:start + self.CHUNK] for start in range(0, len(items), self.CHUNK)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._size = len(items)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[tuple]:
+        return chain.from_iterable(self._chunks)
+
+    def __reversed__(self) -> Iterator[tuple]:
+        return chain.from_iterable(reversed(chunk) for chunk in reversed(self._chunks))
+
+    def add(self, item: tuple) -> None:
+        """Вставляет item с сохранением порядка."""
+        self._size += 1
+        if not self._chunks:
+            self._chunks.append([item])
+            self._maxes.append(item)
+            return
+        index = min(bisect_left(self._maxes, item), len(self._chunks) - 1)
+        chunk = self._chunks[index]
+        insort(chunk, item)
+        self._maxes[index] = chunk[-1]
+        if len(chunk) > 2 * self.CHUNK:
+            head, tail = chunk[:self.CHUNK], chunk[self.CHUNK:]
+            self._chunks[index:index + 1] = [head, tail]
+            self._maxes[index:index + 1] = [head[-1], tail[-1]]
+
+    def remove(self, item: tuple) -> None:
+        """Удаляет item, который есть в списке."""
+        self._size -= 1
+        index = bisect_left(self._maxes, item)
+        chunk = self._chunks[index]
+        del chunk[bisect_left(chunk, item)]
+        if chunk:
+            self._maxes[index] = chunk[-1]
+        else:
+            del self._chunks[index]
+            del self._maxes[index]
+
+
+class MaterializedView:
+    """
+    Фильмы коллекции, подходящие под query (None - все фильмы), в порядке
+    order_by (как в search_movies) и не больше limit штук.
+    Представление подписывается на коллекцию при создании; close() отписывает его.
+    С ConcurrentMovieCollection представление обновляется после публикации
+    каждой версии; создавать его следует, пока писателей нет, иначе изменения
+    между чтением коллекции и подпиской не попадут в представление.
+    Внутри хранятся все подходящие фильмы, а не только первые limit: тогда
+    удаление фильма из начала списка не требует нового поиска.
+    """
+    def __init__(self,
+                 collection: Union[MovieCollection, ConcurrentMovieCollection],
+                 query: Optional[Query] = None,
+                 order_by: str = "title",
+                 limit: Optional[int] = None) -> None:
+        if limit is not None and limit < 0:
+            raise ValueError("limit не может быть отрицательным.")
+        self.query = query
+        self.order_by = order_by
+        self.limit = limit
+        self._collection = collection
+        self._sort_key, self._descending = movie_sort_key(order_by)
+        # Ключи сортировки подходящих фильмов по возрастанию; последний элемент
+        # каждого ключа - ключ фильма, поэтому ключи не повторяются.
+        self._movies: Dict[str, Movie] = {}
+
+        movies = collection.list_all_movies() if query is None else collection.query_movies(query)
+        for movie in movies:
+            self._movies[movie.key] = movie
+        self._entries = _SortedChunks(sorted(self._sort_key(movie) for movie in movies))
+        collection.subscribe(self._handle)
+
+    def close(self) -> None:
+        """Отписывает представление от коллекции; дальше оно не обновляется."""
+        self._collection.unsubscribe(self._handle)
+
+    def movies(self) -> List[Movie]:
+        """Возвращает первые limit фильмов представления."""
+        return list(self)
+
+    def __iter__(self) -> Iterator[Movie]:
+        ordered = reversed(self._entries) if self._descending else iter(self._entries)
+        return (self._movies[entry[-1]] for entry in islice(ordered, self.limit))
+
+    def __len__(self) -> int:
+        size = len(self._entries)
+        return size if self.limit is None else min(size, self.limit)
+
+    def _handle(self, event: ChangeEvent) -> None:
+        if isinstance(event, MovieRemoved):
+            self._discard(event.movie)
+        elif isinstance(event, (MovieAdded, MovieAddedToCollection, MovieRemovedFromCollection)):
+            movie = event.movie
+            try:
+                names = self._collection.collections_containing(movie.key)
+            except MovieNotFoundError:
+                # Выход из подборок при удалении фильма приходит, когда фильма уже нет.
+                self._discard(movie)
+                return
+            if self.query is None or self.query.matches(movie, frozenset(names)):
+                self._insert(movie)
+            else:
+                self._discard(movie)
+
+    def _insert(self, movie: Movie) -> None:
+        if movie.key in self._movies:
+            return
+        self._movies[movie.key] = movie
+        self._entries.add(self._sort_key(movie))
+
+    def _discard(self, movie: Movie) -> None:
+        if self._movies.pop(movie.key, None) is None:
+            return
+        self._entries.remove(self._sort_key(movie))
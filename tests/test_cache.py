@@ -0,0 +1,31 @@
+import pytest
+from movie_management.cache import QueryCache
+
+def test_query_cache_lru_eviction():
+    """Тест вытеснения давно использованных записей."""
+    cache = QueryCache(max_size=2)
+    cache.put("a", 0, (1,))
+    cache.put("b", 0, (2,))
+    assert cache.get("a", 0) == (1,)
+    cache.put("c", 0, (3,))
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == (1,)
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (2, 1, 1, 2)
+
+def test_query_cache_generation_and_ttl():
+    """Тест устаревания записей по поколению и по времени жизни."""
+    now = [0.0]
+    cache = QueryCache(max_size=4, ttl=10.0, clock=lambda: now[0])
+    cache.put("a", 1, (1,))
+    assert cache.get("a", 2) is None
+    cache.put("a", 2, (1,))
+    now[0] = 9.0
+    assert cache.get("a", 2) == (1,)
+    now[0] = 10.0
+    assert cache.get("a", 2) is None
+
+def test_query_cache_rejects_bad_size():
+    """Тест недопустимого размера кеша."""
+    with pytest.raises(ValueError):
+        QueryCache(max_size=0)
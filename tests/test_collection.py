@@ -1,6 +1,14 @@
 import pytest
 from movie_management.movie import Movie
 from movie_management.collection import MovieCollection
+from movie_management.events import (
+    CollectionCreated,
+    CollectionRemoved,
+    MovieAdded,
+    MovieAddedToCollection,
+    MovieRemoved,
+    MovieRemovedFromCollection,
+)
 from movie_management.exceptions import (
     MovieNotFoundError,
     MovieAlreadyExistsError,
@@ -87,6 +95,31 @@ def test_collection_iteration(populated_collection: MovieCollection):
     assert titles == expected_titles
     assert len(titles) == 5 
 
+def test_collection_iteration_detects_changes(populated_collection: MovieCollection):
+    """Тест ошибки при изменении коллекции во время перебора."""
+    iterator = iter(populated_collection)
+    assert next(iterator).title == "Интерстеллар"
+    populated_collection.remove_movie("Криминальное чтиво")
+    with pytest.raises(RuntimeError):
+        next(iterator)
+
+    iterator = iter(populated_collection)
+    populated_collection.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика"))
+    with pytest.raises(RuntimeError):
+        list(iterator)
+
+def test_collection_iteration_allows_collection_changes(populated_collection: MovieCollection):
+    """Тест изменения подборок во время перебора коллекции."""
+    populated_collection.create_named_collection("Избранное")
+    for movie in populated_collection:
+        populated_collection.add_movie_to_named_collection(movie.title, "Избранное")
+        populated_collection.add_movies_to_named_collection([movie.title], "Избранное")
+        if movie.rating < 8.8:
+            populated_collection.remove_movie_from_named_collection(movie.title, "Избранное")
+    assert [m.title for m in populated_collection.get_movies_in_named_collection("Избранное")] == [
+        "Криминальное чтиво", "Начало", "Темный рыцарь"
+    ]
+
 def test_collection_len(populated_collection: MovieCollection, empty_collection: MovieCollection):
     """Тест получения длины коллекции."""
     assert len(populated_collection) == 5
@@ -279,4 +312,498 @@ def test_remove_movie_also_removes_from_named_collections(populated_collection:
     assert scifi_movies[0].title == interstellar_title
 
     with pytest.raises(MovieNotFoundError):
-        populated_collection.get_movie(inception_title)
\ No newline at end of file
+        populated_collection.get_movie(inception_title)
+
+def test_search_movies_indexes_follow_removal(populated_collection: MovieCollection):
+    """Тест согласованности индексов поиска после удаления фильма."""
+    populated_collection.remove_movie("Начало")
+    assert populated_collection.search_movies(year=2010) == []
+    results = populated_collection.search_movies(director="нолан", min_rating=8.0)
+    assert [m.title for m in results] == ["Интерстеллар", "Темный рыцарь"]
+
+    populated_collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    results_after_add = populated_collection.search_movies(year=2010, genre="фантаст")
+    assert [m.title for m in results_after_add] == ["Начало"]
+
+def test_search_movies_with_ngram_index(populated_collection: MovieCollection):
+    """Тест совпадения результатов поиска с индексом n-грамм и без него."""
+    ngram_collection = MovieCollection(ngram_size=3)
+    for movie in populated_collection.list_all_movies():
+        ngram_collection.add_movie(movie)
+
+    queries = [
+        {"title": "емный рыц"},
+        {"title": "ат"},  # Короче n-граммы - перебор
+        {"title": "Несуществующий"},
+        {"director": "нолан", "genre": "научная фант"},
+        {"director": "Ва"},
+        {"title": "ин", "min_rating": 8.7},
+    ]
+    for query in queries:
+        expected = [m.title for m in populated_collection.search_movies(**query)]
+        assert [m.title for m in ngram_collection.search_movies(**query)] == expected
+
+    ngram_collection.remove_movie("Матрица")
+    assert ngram_collection.search_movies(director="вачов") == []
+    assert ngram_collection.search_movies(title="матр") == []
+
+def test_title_order_maintained_on_add_and_remove(populated_collection: MovieCollection):
+    """Тест порядка по названию при переборе после добавления и удаления фильмов."""
+    populated_collection.add_movie(Movie("Бегущий по лезвию", "Ридли Скотт", 1982, "Научная фантастика", 8.1))
+    populated_collection.remove_movie("Матрица")
+    expected = ["Бегущий по лезвию", "Интерстеллар", "Криминальное чтиво", "Начало", "Темный рыцарь"]
+    assert [m.title for m in populated_collection] == expected
+    assert [m.title for m in populated_collection.list_all_movies()] == expected
+    assert [m.title for m in populated_collection.search_movies(genre="фантаст")] == [
+        "Бегущий по лезвию", "Интерстеллар", "Начало"
+    ]
+
+def test_collections_containing(populated_collection: MovieCollection):
+    """Тест обратного индекса подборок для фильма."""
+    populated_collection.create_named_collection("Нолан")
+    populated_collection.create_named_collection("Фантастика")
+    populated_collection.create_named_collection("Пустая")
+    populated_collection.add_movie_to_named_collection("Начало", "Нолан")
+    populated_collection.add_movie_to_named_collection("Начало", "Фантастика")
+    populated_collection.add_movie_to_named_collection("Интерстеллар", "Фантастика")
+
+    assert populated_collection.collections_containing("начало") == ["Нолан", "Фантастика"]
+    assert populated_collection.collections_containing("Матрица") == []
+
+    populated_collection.remove_movie_from_named_collection("Начало", "Нолан")
+    assert populated_collection.collections_containing("Начало") == ["Фантастика"]
+
+    populated_collection.remove_named_collection("Фантастика")
+    assert populated_collection.collections_containing("Начало") == []
+    assert populated_collection.collections_containing("Интерстеллар") == []
+
+    with pytest.raises(MovieNotFoundError):
+        populated_collection.collections_containing("Несуществующий Фильм")
+
+def test_add_movie_interns_director_and_genre(empty_collection: MovieCollection):
+    """Тест общих экземпляров строк режиссера и жанра в коллекции."""
+    first = Movie("Начало", "".join(["Кристофер ", "Нолан"]), 2010, "".join(["Научная ", "фантастика"]))
+    second = Movie("Интерстеллар", "".join(["Кристофер ", "Нолан"]), 2014, "".join(["Научная ", "фантастика"]))
+    assert first.director is not second.director
+
+    empty_collection.add_movie(first)
+    empty_collection.add_movie(second)
+    assert empty_collection.get_movie("Начало").director is empty_collection.get_movie("Интерстеллар").director
+    assert empty_collection.get_movie("Начало").genre is empty_collection.get_movie("Интерстеллар").genre
+
+def test_add_movies_reports_conflicts(populated_collection: MovieCollection):
+    """Тест пакетного добавления с отчетом о конфликтах."""
+    result = populated_collection.add_movies([
+        Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0),
+        Movie("начало", "Кто-то", 2000, "Драма"),
+        Movie("Бегущий по лезвию", "Ридли Скотт", 1982, "Научная фантастика", 8.1),
+        Movie("ДЮНА", "Дэвид Линч", 1984, "Научная фантастика", 6.3),
+    ])
+    assert result.succeeded == ["Дюна", "Бегущий по лезвию"]
+    assert [title for title, _ in result.failed] == ["начало", "ДЮНА"]
+    assert all(isinstance(error, MovieAlreadyExistsError) for _, error in result.failed)
+    assert not result.ok
+
+    assert populated_collection.get_movie("Дюна").director == "Дени Вильнёв"
+    assert [m.title for m in populated_collection.search_movies(min_rating=8.0, genre="фантаст")] == [
+        "Бегущий по лезвию", "Дюна", "Интерстеллар", "Матрица", "Начало"
+    ]
+
+def test_add_movie_leaves_collection_unchanged_on_error(populated_collection: MovieCollection):
+    """Тест того, что ошибка в полях фильма не меняет коллекцию ни при одиночном, ни при пакетном добавлении."""
+    broken = Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0)
+    broken.genre = None
+    with pytest.raises(TypeError):
+        populated_collection.add_movie(broken)
+    assert populated_collection.autocomplete("дю") == []
+    assert populated_collection.search_movies(director="вильнёв") == []
+    assert populated_collection.facets().total == 5
+
+    late_rating = Movie("Бегущий по лезвию", "Ридли Скотт", 1982, "Научная фантастика")
+    late_rating.rating = float("inf")
+    result = populated_collection.add_movies([
+        broken,
+        late_rating,
+        Movie("Чужой", "Ридли Скотт", 1979, "Ужасы", 8.5),
+    ])
+    assert result.succeeded == ["Чужой"]
+    assert [(title, type(error)) for title, error in result.failed] == [
+        ("Дюна", TypeError), ("Бегущий по лезвию", ValueError)
+    ]
+    assert [m.title for m in populated_collection.search_movies(director="скотт")] == ["Чужой"]
+    assert populated_collection.facets().total == 6
+
+def test_add_movies_to_named_collection(populated_collection: MovieCollection):
+    """Тест пакетного добавления фильмов в подборку."""
+    populated_collection.create_named_collection("Нолан")
+    result = populated_collection.add_movies_to_named_collection(
+        ["Начало", "Несуществующий Фильм", "интерстеллар "], "Нолан"
+    )
+    assert result.succeeded == ["Начало", "Интерстеллар"]
+    assert [title for title, _ in result.failed] == ["Несуществующий Фильм"]
+    assert isinstance(result.failed[0][1], MovieNotFoundError)
+    assert [m.title for m in populated_collection.get_movies_in_named_collection("Нолан")] == ["Интерстеллар", "Начало"]
+    assert populated_collection.collections_containing("Начало") == ["Нолан"]
+
+    with pytest.raises(CollectionNotFoundError):
+        populated_collection.add_movies_to_named_collection(["Начало"], "Несуществующая")
+
+def test_event_sink():
+    """Тест получателя сообщений коллекции."""
+    messages = []
+    collection = MovieCollection(event_sink=messages.append)
+    collection.add_movie(Movie("Паразиты", "Пон Джун-хо", 2019, "Триллер", 8.5))
+    collection.create_named_collection("Посмотреть")
+    assert messages == ["Фильм 'Паразиты' добавлен.", "Подборка 'Посмотреть' создана."]
+
+def test_search_cache_invalidated_by_mutations():
+    """Тест кеша поиска и его сброса при изменении коллекции."""
+    collection = MovieCollection(search_cache_size=8)
+    collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    collection.add_movie(Movie("Интерстеллар", "Кристофер Нолан", 2014, "Научная фантастика", 8.6))
+
+    first = collection.search_movies(director="Нолан", min_rating=8.0)
+    second = collection.search_movies(director="нолан", min_rating=8.0)
+    assert first is second
+    assert isinstance(first, tuple)
+
+    collection.remove_movie("Начало")
+    assert [m.title for m in collection.search_movies(director="нолан", min_rating=8.0)] == ["Интерстеллар"]
+    stats = collection.search_cache_stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+    assert MovieCollection().search_cache_stats() is None
+
+def test_search_movies_order_and_pages(populated_collection: MovieCollection):
+    """Тест сортировки и постраничной выборки результатов поиска."""
+    populated_collection.add_movie(Movie("Без рейтинга", "Кристофер Нолан", 2000, "Драма"))
+    by_rating = [m.title for m in populated_collection.search_movies(order_by="-rating")]
+    assert by_rating == ["Темный рыцарь", "Криминальное чтиво", "Начало", "Матрица", "Интерстеллар", "Без рейтинга"]
+    assert [m.title for m in populated_collection.search_movies(order_by="rating")][-1] == "Без рейтинга"
+
+    assert [m.title for m in populated_collection.search_movies(order_by="-rating", offset=1, limit=2)] == [
+        "Криминальное чтиво", "Начало"
+    ]
+    assert [m.year for m in populated_collection.search_movies(director="нолан", order_by="year", limit=2)] == [2000, 2008]
+    assert [m.title for m in populated_collection.search_movies(title="н", order_by="-title", limit=2)] == [
+        "Темный рыцарь", "Начало"
+    ]
+    assert populated_collection.search_movies(offset=10) == []
+
+    with pytest.raises(ValueError):
+        populated_collection.search_movies(order_by="director")
+    with pytest.raises(ValueError):
+        populated_collection.search_movies(limit=-1)
+
+def test_list_and_named_collection_pages(populated_collection: MovieCollection):
+    """Тест постраничной выборки списка фильмов и подборки."""
+    assert [m.title for m in populated_collection.list_all_movies(offset=1, limit=2)] == [
+        "Криминальное чтиво", "Матрица"
+    ]
+    assert [m.year for m in populated_collection.list_all_movies(order_by="-year", limit=1)] == [2014]
+
+    populated_collection.create_named_collection("Нолан")
+    populated_collection.add_movies_to_named_collection(["Начало", "Темный рыцарь", "Интерстеллар"], "Нолан")
+    assert [m.title for m in populated_collection.get_movies_in_named_collection("Нолан", order_by="-rating", limit=2)] == [
+        "Темный рыцарь", "Начало"
+    ]
+
+def test_iter_search_movies(populated_collection: MovieCollection):
+    """Тест ленивого перебора результатов поиска."""
+    results = populated_collection.iter_search_movies(genre="фантаст")
+    assert next(results).title == "Интерстеллар"
+    assert [m.title for m in results] == ["Матрица", "Начало"]
+    assert [m.title for m in populated_collection.iter_search_movies(director="нолан", order_by="-year")] == [
+        "Интерстеллар", "Начало", "Темный рыцарь"
+    ]
+
+def test_search_cache_keys_include_page():
+    """Тест того, что страницы одного запроса кешируются отдельно."""
+    collection = MovieCollection(search_cache_size=8)
+    collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    collection.add_movie(Movie("Интерстеллар", "Кристофер Нолан", 2014, "Научная фантастика", 8.6))
+    assert [m.title for m in collection.search_movies(limit=1)] == ["Интерстеллар"]
+    assert [m.title for m in collection.search_movies(offset=1, limit=1)] == ["Начало"]
+
+def test_copy_is_independent(populated_collection: MovieCollection):
+    """Тест независимости копии коллекции."""
+    populated_collection.create_named_collection("Нолан")
+    populated_collection.add_movie_to_named_collection("Начало", "Нолан")
+    clone = populated_collection.copy()
+    clone.remove_movie("Начало")
+    clone.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0))
+
+    assert [m.title for m in populated_collection.search_movies(genre="фант")] == ["Интерстеллар", "Матрица", "Начало"]
+    assert [m.title for m in populated_collection.get_movies_in_named_collection("Нолан")] == ["Начало"]
+    assert [m.title for m in clone.search_movies(genre="фант")] == ["Дюна", "Интерстеллар", "Матрица"]
+    assert clone.get_movies_in_named_collection("Нолан") == []
+
+def test_copy_shares_structures_until_changed(populated_collection: MovieCollection):
+    """Тест копирования при записи: изменения любой стороны не видны другой."""
+    populated_collection.create_named_collection("Нолан")
+    populated_collection.add_movie_to_named_collection("Начало", "Нолан")
+    clone = populated_collection.copy()
+    assert clone._movies is populated_collection._movies
+    assert clone._named_collections["Нолан"] is populated_collection._named_collections["Нолан"]
+
+    clone.add_movie_to_named_collection("Интерстеллар", "Нолан")
+    assert clone._movies is populated_collection._movies
+    populated_collection.add_movie(Movie("Довод", "Кристофер Нолан", 2020, "Научная фантастика", 7.8))
+    populated_collection.add_movie_to_named_collection("Темный рыцарь", "Нолан")
+
+    assert [m.title for m in clone.get_movies_in_named_collection("Нолан")] == ["Интерстеллар", "Начало"]
+    assert clone.collections_containing("Темный рыцарь") == []
+    assert [m.title for m in clone.search_movies(director="нолан")] == ["Интерстеллар", "Начало", "Темный рыцарь"]
+    assert [m.title for m in populated_collection.get_movies_in_named_collection("Нолан")] == ["Начало", "Темный рыцарь"]
+    assert populated_collection.collections_containing("Интерстеллар") == []
+    assert [m.title for m in populated_collection.search_movies(director="нолан")] == [
+        "Довод", "Интерстеллар", "Начало", "Темный рыцарь"
+    ]
+
+def test_instrumentation(populated_collection: MovieCollection):
+    """Тест сбора метрик, журнала медленных запросов и трассировки."""
+    assert populated_collection.stats() is None
+    spans = []
+    records = []
+
+    class Span:
+        def __init__(self, name: str):
+            spans.append(name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+    populated_collection.enable_instrumentation(slow_query_threshold=0.0, tracer=Span, hook=records.append)
+    populated_collection.search_movies(genre="фантаст", year=2010)
+    populated_collection.search_movies(title="ат")
+    populated_collection.get_movie("Начало")
+    with pytest.raises(MovieNotFoundError):
+        populated_collection.get_movie("Нет такого")
+
+    stats = populated_collection.stats()
+    search = stats["methods"]["search_movies"]
+    assert search["calls"] == 2
+    assert search["result_size_total"] == 2
+    # Первый запрос просмотрел один фильм по индексам, второй проверил все пять названий
+    assert (search["rows_scanned"], search["rows_matched"]) == (1 + 5, 1 + 1)
+    assert stats["methods"]["get_movie"]["errors"] == 1
+    assert len(stats["slow_queries"]) == 4
+    assert spans == ["search_movies", "search_movies", "get_movie", "get_movie"]
+    assert records[0].rows_scanned == 1
+
+    populated_collection.disable_instrumentation()
+    assert "search_movies" not in vars(populated_collection)
+    assert populated_collection.stats() is None
+
+def test_instrumentation_covers_iteration(populated_collection: MovieCollection):
+    """Тест метрик генератора iter_search_movies: они учитывают перебор, а не только создание."""
+    records = []
+    populated_collection.enable_instrumentation(hook=records.append)
+    results = populated_collection.iter_search_movies(title="ч")
+    assert records == []
+    assert [m.title for m in results] == ["Криминальное чтиво", "Начало"]
+    assert records[0].result_size == 2
+    assert (records[0].rows_scanned, records[0].rows_matched) == (5, 2)
+
+    results = populated_collection.iter_search_movies(director="нолан")
+    next(results)
+    results.close()
+    stats = populated_collection.stats()["methods"]["iter_search_movies"]
+    assert stats["calls"] == 2
+    assert stats["result_size_total"] == 3
+    populated_collection.disable_instrumentation()
+
+def test_named_collection_set_algebra(populated_collection: MovieCollection):
+    """Тест объединения, пересечения и разности подборок."""
+    populated_collection.create_named_collection("Нолан")
+    populated_collection.create_named_collection("Любимые")
+    populated_collection.add_movies_to_named_collection(["Начало", "Темный рыцарь", "Интерстеллар"], "Нолан")
+    populated_collection.add_movies_to_named_collection(["Начало", "Матрица"], "Любимые")
+
+    def titles(movies):
+        return [movie.title for movie in movies]
+
+    assert titles(populated_collection.union_named_collections(["Нолан", "Любимые"])) == [
+        "Интерстеллар", "Матрица", "Начало", "Темный рыцарь"
+    ]
+    assert titles(populated_collection.intersect_named_collections(["Нолан", "Любимые"])) == ["Начало"]
+    assert titles(populated_collection.difference_named_collections(["Нолан", "Любимые"], order_by="-rating")) == [
+        "Темный рыцарь", "Интерстеллар"
+    ]
+    with pytest.raises(CollectionNotFoundError):
+        populated_collection.union_named_collections(["Нолан", "Несуществующая"])
+
+def test_search_in_collection(populated_collection: MovieCollection):
+    """Тест поиска внутри подборки и повторного использования идентификаторов."""
+    populated_collection.create_named_collection("Любимые")
+    populated_collection.add_movies_to_named_collection(["Начало", "Матрица", "Криминальное чтиво"], "Любимые")
+    assert [m.title for m in populated_collection.search_movies(genre="фантаст", in_collection="Любимые")] == [
+        "Матрица", "Начало"
+    ]
+    assert [m.title for m in populated_collection.search_movies(in_collection="Любимые", order_by="-year", limit=1)] == [
+        "Начало"
+    ]
+
+    # Освободившийся идентификатор получает новый фильм, но в подборку он не попадает
+    populated_collection.remove_movie("Матрица")
+    populated_collection.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0))
+    assert [m.title for m in populated_collection.search_movies(genre="фантаст", in_collection="Любимые")] == ["Начало"]
+    with pytest.raises(CollectionNotFoundError):
+        populated_collection.search_movies(in_collection="Несуществующая")
+
+def test_search_cache_sees_collection_changes():
+    """Тест сброса кеша поиска при изменении подборки."""
+    collection = MovieCollection(search_cache_size=8)
+    collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    collection.create_named_collection("Любимые")
+    assert collection.search_movies(in_collection="Любимые") == ()
+    collection.add_movie_to_named_collection("Начало", "Любимые")
+    assert [m.title for m in collection.search_movies(in_collection="Любимые")] == ["Начало"]
+
+def test_facets(populated_collection: MovieCollection):
+    """Тест счетчиков по полям: без критериев, с критериями и после изменений."""
+    facets = populated_collection.facets()
+    assert facets.total == 5
+    assert facets.genres == {"Научная фантастика": 3, "Боевик": 1, "Криминал": 1}
+    assert facets.directors == {"Кристофер Нолан": 3, "Квентин Тарантино": 1, "Вачовски": 1}
+    assert facets.decades == {1990: 2, 2000: 1, 2010: 2}
+    assert facets.ratings == {8: 4, 9: 1}
+    assert facets.unrated == 0
+
+    filtered = populated_collection.facets(director="нолан")
+    assert filtered.total == 3
+    assert filtered.genres == {"Научная фантастика": 2, "Боевик": 1}
+    assert filtered.decades == {2000: 1, 2010: 2}
+
+    populated_collection.remove_movie("Темный рыцарь")
+    populated_collection.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика"))
+    facets = populated_collection.facets()
+    assert facets.genres == {"Научная фантастика": 4, "Криминал": 1}
+    assert "Боевик" not in facets.genres
+    assert facets.decades == {1990: 2, 2010: 2, 2020: 1}
+    assert facets.ratings == {8: 4}
+    assert facets.unrated == 1
+    assert populated_collection.copy().facets() == facets
+
+def test_facets_reject_wrong_year(populated_collection: MovieCollection):
+    """Тест того, что фильм с годом не того типа не попадает ни в коллекцию, ни в счетчики."""
+    movie = Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика")
+    movie.year = "2021"
+    before = populated_collection.facets()
+    with pytest.raises(TypeError):
+        populated_collection.add_movie(movie)
+    assert "Дюна" not in [m.title for m in populated_collection.list_all_movies()]
+    assert populated_collection.facets() == before
+
+def test_search_movies_with_facets(populated_collection: MovieCollection):
+    """Тест страницы поиска вместе со счетчиками по всем совпадениям."""
+    movies, facets = populated_collection.search_movies_with_facets(genre="фантаст", order_by="-rating", limit=2)
+    assert [m.title for m in movies] == ["Начало", "Матрица"]
+    assert facets.total == 3
+    assert facets.directors == {"Кристофер Нолан": 2, "Вачовски": 1}
+    assert facets == populated_collection.facets(genre="фантаст")
+
+    movies, facets = populated_collection.search_movies_with_facets(offset=4)
+    assert [m.title for m in movies] == ["Темный рыцарь"]
+    assert facets == populated_collection.facets()
+
+def test_fuzzy_search(populated_collection: MovieCollection):
+    """Тест поиска названий с опечатками и обновления индекса при изменениях."""
+    assert [m.title for m in populated_collection.fuzzy_search("Интерстелар")] == ["Интерстеллар"]
+    assert [m.title for m in populated_collection.fuzzy_search(" МАТРИЦЫ ", max_distance=1)] == ["Матрица"]
+    assert populated_collection.fuzzy_search("Начало", max_distance=0)[0].title == "Начало"
+
+    populated_collection.add_movie(Movie("Начала", "Кто-то", 2001, "Драма"))
+    populated_collection.remove_movie("Интерстеллар")
+    assert populated_collection.fuzzy_search("Интерстелар") == []
+    assert [m.title for m in populated_collection.fuzzy_search("Начало", limit=None)] == ["Начало", "Начала"]
+    assert [m.title for m in populated_collection.fuzzy_search("Начало", limit=1)] == ["Начало"]
+    assert [m.title for m in populated_collection.copy().fuzzy_search("Начал")] == ["Начала", "Начало"]
+    with pytest.raises(ValueError):
+        populated_collection.fuzzy_search("Начало", max_distance=-1)
+
+def test_fuzzy_index_is_maintained_from_start(populated_collection: MovieCollection, tmp_path):
+    """Тест индекса fuzzy_search, построенного при создании коллекции и при загрузке снимка."""
+    collection = MovieCollection(fuzzy_index=True)
+    collection.add_movies(populated_collection.list_all_movies())
+    assert collection._fuzzy is not None and len(collection._fuzzy._by_length) > 0
+    assert [m.title for m in collection.fuzzy_search("Интерстелар")] == ["Интерстеллар"]
+
+    path = str(tmp_path / "catalog.snap")
+    collection.save_snapshot(path)
+    restored = MovieCollection.open_snapshot(path, fuzzy_index=True)
+    assert [m.title for m in restored.fuzzy_search("Матрицы", max_distance=1)] == ["Матрица"]
+    restored.remove_movie("Матрица")
+    assert restored.fuzzy_search("Матрицы", max_distance=1) == []
+
+def test_autocomplete(populated_collection: MovieCollection):
+    """Тест подсказок по префиксу в порядке названий и рейтинга."""
+    populated_collection.add_movie(Movie("Интерстеллар 2", "Кто-то", 2030, "Научная фантастика"))
+    populated_collection.add_movie(Movie("Игла", "Рашид Нугманов", 1988, "Драма", 7.5))
+    assert [m.title for m in populated_collection.autocomplete("  ин")] == ["Интерстеллар", "Интерстеллар 2"]
+    assert [m.title for m in populated_collection.autocomplete("и", limit=2)] == ["Игла", "Интерстеллар"]
+    assert [m.title for m in populated_collection.autocomplete("И", order_by="-rating")] == [
+        "Интерстеллар", "Игла", "Интерстеллар 2"
+    ]
+    assert [m.title for m in populated_collection.autocomplete("", limit=2, order_by="-rating")] == [
+        "Темный рыцарь", "Криминальное чтиво"
+    ]
+    assert populated_collection.autocomplete("я") == []
+
+    populated_collection.remove_movie("Интерстеллар")
+    assert [m.title for m in populated_collection.autocomplete("ин")] == ["Интерстеллар 2"]
+    with pytest.raises(ValueError):
+        populated_collection.autocomplete("ин", order_by="year")
+
+def test_autocomplete_rating_paths_agree():
+    """Тест совпадения обхода индекса рейтинга и перебора отрезка с search_movies."""
+    collection = MovieCollection()
+    collection.add_movies(
+        Movie(f"{letter}{number}", "Режиссер", 2000, "Драма", None if number % 4 == 0 else number % 7)
+        for letter in "абв" for number in range(30)
+    )
+    # Фильмам на "г" рейтинг не задан: при обходе индекса рейтинга они добираются отдельно
+    collection.add_movies(Movie(f"г{number}", "Режиссер", 2000, "Драма") for number in range(30))
+    for prefix in ("", "а", "б1", "в2", "г"):
+        for limit in (1, 5, 40, 100):
+            expected = [m.key for m in collection.search_movies(order_by="-rating")
+                        if m.key.startswith(prefix)][:limit]
+            assert [m.key for m in collection.autocomplete(prefix, limit, order_by="-rating")] == expected
+
+def test_change_events(populated_collection: MovieCollection):
+    """Тест событий изменений от всех изменяющих методов и отписки."""
+    events = []
+    populated_collection.subscribe(events.append)
+    dune = Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0)
+    populated_collection.add_movie(dune)
+    populated_collection.add_movies([Movie("Игла", "Рашид Нугманов", 1988, "Драма")])
+    populated_collection.create_named_collection("Любимые")
+    populated_collection.add_movie_to_named_collection("Дюна", "Любимые")
+    populated_collection.add_movie_to_named_collection("Дюна", "Любимые")
+    populated_collection.add_movies_to_named_collection(["Игла", "Матрица"], "Любимые")
+    populated_collection.remove_movie_from_named_collection("Матрица", "Любимые")
+    populated_collection.remove_movie("Дюна")
+    populated_collection.remove_named_collection("Любимые")
+
+    needle = populated_collection.get_movie("Игла")
+    matrix = populated_collection.get_movie("Матрица")
+    assert events == [
+        MovieAdded(dune),
+        MovieAdded(needle),
+        CollectionCreated("Любимые"),
+        MovieAddedToCollection("Любимые", dune),
+        MovieAddedToCollection("Любимые", needle),
+        MovieAddedToCollection("Любимые", matrix),
+        MovieRemovedFromCollection("Любимые", matrix),
+        MovieRemovedFromCollection("Любимые", dune),
+        MovieRemoved(dune),
+        MovieRemovedFromCollection("Любимые", needle),
+        CollectionRemoved("Любимые"),
+    ]
+
+    populated_collection.unsubscribe(events.append)
+    populated_collection.remove_movie("Игла")
+    assert len(events) == 11
+    assert populated_collection.copy()._listeners == []
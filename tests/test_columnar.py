@@ -0,0 +1,115 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from movie_management.movie import Movie
+from movie_management.collection import MovieCollection
+from movie_management.columnar import ColumnarMovieCollection
+from movie_management.exceptions import MovieAlreadyExistsError, MovieNotFoundError
+from movie_management.query import between, contains
+
+MOVIES = [
+    Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8),
+    Movie("Темный рыцарь", "Кристофер Нолан", 2008, "Боевик", 9.0),
+    Movie("Интерстеллар", "Кристофер Нолан", 2014, "Научная фантастика", 8.6),
+    Movie("Криминальное чтиво", "Квентин Тарантино", 1994, "Криминал", 8.9),
+    Movie("Матрица", "Вачовски", 1999, "Научная фантастика", 8.7),
+    Movie("Довод", "Кристофер Нолан", 2020, "Научная фантастика"),
+]
+
+@pytest.fixture
+def columnar_collection() -> ColumnarMovieCollection:
+    collection = ColumnarMovieCollection()
+    for movie in MOVIES:
+        collection.add_movie(movie)
+    return collection
+
+def test_columnar_get_movie(columnar_collection: ColumnarMovieCollection):
+    """Тест восстановления фильма из колоночного хранилища."""
+    movie = columnar_collection.get_movie(" довод ")
+    assert movie.title == "Довод"
+    assert movie.year == 2020
+    assert movie.rating is None
+    assert columnar_collection.get_movie("Начало").rating == 8.8
+    assert len(columnar_collection) == len(MOVIES)
+
+    with pytest.raises(MovieAlreadyExistsError):
+        columnar_collection.add_movie(Movie("начало", "Кто-то", 2000, "Драма"))
+
+def test_columnar_search_matches_default_backend(columnar_collection: ColumnarMovieCollection):
+    """Тест совпадения результатов поиска с обычной коллекцией."""
+    reference = MovieCollection()
+    for movie in MOVIES:
+        reference.add_movie(movie)
+
+    queries = [
+        {},
+        {"director": "нолан"},
+        {"genre": "Научная фантастика", "min_rating": 8.7},
+        {"year": 1994},
+        {"title": "ат", "genre": "фант"},
+        {"min_rating": 7.0},
+    ]
+    for query in queries:
+        expected = [m.title for m in reference.search_movies(**query)]
+        assert [m.title for m in columnar_collection.search_movies(**query)] == expected
+
+def test_columnar_remove_and_compact(columnar_collection: ColumnarMovieCollection):
+    """Тест удаления с пометкой строк и последующим уплотнением."""
+    columnar_collection.create_named_collection("Нолан")
+    columnar_collection.add_movie_to_named_collection("Начало", "Нолан")
+    columnar_collection.add_movie_to_named_collection("Довод", "Нолан")
+
+    columnar_collection.remove_movie("Начало")
+    columnar_collection.remove_movie("Матрица")
+    with pytest.raises(MovieNotFoundError):
+        columnar_collection.get_movie("Начало")
+
+    columnar_collection.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0))
+    assert [m.title for m in columnar_collection] == [
+        "Довод", "Дюна", "Интерстеллар", "Криминальное чтиво", "Темный рыцарь"
+    ]
+    assert [m.title for m in columnar_collection.search_movies(genre="фант")] == ["Довод", "Дюна", "Интерстеллар"]
+    assert [m.title for m in columnar_collection.get_movies_in_named_collection("Нолан")] == ["Довод"]
+
+def test_columnar_copy_is_independent(columnar_collection: ColumnarMovieCollection):
+    """Тест копии колоночной коллекции: столбцы и подборки не общие с оригиналом."""
+    columnar_collection.create_named_collection("Нолан")
+    columnar_collection.add_movie_to_named_collection("Начало", "Нолан")
+    clone = columnar_collection.copy()
+    assert isinstance(clone, ColumnarMovieCollection) and clone._movies is clone._columns
+
+    clone.remove_movie("Начало")
+    clone.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0))
+    columnar_collection.add_movie(Movie("Чужой", "Ридли Скотт", 1979, "Ужасы", 8.5))
+
+    assert [m.title for m in clone.search_movies(min_rating=8.0, genre="фант")] == ["Дюна", "Интерстеллар", "Матрица"]
+    assert [m.title for m in columnar_collection.search_movies(min_rating=8.5)] == [
+        "Интерстеллар", "Криминальное чтиво", "Матрица", "Начало", "Темный рыцарь", "Чужой"
+    ]
+    assert [m.title for m in columnar_collection.get_movies_in_named_collection("Нолан")] == ["Начало"]
+    assert clone.get_movies_in_named_collection("Нолан") == []
+    assert columnar_collection.search_movies(director="вильнёв") == []
+
+def test_columnar_search_pages(columnar_collection: ColumnarMovieCollection):
+    """Тест сортировки и страниц колоночного поиска на совпадение с обычной коллекцией."""
+    reference = MovieCollection()
+    for movie in MOVIES:
+        reference.add_movie(movie)
+    for order_by in ("title", "-title", "year", "-rating"):
+        expected = [m.title for m in reference.search_movies(genre="фант", order_by=order_by, offset=1, limit=2)]
+        assert [m.title for m in columnar_collection.search_movies(genre="фант", order_by=order_by, offset=1, limit=2)] == expected
+
+def test_columnar_query_matches_default_backend(columnar_collection: ColumnarMovieCollection):
+    """Тест составных запросов к колоночному хранилищу на совпадение с обычной коллекцией."""
+    reference = MovieCollection()
+    for movie in MOVIES:
+        reference.add_movie(movie)
+    queries = [
+        between("year", 1995, 2015) & ~contains("director", "нолан"),
+        contains("genre", "боевик") | between("rating", high=8.7),
+        contains("title", "ат") | ~between("rating", 0),
+    ]
+    for query in queries:
+        expected = [m.title for m in reference.query_movies(query, order_by="-year")]
+        assert [m.title for m in columnar_collection.query_movies(query, order_by="-year")] == expected
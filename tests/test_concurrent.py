@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+from movie_management.movie import Movie
+from movie_management.concurrent import ConcurrentMovieCollection
+from movie_management.exceptions import MovieAlreadyExistsError, MovieNotFoundError
+
+
+@pytest.fixture
+def concurrent_collection() -> ConcurrentMovieCollection:
+    collection = ConcurrentMovieCollection()
+    collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    collection.add_movie(Movie("Матрица", "Вачовски", 1999, "Научная фантастика", 8.7))
+    return collection
+
+def test_published_version_is_immutable(concurrent_collection: ConcurrentMovieCollection):
+    """Тест того, что изменения не затрагивают ранее полученную версию."""
+    version = concurrent_collection.version()
+    concurrent_collection.remove_movie("Начало")
+    concurrent_collection.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0))
+
+    assert [m.title for m in version] == ["Матрица", "Начало"]
+    assert [m.title for m in concurrent_collection] == ["Дюна", "Матрица"]
+    assert [m.title for m in concurrent_collection.search_movies(genre="фант", min_rating=8.5)] == ["Матрица"]
+    with pytest.raises(MovieNotFoundError):
+        concurrent_collection.get_movie("Начало")
+
+def test_batch_publishes_atomically(concurrent_collection: ConcurrentMovieCollection):
+    """Тест пакета изменений: публикация при выходе и откат при исключении."""
+    with concurrent_collection.batch() as draft:
+        draft.create_named_collection("Избранное")
+        concurrent_collection.add_movie_to_named_collection("Начало", "Избранное")
+        assert concurrent_collection.list_named_collections() == []
+    assert [m.title for m in concurrent_collection.get_movies_in_named_collection("Избранное")] == ["Начало"]
+
+    with pytest.raises(MovieAlreadyExistsError):
+        with concurrent_collection.batch() as draft:
+            draft.remove_movie("Матрица")
+            draft.add_movie(Movie("начало", "Кто-то", 2000, "Драма"))
+    assert len(concurrent_collection) == 2
+
+def test_readers_and_writer_stress():
+    """Стресс-тест: несколько читающих потоков и один пишущий."""
+    collection = ConcurrentMovieCollection()
+    collection.create_named_collection("Пары")
+    errors = []
+    done = threading.Event()
+
+    def writer() -> None:
+        try:
+            for number in range(300):
+                # Фильмы добавляются и удаляются парами, поэтому в любой версии их четное число
+                # и каждый фильм состоит в подборке.
+                with collection.batch() as draft:
+                    for suffix in ("А", "Б"):
+                        draft.add_movie(Movie(f"Фильм {number} {suffix}", "Режиссер", 2000 + number % 20, "Драма", 7.0))
+                        draft.add_movie_to_named_collection(f"Фильм {number} {suffix}", "Пары")
+                if number % 3 == 0:
+                    with collection.batch() as draft:
+                        draft.remove_movie(f"Фильм {number} А")
+                        draft.remove_movie(f"Фильм {number} Б")
+        except Exception as error:
+            errors.append(error)
+        finally:
+            done.set()
+
+    def reader() -> None:
+        try:
+            while not done.is_set():
+                titles = [movie.title for movie in collection]
+                assert len(titles) % 2 == 0
+                for title in titles[:5]:
+                    collection.get_movie(title)
+                version = collection.version()
+                found = version.search_movies(director="режиссер", genre="драма")
+                assert len(found) == len(version) == len(version.get_movies_in_named_collection("Пары"))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(collection) == 2 * 200
@@ -0,0 +1,74 @@
+import random
+
+from movie_management.fuzzy import FuzzyIndex, levenshtein
+
+def test_levenshtein():
+    """Тест расстояния Левенштейна и досрочного выхода по порогу."""
+    assert levenshtein("интерстеллар", "интерстелар") == 1
+    assert levenshtein("матрица", "матрица") == 0
+    assert levenshtein("", "дюна") == 4
+    assert levenshtein("kitten", "sitting") == 3
+    assert levenshtein("kitten", "sitting", 1) == 2
+    assert levenshtein("начало", "темный рыцарь", 2) == 3
+
+def test_levenshtein_limit_matches_full_distance():
+    """Тест совпадения ограниченного расстояния с полным на случайных строках."""
+    rng = random.Random(7)
+    for _ in range(500):
+        first = "".join(rng.choice("абв") for _ in range(rng.randint(0, 8)))
+        second = "".join(rng.choice("абв") for _ in range(rng.randint(0, 8)))
+        full = levenshtein(first, second)
+        for limit in range(4):
+            assert levenshtein(first, second, limit) == min(full, limit + 1)
+
+def test_fuzzy_index_search():
+    """Тест поиска с опечатками, коротких запросов и удаления строк."""
+    index = FuzzyIndex()
+    for title in ("интерстеллар", "начало", "матрица", "дюна", "довод", "ран"):
+        index.add(title)
+    assert index.search("интерстелар", 1) == [(1, "интерстеллар")]
+    assert index.search("матрицв", 2) == [(1, "матрица")]
+    assert index.search("дуна", 2) == [(1, "дюна")]
+    assert index.search("рак", 2) == [(1, "ран")]
+
+    index.remove("интерстеллар")
+    assert index.search("интерстелар", 2) == []
+
+def test_fuzzy_index_matches_brute_force():
+    """Тест полноты отбора кандидатов по сравнению с полным перебором."""
+    rng = random.Random(3)
+    texts = {"".join(rng.choice("абвгд") for _ in range(rng.randint(1, 10))) for _ in range(300)}
+    index = FuzzyIndex()
+    for text in texts:
+        index.add(text)
+    for _ in range(50):
+        query = "".join(rng.choice("абвгд") for _ in range(rng.randint(1, 10)))
+        for max_distance in (0, 1, 2):
+            expected = sorted((levenshtein(query, text), text) for text in texts
+                              if levenshtein(query, text) <= max_distance)
+            assert sorted(index.search(query, max_distance)) == expected
+
+def test_fuzzy_index_long_strings_match_brute_force():
+    """Тест отбора кандидатов на длинных строках, где запрос задевает много n-грамм."""
+    rng = random.Random(11)
+    words = ["темный", "рыцарь", "начало", "ночь", "город", "море"]
+    texts = {" ".join(rng.choice(words) for _ in range(rng.randint(1, 4))) + f" {number}" for number in range(300)}
+    index = FuzzyIndex()
+    for text in texts:
+        index.add(text)
+    for _ in range(100):
+        query = list(rng.choice(sorted(texts)))
+        for _ in range(rng.randint(0, 3)):
+            position = rng.randrange(len(query))
+            operation = rng.random()
+            if operation < 0.3:
+                query[position] = rng.choice("аоы")
+            elif operation < 0.6:
+                del query[position]
+            else:
+                query.insert(position, rng.choice("аоы"))
+        query_text = "".join(query)
+        distances = [(levenshtein(query_text, text, 2), text) for text in texts]
+        for max_distance in (1, 2):
+            expected = sorted(pair for pair in distances if pair[0] <= max_distance)
+            assert sorted(index.search(query_text, max_distance)) == expected
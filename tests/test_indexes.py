@@ -0,0 +1,106 @@
+from movie_management.indexes import Bitmap, HashIndex, NGramIndex, SortedIndex
+
+def test_hash_index_add_remove():
+    """Тест добавления и удаления ключей в хеш-индексе."""
+    index = HashIndex()
+    index.add("кристофер нолан", "начало")
+    index.add("кристофер нолан", "интерстеллар")
+    index.add("вачовски", "матрица")
+    assert index.get("кристофер нолан") == {"начало", "интерстеллар"}
+
+    index.remove("вачовски", "матрица")
+    assert index.get("вачовски") == set()
+    assert len(index) == 1
+
+def test_hash_index_matching():
+    """Тест поиска значений хеш-индекса по предикату."""
+    index = HashIndex()
+    index.add("научная фантастика", "начало")
+    index.add("боевик", "темный рыцарь")
+    postings = index.matching(lambda value: "фант" in value)
+    assert postings == [{"начало"}]
+
+def test_sorted_index_at_least():
+    """Тест выборки ключей с значением не ниже порога."""
+    index = SortedIndex()
+    index.add(8.8, "начало")
+    index.add(9.0, "темный рыцарь")
+    index.add(8.6, "интерстеллар")
+    index.add(None, "довод")
+
+    view = index.at_least(8.8)
+    assert len(view) == 2
+    assert sorted(view) == ["начало", "темный рыцарь"]
+    assert "начало" in view
+    assert "интерстеллар" not in view
+    assert "довод" not in view
+
+    index.remove(9.0, "темный рыцарь")
+    assert list(index.at_least(8.8)) == ["начало"]
+
+def test_sorted_index_between():
+    """Тест выборки ключей со значением в диапазоне, включая границы."""
+    index = SortedIndex()
+    index.add_many([(8.8, "начало"), (9.0, "темный рыцарь"), (8.6, "интерстеллар"), (8.7, "матрица")])
+
+    view = index.between(8.6, 8.8)
+    assert len(view) == 3
+    assert list(view) == ["интерстеллар", "матрица", "начало"]
+    assert "темный рыцарь" not in view
+    assert list(index.between(high=8.6)) == ["интерстеллар"]
+    assert len(index.between(9.1)) == 0
+
+def test_ngram_index_candidates():
+    """Тест отбора кандидатов по n-граммам."""
+    index = NGramIndex(3)
+    index.add("начало", "начало")
+    index.add("матрица", "матрица")
+    assert index.candidates("нача") == {"начало"}
+    assert index.candidates("ица") == {"матрица"}
+    assert index.candidates("абв") == set()
+    assert index.candidates("ма") is None
+
+    index.remove("матрица", "матрица")
+    assert index.candidates("ица") == set()
+
+def test_bitmap():
+    """Тест битовой карты и операций над ней."""
+    first, second = Bitmap(), Bitmap()
+    for position in (0, 5, 17, 1000):
+        first.add(position)
+    for position in (3, 5, 1000):
+        second.add(position)
+    assert not first.add(5)
+    assert 17 in first and 18 not in first and 5000 not in first
+    assert len(first) == 4
+    assert list(first & second) == [5, 1000]
+    assert list(first | second) == [0, 3, 5, 17, 1000]
+    assert list(first - second) == [0, 17]
+    assert first.discard(17) and not first.discard(17)
+    assert list(first) == [0, 5, 1000]
+    assert len(first - first) == 0
+
+def test_bitmap_sparse_and_dense():
+    """Тест перехода множества между отсортированным массивом и битовой картой."""
+    sparse = Bitmap()
+    assert sparse.add(1_000_000) and sparse.add(7)
+    assert sparse._bits is None and list(sparse) == [7, 1_000_000]
+
+    dense = Bitmap.from_sorted(range(0, 2000, 2))
+    assert dense._ids is None and len(dense) == 1000
+    assert 998 in dense and 999 not in dense and -1 not in dense
+
+    sparse.add(8)
+    assert list(sparse & dense) == [8] and list(dense & sparse) == [8]
+    assert len(sparse | dense) == 1002
+    assert list(sparse - dense) == [7, 1_000_000]
+    assert len(dense - sparse) == 999
+    sparse.discard(8)
+
+    for position in range(0, 1990, 2):
+        dense.discard(position)
+    assert dense._bits is None and list(dense) == [1990, 1992, 1994, 1996, 1998]
+
+    clone = sparse.copy()
+    clone.discard(7)
+    assert list(sparse) == [7, 1_000_000] and list(clone) == [1_000_000]
@@ -0,0 +1,123 @@
+import os
+import struct
+import pytest
+from movie_management.movie import Movie
+from movie_management.collection import MovieCollection
+from movie_management.exceptions import JournalCorruptedError, MovieNotFoundError
+from movie_management import journal, snapshot
+
+def open_collection(tmp_path, **kwargs) -> MovieCollection:
+    return MovieCollection.open_journal(str(tmp_path / "catalog.wal"), str(tmp_path / "catalog.snap"), **kwargs)
+
+def fill(collection: MovieCollection) -> None:
+    collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    collection.add_movies([
+        Movie("Интерстеллар", "Кристофер Нолан", 2014, "Научная фантастика", 8.6),
+        Movie("Довод", "Кристофер Нолан", 2020, "Научная фантастика"),
+        Movie("Матрица", "Вачовски", 1999, "Научная фантастика", 8.7),
+    ])
+    collection.create_named_collection("Нолан")
+    collection.create_named_collection("Временная")
+    collection.add_movies_to_named_collection(["Начало", "Интерстеллар"], "Нолан")
+    collection.add_movie_to_named_collection("Довод", "Нолан")
+    collection.remove_movie_from_named_collection("Интерстеллар", "Нолан")
+    collection.remove_named_collection("Временная")
+    collection.remove_movie("Матрица")
+
+def check(collection: MovieCollection) -> None:
+    assert [m.title for m in collection] == ["Довод", "Интерстеллар", "Начало"]
+    assert collection.get_movie("Довод").rating is None
+    assert collection.list_named_collections() == ["Нолан"]
+    assert [m.title for m in collection.get_movies_in_named_collection("Нолан")] == ["Довод", "Начало"]
+    with pytest.raises(MovieNotFoundError):
+        collection.get_movie("Матрица")
+
+def test_journal_replay_restores_state(tmp_path):
+    """Тест восстановления коллекции из журнала."""
+    collection = open_collection(tmp_path)
+    fill(collection)
+    collection.close_journal()
+
+    restored = open_collection(tmp_path)
+    check(restored)
+    restored.close_journal()
+
+def test_journal_compaction(tmp_path):
+    """Тест сворачивания журнала в базовый снимок."""
+    collection = open_collection(tmp_path, compact_bytes=200, fsync_batch=1)
+    fill(collection)
+    collection.close_journal()
+    assert os.path.exists(tmp_path / "catalog.snap")
+    assert os.path.getsize(tmp_path / "catalog.wal") < 200
+
+    restored = open_collection(tmp_path)
+    check(restored)
+    restored.close_journal()
+
+def test_journal_compaction_syncs_snapshot_first(tmp_path, monkeypatch):
+    """Тест порядка сворачивания: снимок и его каталог сброшены на диск до очистки журнала."""
+    events = []
+    sync_directory = snapshot.fsync_directory
+    truncate = journal.Journal.truncate
+    monkeypatch.setattr(os, "fsync", lambda descriptor: events.append(os.fstat(descriptor).st_ino))
+    monkeypatch.setattr(snapshot, "fsync_directory", lambda path: (events.append("каталог"), sync_directory(path)))
+    monkeypatch.setattr(journal.Journal, "truncate", lambda self: (events.append("очистка"), truncate(self)))
+
+    collection = open_collection(tmp_path, compact_bytes=10 ** 9)
+    fill(collection)
+    events.clear()
+    collection.compact_journal()
+    snapshot_inode = os.stat(tmp_path / "catalog.snap").st_ino
+    assert events.index(snapshot_inode) < events.index("каталог") < events.index("очистка")
+    collection.close_journal()
+
+    restored = open_collection(tmp_path)
+    check(restored)
+    restored.close_journal()
+
+def test_journal_torn_tail_is_dropped(tmp_path):
+    """Тест отбрасывания недописанной последней записи журнала."""
+    collection = open_collection(tmp_path)
+    fill(collection)
+    collection.close_journal()
+    path = tmp_path / "catalog.wal"
+    size = os.path.getsize(path)
+    with open(path, "ab") as journal_file:
+        journal_file.write(b"\x01\xff\x00\x00\x00garbage")
+
+    restored = open_collection(tmp_path)
+    check(restored)
+    restored.close_journal()
+    assert os.path.getsize(path) == size
+
+def test_journal_corrupted_middle_record_is_not_truncated(tmp_path):
+    """Тест испорченной длины записи в середине журнала: ошибка вместо усечения."""
+    collection = open_collection(tmp_path)
+    fill(collection)
+    collection.close_journal()
+    path = tmp_path / "catalog.wal"
+    data = bytearray(path.read_bytes())
+    first_length = journal.RECORD_HEADER.unpack_from(data, 0)[1]
+    second = journal.RECORD_HEADER.size + first_length
+    length = journal.RECORD_HEADER.unpack_from(data, second)[1]
+    struct.pack_into("<I", data, second + 1, length + 10 ** 6)
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(JournalCorruptedError):
+        open_collection(tmp_path)
+    assert os.path.getsize(path) == len(data)
+
+def test_journal_zero_tail_is_dropped(tmp_path):
+    """Тест отбрасывания нулевого хвоста, который может остаться после сбоя."""
+    collection = open_collection(tmp_path)
+    fill(collection)
+    collection.close_journal()
+    path = tmp_path / "catalog.wal"
+    size = os.path.getsize(path)
+    with open(path, "ab") as journal_file:
+        journal_file.write(bytes(4096))
+
+    restored = open_collection(tmp_path)
+    check(restored)
+    restored.close_journal()
+    assert os.path.getsize(path) == size
@@ -1,3 +1,4 @@
+import pickle
 import pytest
 from movie_management.movie import Movie
 
@@ -57,4 +58,24 @@ def test_movie_hash():
 def test_movie_empty_title():
     """Тест создания фильма с пустым названием."""
     with pytest.raises(ValueError, match="Название фильма не может быть пустым."):
-        Movie("", "Режиссер", 2000, "Жанр")
\ No newline at end of file
+        Movie("", "Режиссер", 2000, "Жанр")
+
+def test_movie_key_and_slots():
+    """Тест нормализованного ключа и компактного представления фильма."""
+    movie = Movie(" Начало ", "Кристофер Нолан", 2010, "Научная фантастика", 8.8)
+    assert movie.key == "начало"
+    assert movie == Movie("НАЧАЛО", "Кто-то Другой", 2010, "Боевик")
+    assert not hasattr(movie, "__dict__")
+
+    movie.title = "Довод"
+    assert movie.key == "довод"
+    assert hash(movie) == hash(Movie("довод", "Кристофер Нолан", 2020, "Научная фантастика"))
+
+def test_movie_pickle_recomputes_hash():
+    """Тест сериализации фильма: хеш ключа вычисляется заново при загрузке."""
+    movie = Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8)
+    movie._hash = 0  # хеш из процесса с другим PYTHONHASHSEED
+    restored = pickle.loads(pickle.dumps(movie))
+    assert repr(restored) == repr(movie)
+    assert hash(restored) == hash("начало")
+    assert restored in {Movie("НАЧАЛО", "Кто-то", 2000, "Драма")}
@@ -0,0 +1,93 @@
+import pytest
+from movie_management.movie import Movie
+from movie_management.collection import MovieCollection
+from movie_management.exceptions import CollectionNotFoundError
+from movie_management.query import Query, between, contains, in_collection
+
+MOVIES = [
+    Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8),
+    Movie("Темный рыцарь", "Кристофер Нолан", 2008, "Боевик", 9.0),
+    Movie("Интерстеллар", "Кристофер Нолан", 2014, "Научная фантастика", 8.6),
+    Movie("Криминальное чтиво", "Квентин Тарантино", 1994, "Криминал", 8.9),
+    Movie("Матрица", "Вачовски", 1999, "Научная фантастика", 8.7),
+    Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика"),
+]
+
+@pytest.fixture(params=[None, 3])
+def collection(request) -> MovieCollection:
+    collection = MovieCollection(ngram_size=request.param)
+    collection.add_movies(MOVIES)
+    return collection
+
+def titles(movies):
+    return [movie.title for movie in movies]
+
+def test_query_boolean_logic(collection: MovieCollection):
+    """Тест диапазонов, ИЛИ, НЕ и верхней границы рейтинга."""
+    query = (between("year", 1990, 2015)
+             & (contains("genre", "фантаст") | contains("genre", "криминал"))
+             & ~contains("director", "нолан"))
+    assert titles(collection.query_movies(query)) == ["Криминальное чтиво", "Матрица"]
+    assert titles(collection.query_movies(query & between("rating", high=8.8))) == ["Матрица"]
+    assert titles(collection.query_movies(between("rating", 8.7, 8.9), order_by="-rating")) == [
+        "Криминальное чтиво", "Начало", "Матрица"
+    ]
+    assert titles(collection.query_movies(~between("rating", 8.0))) == ["Дюна"]
+    assert titles(collection.query_movies(contains("title", "ат") | between("year", 2020), limit=2)) == [
+        "Дюна", "Матрица"
+    ]
+
+def test_query_matches_search_movies(collection: MovieCollection):
+    """Тест совпадения составного запроса с эквивалентным search_movies."""
+    query = contains("director", "нолан") & between("year", 2010, 2010) & between("rating", 8.5)
+    assert titles(collection.query_movies(query)) == titles(
+        collection.search_movies(director="нолан", year=2010, min_rating=8.5))
+
+def test_query_in_collection(collection: MovieCollection):
+    """Тест условия подборки и ошибки для несуществующей подборки."""
+    collection.create_named_collection("Любимые")
+    collection.add_movies_to_named_collection(["Начало", "Матрица", "Дюна"], "Любимые")
+    assert titles(collection.query_movies(in_collection("Любимые") & ~contains("director", "нолан"))) == [
+        "Дюна", "Матрица"
+    ]
+    with pytest.raises(CollectionNotFoundError):
+        collection.query_movies(in_collection("Несуществующая"))
+
+def test_compiled_query_explain(collection: MovieCollection):
+    """Тест порядка условий по избирательности и счетчиков explain()."""
+    compiled = collection.compile_query(between("year", 1990, 2020) & contains("genre", "криминал"))
+    plan = compiled.explain()
+    assert plan.total == 6
+    assert plan.matched == 1
+    driver = plan.clauses[0]
+    assert driver.by_index
+    assert driver.clause == "genre содержит 'криминал'"
+    assert driver.eliminated == 5
+    assert [report.clause for report in plan.clauses[1:]] == ["year в [1990, 2020]"]
+    assert plan.clauses[1].evaluated == 1
+    assert "найдено: 1" in str(plan)
+
+    # Условия И проверяются до первого непрошедшего
+    plan = collection.compile_query(~contains("title", "а") & ~contains("title", "ч")).explain()
+    first, second = plan.clauses[0], plan.clauses[2]
+    assert first.evaluated == 6
+    assert second.evaluated == 6 - first.eliminated
+
+def test_compiled_query_sees_changes(collection: MovieCollection):
+    """Тест перестроения плана после изменения коллекции."""
+    compiled = collection.compile_query(between("year", 2015) & contains("genre", "фантаст"))
+    assert titles(compiled.run()) == ["Дюна"]
+    collection.add_movie(Movie("Довод", "Кристофер Нолан", 2020, "Научная фантастика", 7.8))
+    assert titles(compiled.run()) == ["Довод", "Дюна"]
+
+def test_query_rejects_unknown_fields():
+    """Тест проверки полей условий."""
+    with pytest.raises(ValueError):
+        contains("year", "19")
+    with pytest.raises(ValueError):
+        between("title", "А", "Б")
+
+def test_query_is_abstract():
+    """Тест того, что базовый класс условий нельзя создать без describe и matches."""
+    with pytest.raises(TypeError):
+        Query()
@@ -0,0 +1,91 @@
+import asyncio
+import http.client
+import json
+import threading
+from urllib.parse import quote
+
+import pytest
+from main import MovieServer, MovieService
+from movie_management.movie import Movie
+from movie_management.concurrent import ConcurrentMovieCollection
+
+
+@pytest.fixture
+def server_port():
+    collection = ConcurrentMovieCollection()
+    collection.add_movies([
+        Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8),
+        Movie("Темный рыцарь", "Кристофер Нолан", 2008, "Боевик", 9.0),
+        Movie("Матрица", "Вачовски", 1999, "Научная фантастика", 8.7),
+    ])
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(MovieServer(MovieService(collection)).start("127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.close()
+
+def request(connection: http.client.HTTPConnection, method: str, path: str, body=None):
+    payload = None if body is None else json.dumps(body).encode("utf-8")
+    connection.request(method, quote(path, safe="/?=&"), body=payload)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+def test_server_endpoints_over_keep_alive(server_port: int):
+    """Тест маршрутов сервера через одно постоянное соединение."""
+    connection = http.client.HTTPConnection("127.0.0.1", server_port)
+    assert request(connection, "GET", "/movies/начало")[1]["director"] == "Кристофер Нолан"
+    status, found = request(connection, "GET", "/search?genre=фант&order_by=-rating")
+    assert status == 200
+    assert [movie["title"] for movie in found] == ["Начало", "Матрица"]
+    assert request(connection, "GET", "/movies/Дюна")[0] == 404
+
+    assert request(connection, "POST", "/collections", {"name": "Нолан"})[0] == 201
+    assert request(connection, "POST", "/collections/Нолан/movies", {"title": "Темный рыцарь"})[0] == 201
+    assert request(connection, "POST", "/collections", {"name": "Нолан"})[0] == 409
+    assert [movie["title"] for movie in request(connection, "GET", "/collections/Нолан")[1]] == ["Темный рыцарь"]
+    assert request(connection, "GET", "/movies?limit=x")[0] == 400
+    connection.close()
+
+def test_server_batch(server_port: int):
+    """Тест пакетного запроса."""
+    connection = http.client.HTTPConnection("127.0.0.1", server_port)
+    status, result = request(connection, "POST", "/batch", {"requests": [
+        {"path": "/movies/Матрица"},
+        {"method": "POST", "path": "/movies", "body": {"title": "Дюна", "director": "Дени Вильнёв",
+                                                      "year": 2021, "genre": "Научная фантастика"}},
+        {"path": "/search?director=нолан&limit=1"},
+        {"path": "/movies/Несуществующий"},
+    ]})
+    assert status == 200
+    statuses = [response["status"] for response in result["responses"]]
+    assert statuses == [200, 201, 200, 404]
+    assert result["responses"][2]["body"][0]["title"] == "Начало"
+    assert request(connection, "GET", "/movies/дюна")[1]["rating"] is None
+    connection.close()
+
+def test_server_rejects_wrong_field_types(server_port: int):
+    """Тест ответа 400 на поля тела запроса не того типа."""
+    connection = http.client.HTTPConnection("127.0.0.1", server_port)
+    assert request(connection, "POST", "/movies", {"title": 5, "director": "Кто-то", "year": 2000, "genre": "Драма"})[0] == 400
+    assert request(connection, "POST", "/movies", {"title": "Дюна", "director": "Дени Вильнёв",
+                                                   "year": "2021", "genre": "Научная фантастика"})[0] == 201
+    assert request(connection, "POST", "/collections", {"name": 5})[0] == 400
+    assert request(connection, "POST", "/collections", {"name": "Нолан"})[0] == 201
+    assert request(connection, "POST", "/collections/Нолан/movies", {"title": ["Начало"]})[0] == 400
+    assert request(connection, "GET", "/collections")[1] == ["Нолан"]
+    connection.close()
+
+def test_mutations_run_off_the_event_loop():
+    """Тест того, что изменения и тяжелые чтения уходят в пул потоков."""
+    service = MovieService(ConcurrentMovieCollection())
+    assert service.is_heavy("POST", "/movies")
+    assert service.is_heavy("DELETE", "/movies/Начало")
+    assert service.is_heavy("POST", "/collections/Нолан/movies")
+    assert service.is_heavy("GET", "/search")
+    assert not service.is_heavy("GET", "/movies/Начало")
+    assert not service.is_heavy("GET", "/collections")
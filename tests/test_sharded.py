@@ -0,0 +1,122 @@
+import pytest
+from movie_management.movie import Movie
+from movie_management.collection import MovieCollection
+from movie_management.sharded import ShardedMovieCollection
+from movie_management.exceptions import CollectionNotFoundError, MovieAlreadyExistsError, MovieNotFoundError
+
+MOVIES = [
+    Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8),
+    Movie("Темный рыцарь", "Кристофер Нолан", 2008, "Боевик", 9.0),
+    Movie("Интерстеллар", "Кристофер Нолан", 2014, "Научная фантастика", 8.6),
+    Movie("Криминальное чтиво", "Квентин Тарантино", 1994, "Криминал", 8.9),
+    Movie("Матрица", "Вачовски", 1999, "Научная фантастика", 8.7),
+    Movie("Довод", "Кристофер Нолан", 2020, "Научная фантастика"),
+    Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0),
+]
+
+@pytest.fixture
+def sharded_collection():
+    collection = ShardedMovieCollection(shards=3)
+    collection.add_movies(MOVIES)
+    yield collection
+    collection.close()
+
+def test_sharded_search_matches_default_backend(sharded_collection: ShardedMovieCollection):
+    """Тест совпадения параллельного поиска с обычной коллекцией."""
+    reference = MovieCollection()
+    reference.add_movies(MOVIES)
+    queries = [
+        {},
+        {"director": "нолан", "order_by": "-rating"},
+        {"genre": "фант", "order_by": "year", "offset": 1, "limit": 3},
+        {"title": "и", "order_by": "-title", "limit": 2},
+        {"min_rating": 8.7},
+    ]
+    for query in queries:
+        expected = [m.title for m in reference.search_movies(**query)]
+        assert [m.title for m in sharded_collection.search_movies(**query)] == expected
+    assert [m.title for m in sharded_collection] == [m.title for m in reference]
+    assert len(sharded_collection) == len(MOVIES)
+
+def test_sharded_mutations_reach_workers(sharded_collection: ShardedMovieCollection):
+    """Тест того, что поиск после изменений видит новые данные."""
+    assert len(sharded_collection.search_movies(genre="фант")) == 5
+    sharded_collection.remove_movie("Матрица")
+    sharded_collection.add_movie(Movie("Бегущий по лезвию", "Ридли Скотт", 1982, "Научная фантастика", 8.1))
+    assert [m.title for m in sharded_collection.search_movies(genre="фант", year=1982)] == ["Бегущий по лезвию"]
+    assert len(sharded_collection.search_movies(genre="фант")) == 5
+    with pytest.raises(MovieAlreadyExistsError):
+        sharded_collection.add_movie(Movie("начало", "Кто-то", 2000, "Драма"))
+
+def test_sharded_named_collections(sharded_collection: ShardedMovieCollection):
+    """Тест подборок, содержащих фильмы из разных сегментов."""
+    sharded_collection.create_named_collection("Избранное")
+    result = sharded_collection.add_movies_to_named_collection(["Начало", "Дюна", "Матрица", "Нет такого"], "Избранное")
+    assert [title for title, _ in result.failed] == ["Нет такого"]
+    assert [m.title for m in sharded_collection.get_movies_in_named_collection("Избранное", order_by="-rating")] == [
+        "Начало", "Матрица", "Дюна"
+    ]
+    sharded_collection.remove_movie("Дюна")
+    assert [m.title for m in sharded_collection.get_movies_in_named_collection("Избранное")] == ["Матрица", "Начало"]
+    assert sharded_collection.collections_containing("начало") == ["Избранное"]
+    with pytest.raises(MovieNotFoundError):
+        sharded_collection.add_movie_to_named_collection("Дюна", "Избранное")
+    sharded_collection.create_named_collection("Боевики")
+    assert sharded_collection.list_named_collections() == ["Боевики", "Избранное"]
+
+def test_sharded_small_changes_are_sent_as_operations():
+    """Тест передачи небольших изменений рабочим процессам без пересохранения снимков."""
+    with ShardedMovieCollection(shards=2, delta_share=0.5) as collection:
+        collection.add_movies(MOVIES)
+        assert len(collection.search_movies()) == len(MOVIES)
+        versions = list(collection._saved_versions)
+
+        collection.remove_movie("Матрица")
+        collection.add_movies([Movie("Бегущий по лезвию", "Ридли Скотт", 1982, "Научная фантастика", 8.1),
+                               Movie("бегущий по лезвию", "Кто-то", 2000, "Драма")])
+        assert [m.title for m in collection.search_movies(genre="фант", order_by="year")] == [
+            "Бегущий по лезвию", "Начало", "Интерстеллар", "Довод", "Дюна"
+        ]
+        assert collection._saved_versions == versions
+
+        collection.add_movies([Movie(f"Фильм {number}", "Режиссер", 2000, "Драма") for number in range(10)])
+        assert len(collection.search_movies(genre="драма")) == 10
+        assert collection._saved_versions != versions
+
+def test_sharded_collection_queries_match_default_backend(sharded_collection: ShardedMovieCollection):
+    """Тест поиска в подборке, операций над подборками, facets, опечаток и подсказок."""
+    reference = MovieCollection()
+    reference.add_movies(MOVIES)
+    for collection in (reference, sharded_collection):
+        collection.create_named_collection("Избранное")
+        collection.create_named_collection("Нолан")
+        collection.add_movies_to_named_collection(["Начало", "Дюна", "Матрица", "Довод"], "Избранное")
+        collection.add_movies_to_named_collection(["Начало", "Темный рыцарь", "Довод"], "Нолан")
+
+    searches = [
+        {"in_collection": "Избранное"},
+        {"in_collection": "Избранное", "genre": "фант", "min_rating": 8.5, "order_by": "-rating"},
+        {"in_collection": "Нолан", "title": "о", "order_by": "year", "offset": 1, "limit": 1},
+    ]
+    for query in searches:
+        expected = [m.title for m in reference.search_movies(**query)]
+        assert [m.title for m in sharded_collection.search_movies(**query)] == expected
+    for operation in ("union_named_collections", "intersect_named_collections", "difference_named_collections"):
+        expected = [m.title for m in getattr(reference, operation)(["Избранное", "Нолан"], order_by="-year")]
+        assert [m.title for m in getattr(sharded_collection, operation)(["Избранное", "Нолан"], order_by="-year")] == expected
+    with pytest.raises(CollectionNotFoundError):
+        sharded_collection.search_movies(in_collection="Нет такой")
+    with pytest.raises(ValueError):
+        sharded_collection.union_named_collections([])
+
+    assert sharded_collection.facets() == reference.facets()
+    assert sharded_collection.facets(genre="фант") == reference.facets(genre="фант")
+    assert sharded_collection.facets(in_collection="Нолан", min_rating=8.9) == reference.facets(in_collection="Нолан", min_rating=8.9)
+    assert [m.title for m in sharded_collection.fuzzy_search("Дюны", limit=None)] == [
+        m.title for m in reference.fuzzy_search("Дюны", limit=None)
+    ]
+    assert [m.title for m in sharded_collection.fuzzy_search("Начал", limit=1)] == ["Начало"]
+    assert [m.title for m in sharded_collection.autocomplete("д")] == ["Довод", "Дюна"]
+    assert [m.title for m in sharded_collection.autocomplete("", limit=3, order_by="-rating")] == [
+        m.title for m in reference.autocomplete("", limit=3, order_by="-rating")
+    ]
@@ -0,0 +1,85 @@
+import pytest
+from movie_management.movie import Movie
+from movie_management.collection import MovieCollection
+from movie_management.exceptions import MovieNotFoundError, SnapshotFormatError
+from movie_management.snapshot import HEADER
+
+@pytest.fixture
+def populated_collection() -> MovieCollection:
+    collection = MovieCollection()
+    collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    collection.add_movie(Movie("Темный рыцарь", "Кристофер Нолан", 2008, "Боевик", 9.0))
+    collection.add_movie(Movie("Интерстеллар", "Кристофер Нолан", 2014, "Научная фантастика", 8.6))
+    collection.add_movie(Movie("Криминальное чтиво", "Квентин Тарантино", 1994, "Криминал", 8.9))
+    collection.add_movie(Movie("Довод", "Кристофер Нолан", 2020, "Научная фантастика"))
+    collection.create_named_collection("Нолан")
+    collection.add_movie_to_named_collection("Начало", "Нолан")
+    collection.add_movie_to_named_collection("Довод", "Нолан")
+    collection.create_named_collection("Пустая")
+    return collection
+
+def test_snapshot_roundtrip(populated_collection: MovieCollection, tmp_path):
+    """Тест сохранения и открытия снимка коллекции."""
+    path = str(tmp_path / "catalog.snap")
+    populated_collection.save_snapshot(path)
+
+    restored = MovieCollection.open_snapshot(path)
+    assert len(restored) == 5
+    assert restored.get_movie(" начало ").rating == 8.8
+    assert restored.get_movie("Довод").rating is None
+    assert restored.get_movie("Начало") is restored.get_movie("НАЧАЛО")
+    with pytest.raises(MovieNotFoundError):
+        restored.get_movie("Матрица")
+
+    assert [m.title for m in restored] == [m.title for m in populated_collection]
+    assert restored.list_named_collections() == ["Нолан", "Пустая"]
+    assert restored.collections_containing("Довод") == ["Нолан"]
+
+def test_snapshot_iteration_survives_loading(populated_collection: MovieCollection, tmp_path):
+    """Тест перебора снимка, который во время обхода загружается целиком."""
+    path = str(tmp_path / "catalog.snap")
+    populated_collection.save_snapshot(path)
+
+    restored = MovieCollection.open_snapshot(path)
+    iterator = iter(restored)
+    first = next(iterator)
+    restored.search_movies(director="нолан")
+    assert [first.title] + [m.title for m in iterator] == [m.title for m in populated_collection]
+
+    iterator = iter(restored)
+    next(iterator)
+    restored.remove_movie("Довод")
+    with pytest.raises(RuntimeError):
+        next(iterator)
+
+def test_snapshot_loads_on_search_and_mutation(populated_collection: MovieCollection, tmp_path):
+    """Тест полной загрузки снимка при поиске и изменениях."""
+    path = str(tmp_path / "catalog.snap")
+    populated_collection.save_snapshot(path)
+
+    restored = MovieCollection.open_snapshot(path)
+    assert [m.title for m in restored.search_movies(director="нолан", min_rating=8.7)] == ["Начало", "Темный рыцарь"]
+    restored.remove_movie("Начало")
+    restored.add_movie(Movie("Матрица", "Вачовски", 1999, "Научная фантастика", 8.7))
+    assert [m.title for m in restored.get_movies_in_named_collection("Нолан")] == ["Довод"]
+    assert [m.title for m in restored.search_movies(genre="фантаст")] == ["Довод", "Интерстеллар", "Матрица"]
+
+def test_open_snapshot_rejects_foreign_file(tmp_path):
+    """Тест открытия файла, который не является снимком."""
+    path = tmp_path / "not_a_snapshot.bin"
+    path.write_bytes(b"definitely not a snapshot file, but long enough to hold a header")
+    with pytest.raises(SnapshotFormatError):
+        MovieCollection.open_snapshot(str(path))
+
+def test_open_snapshot_rejects_truncated_file(populated_collection: MovieCollection, tmp_path):
+    """Тест обрезанного снимка: ошибка формата вместо ошибки разбора struct."""
+    path = tmp_path / "catalog.snap"
+    populated_collection.save_snapshot(str(path))
+    data = path.read_bytes()
+    broken = tmp_path / "broken.snap"
+    for size in range(HEADER.size, len(data)):
+        broken.write_bytes(data[:size])
+        with pytest.raises(SnapshotFormatError):
+            restored = MovieCollection.open_snapshot(str(broken))
+            # Обрыв внутри кучи строк обнаруживается при чтении фильмов.
+            restored.search_movies()
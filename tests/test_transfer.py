@@ -0,0 +1,71 @@
+import json
+import pytest
+from movie_management.movie import Movie
+from movie_management.collection import MovieCollection
+from movie_management.transfer import export_movies, import_movies
+
+CSV_DUMP = """title,director,year,genre,rating
+Начало,Кристофер Нолан,2010,Научная фантастика,8.8
+Довод,Кристофер Нолан,2020,Научная фантастика,
+,Без названия,2000,Драма,5.0
+Матрица,Вачовски,девяносто девятый,Научная фантастика,8.7
+Интерстеллар,Кристофер Нолан,2014,Научная фантастика,8.6
+НАЧАЛО,Кристофер Нолан,2010,Научная фантастика,8.8
+Паразиты,Пон Джун-хо,2019,Триллер,8.5
+"""
+
+def test_import_csv_collects_errors(tmp_path):
+    """Тест импорта CSV с отчетом об ошибочных строках."""
+    path = tmp_path / "dump.csv"
+    path.write_text(CSV_DUMP, encoding="utf-8")
+    collection = MovieCollection()
+    collection.add_movie(Movie("Паразиты", "Пон Джун-хо", 2019, "Триллер", 8.5))
+
+    report = import_movies(collection, str(path), format="csv", batch_size=2)
+    assert report.imported == 3
+    assert report.error_count == 4
+    assert [error.line for error in report.errors] == [4, 5, 7, 8]
+    assert [m.title for m in collection] == ["Довод", "Интерстеллар", "Начало", "Паразиты"]
+    assert collection.get_movie("Довод").rating is None
+    assert collection.get_movie("Начало").year == 2010
+
+def test_export_import_roundtrip(tmp_path):
+    """Тест экспорта и повторного импорта каталога в обоих форматах."""
+    collection = MovieCollection()
+    collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    collection.add_movie(Movie("Довод", "Кристофер Нолан", 2020, "Научная фантастика"))
+
+    for format in ("csv", "jsonl"):
+        path = str(tmp_path / f"dump.{format}")
+        assert export_movies(collection, path, format=format) == 2
+        restored = MovieCollection()
+        report = import_movies(restored, path, format=format)
+        assert report.imported == 2 and report.error_count == 0
+        assert [repr(m) for m in restored] == [repr(m) for m in collection]
+
+    first_line = (tmp_path / "dump.jsonl").read_text(encoding="utf-8").splitlines()[0]
+    assert json.loads(first_line)["title"] == "Довод"
+
+def test_unknown_format(tmp_path):
+    """Тест неизвестного формата файла."""
+    with pytest.raises(ValueError):
+        export_movies(MovieCollection(), str(tmp_path / "dump.xml"), format="xml")
+
+def test_import_jsonl_rejects_wrong_types(tmp_path):
+    """Тест отказа в импорте строк JSON Lines с полями не того типа."""
+    rows = [
+        {"title": 123, "director": "Кто-то", "year": 2000, "genre": "Драма"},
+        {"title": "Начало", "director": ["Кристофер Нолан"], "year": 2010, "genre": "Фантастика"},
+        {"title": "Довод", "director": "Кристофер Нолан", "year": 2020.5, "genre": "Фантастика"},
+        {"title": "Дюна", "director": "Дени Вильнёв", "year": 2021, "genre": "Фантастика", "rating": True},
+        {"title": "Матрица", "director": "Вачовски", "year": 1999, "genre": "Фантастика", "rating": 8.7},
+    ]
+    path = tmp_path / "dump.jsonl"
+    path.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in rows), encoding="utf-8")
+    collection = MovieCollection()
+
+    report = import_movies(collection, str(path), format="jsonl")
+    assert report.imported == 1
+    assert [error.line for error in report.errors] == [1, 2, 3, 4]
+    assert "title" in report.errors[0].message and "director" in report.errors[1].message
+    assert [m.title for m in collection] == ["Матрица"]
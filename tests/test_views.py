@@ -0,0 +1,100 @@
+import random
+
+import pytest
+from movie_management.movie import Movie
+from movie_management.collection import MovieCollection
+from movie_management.exceptions import MovieAlreadyExistsError, MovieNotFoundError
+from movie_management.query import between, contains, in_collection
+from movie_management.concurrent import ConcurrentMovieCollection
+from movie_management.views import MaterializedView, _SortedChunks
+
+@pytest.fixture
+def populated_collection() -> MovieCollection:
+    collection = MovieCollection()
+    collection.add_movie(Movie("Начало", "Кристофер Нолан", 2010, "Научная фантастика", 8.8))
+    collection.add_movie(Movie("Темный рыцарь", "Кристофер Нолан", 2008, "Боевик", 9.0))
+    collection.add_movie(Movie("Интерстеллар", "Кристофер Нолан", 2014, "Научная фантастика", 8.6))
+    collection.add_movie(Movie("Криминальное чтиво", "Квентин Тарантино", 1994, "Криминал", 8.9))
+    collection.add_movie(Movie("Матрица", "Вачовски", 1999, "Научная фантастика", 8.7))
+    return collection
+
+def titles(movies):
+    return [movie.title for movie in movies]
+
+def test_view_top_rated(populated_collection: MovieCollection):
+    """Тест полки "лучшая фантастика": фильтр, сортировка, граница и обновления."""
+    view = MaterializedView(populated_collection, contains("genre", "фантаст"), order_by="-rating", limit=2)
+    assert titles(view) == ["Начало", "Матрица"]
+
+    populated_collection.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 9.5))
+    populated_collection.add_movie(Movie("Игла", "Рашид Нугманов", 1988, "Драма", 9.9))
+    assert titles(view.movies()) == ["Дюна", "Начало"]
+
+    populated_collection.remove_movie("Дюна")
+    populated_collection.remove_movie("Начало")
+    assert titles(view) == ["Матрица", "Интерстеллар"]
+    assert len(view) == 2
+
+    view.close()
+    populated_collection.remove_movie("Матрица")
+    assert titles(view) == ["Матрица", "Интерстеллар"]
+
+def test_view_follows_collection_membership(populated_collection: MovieCollection):
+    """Тест представления по подборке: вход, выход и удаление подборки."""
+    populated_collection.create_named_collection("Любимые")
+    view = MaterializedView(populated_collection, in_collection("Любимые") & ~contains("director", "тарантино"))
+    assert titles(view) == []
+
+    populated_collection.add_movies_to_named_collection(["Начало", "Криминальное чтиво", "Матрица"], "Любимые")
+    assert titles(view) == ["Матрица", "Начало"]
+    populated_collection.remove_movie_from_named_collection("Начало", "Любимые")
+    assert titles(view) == ["Матрица"]
+    populated_collection.remove_named_collection("Любимые")
+    assert titles(view) == []
+
+def test_view_matches_recomputed_query(monkeypatch: pytest.MonkeyPatch):
+    """Тест совпадения представления с пересчетом запроса после случайных изменений."""
+    # Короткие отрезки, чтобы изменения делили и удаляли их.
+    monkeypatch.setattr(_SortedChunks, "CHUNK", 2)
+    rng = random.Random(5)
+    collection = MovieCollection()
+    collection.create_named_collection("Полка")
+    query = (between("year", 1990, 2010) | in_collection("Полка")) & ~between("rating", high=3.0)
+    view = MaterializedView(collection, query, order_by="-year", limit=10)
+    for step in range(400):
+        title = f"Фильм {rng.randrange(60)}"
+        action = rng.random()
+        try:
+            if action < 0.5:
+                rating = None if rng.random() < 0.2 else round(rng.uniform(1, 10), 1)
+                collection.add_movie(Movie(title, "Режиссер", rng.randint(1980, 2020), "Драма", rating))
+            elif action < 0.7:
+                collection.remove_movie(title)
+            elif action < 0.9:
+                collection.add_movie_to_named_collection(title, "Полка")
+            else:
+                collection.remove_movie_from_named_collection(title, "Полка")
+        except (MovieAlreadyExistsError, MovieNotFoundError):
+            continue
+        assert titles(view) == titles(collection.query_movies(query, order_by="-year", limit=10))
+
+def test_view_over_concurrent_collection(populated_collection: MovieCollection):
+    """Тест представления над ConcurrentMovieCollection: обновление после публикации пакета."""
+    collection = ConcurrentMovieCollection()
+    collection.add_movies(populated_collection.list_all_movies())
+    collection.create_named_collection("Любимые")
+    view = MaterializedView(collection, in_collection("Любимые"), order_by="-rating")
+    assert titles(view) == []
+
+    with collection.batch() as draft:
+        draft.add_movies_to_named_collection(["Начало", "Матрица"], "Любимые")
+        draft.add_movie(Movie("Дюна", "Дени Вильнёв", 2021, "Научная фантастика", 8.0))
+        draft.add_movie_to_named_collection("Дюна", "Любимые")
+        assert titles(view) == []
+    assert titles(view) == ["Начало", "Матрица", "Дюна"]
+
+    collection.remove_movie("Начало")
+    assert titles(view) == ["Матрица", "Дюна"]
+    view.close()
+    collection.remove_movie("Матрица")
+    assert titles(view) == ["Матрица", "Дюна"]